@@ -0,0 +1,352 @@
+"""
+Micro-benchmarks for woodglue hot paths.
+
+Builds synthetic namespaces (N methods taking and returning nested
+models) and times, in-process:
+
+- `build_method_index`, `generate_openapi_spec`, `generate_llms_txt`
+  per namespace size
+- `generate_method_markdown` and `_serialize_result` per model depth
+  and list length
+- `validate_token` per token-table size
+- `JsonRpcHandler.post` over loopback HTTP, single calls and batches
+
+Usage:
+
+    python devtools/microbench.py run --out base.json
+    python devtools/microbench.py run --sizes 10,100,1000,10000 --out new.json
+    python devtools/microbench.py compare base.json new.json --threshold 0.1
+
+`compare` exits 1 when any benchmark's median got slower by more than
+`--threshold` (a fraction), so it can gate CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.metadata
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from lythonic.compose.namespace import Namespace
+from pydantic import BaseModel, create_model
+
+from woodglue.apps.llm_docs import (
+    build_method_index,
+    generate_llms_txt,
+    generate_method_markdown,
+    generate_openapi_spec,
+)
+from woodglue.apps.rpc import _serialize_result  # pyright: ignore[reportPrivateUsage]
+from woodglue.config import NamespaceEntry
+from woodglue.token_store import validate_token
+
+Bench = Callable[[], Any]
+
+# -- Synthetic namespaces --
+
+
+def nested_model(depth: int) -> type[BaseModel]:
+    """A model chain `depth` levels deep, each level with a few scalar fields."""
+    name = f"Depth{depth}Level"
+    if name + "1" in globals():
+        return globals()[name + "1"]
+    model: type[BaseModel] | None = None
+    for level in range(depth, 0, -1):
+        fields: dict[str, Any] = {
+            "label": (str, "x"),
+            "count": (int, 0),
+            "ratio": (float, 0.5),
+            "tags": (list[str], ["a", "b"]),
+        }
+        if model is not None:
+            fields["child"] = (model, model())
+        model = create_model(f"{name}{level}", **fields)
+        # Resolvable x-global-ref for the spec: register on this module
+        model.__module__ = __name__
+        globals()[model.__name__] = model
+    assert model is not None
+    return model
+
+
+def synthetic_namespace(methods: int, depth: int = 3) -> Namespace:
+    """`methods` api methods, each taking and returning a `depth`-deep model."""
+    model = nested_model(depth)
+    ns = Namespace()
+    for i in range(methods):
+
+        def method(item: Any, limit: int = 10) -> Any:
+            return [item] * min(limit, 3)
+
+        method.__name__ = method.__qualname__ = f"method_{i}"
+        method.__doc__ = f"Synthetic method {i}.\n\nReturns up to `limit` copies of `item`."
+        method.__annotations__ = {"item": model, "limit": int, "return": list[model]}
+        ns.register(method, nsref=f"group_{i % 10}.method_{i}", tags=["api"])
+    return ns
+
+
+def _namespaces(methods: int, depth: int = 3) -> dict[str, tuple[Namespace, NamespaceEntry]]:
+    return {"bench": (synthetic_namespace(methods, depth), NamespaceEntry(gref="unused"))}
+
+
+# -- Benchmarks --
+
+
+def docs_benches(sizes: list[int]) -> dict[str, Bench]:
+    benches: dict[str, Bench] = {}
+    for n in sizes:
+        namespaces = _namespaces(n)
+        index = build_method_index(namespaces)
+        benches[f"build_method_index[{n}]"] = lambda ns=namespaces: build_method_index(ns)
+        benches[f"generate_openapi_spec[{n}]"] = lambda idx=index: generate_openapi_spec(idx)
+        benches[f"generate_llms_txt[{n}]"] = lambda idx=index: generate_llms_txt(idx)
+    for depth in (1, 5, 20):
+        index = build_method_index(_namespaces(1, depth))
+        prefix, methods = next(iter(index.items()))
+        name, node = next(iter(methods.items()))
+        benches[f"generate_method_markdown[depth={depth}]"] = lambda p=prefix, m=name, node_=node: (
+            generate_method_markdown(p, m, node_)
+        )
+    return benches
+
+
+def serialize_benches() -> dict[str, Bench]:
+    benches: dict[str, Bench] = {}
+    for depth in (1, 5, 20):
+        item = nested_model(depth)()
+        for length in (1, 100, 10_000):
+            result = [item] * length
+            benches[f"serialize_result[depth={depth},len={length}]"] = lambda r=result: (
+                _serialize_result(r)
+            )
+    return benches
+
+
+def auth_benches(tmp: Path) -> dict[str, Bench]:
+    import sqlite3
+    from contextlib import closing
+
+    from woodglue.token_store import ensure_token
+
+    benches: dict[str, Bench] = {}
+    for count in (1, 1000):
+        db = tmp / f"auth_{count}.db"
+        token = ensure_token(db)
+        assert token is not None
+        with closing(sqlite3.connect(db)) as conn:
+            conn.executemany(
+                "INSERT INTO tokens (token, created_at) VALUES (?, ?)",
+                [(f"extra-{i}", "2020-01-01") for i in range(count - 1)],
+            )
+            conn.commit()
+        benches[f"validate_token[tokens={count}]"] = lambda d=db, t=token: validate_token(d, t)
+    return benches
+
+
+def rpc_benches(sizes: list[int], auth_db: Path | None) -> dict[str, Callable[[], Any]]:
+    """
+    `post` timings need a running loop, so each bench drives its own
+    in-process server; the callables block until the requests finish.
+    """
+    import tornado.httpclient
+    import tornado.httpserver
+    import tornado.testing
+
+    from woodglue.apps.server import create_app
+    from woodglue.config import AuthConfig, WoodglueConfig, WoodglueStorageConfig
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    benches: dict[str, Bench] = {}
+    item = nested_model(3)().model_dump(mode="json")
+
+    for n in sizes:
+        namespaces = _namespaces(n)
+        config = WoodglueConfig(
+            namespaces={"bench": NamespaceEntry(gref="unused")},
+            auth=AuthConfig(enabled=auth_db is not None),
+            storage=WoodglueStorageConfig(auth_db=auth_db),
+        )
+
+        async def start(namespaces: Any = namespaces, config: Any = config) -> str:
+            app = create_app(namespaces=namespaces, config=config)
+            app.settings["log_function"] = lambda _handler: None  # pyright: ignore[reportUnknownLambdaType]
+            sock, port = tornado.testing.bind_unused_port()
+            tornado.httpserver.HTTPServer(app).add_sockets([sock])
+            return f"http://127.0.0.1:{port}/rpc"
+
+        url = loop.run_until_complete(start())
+        client = tornado.httpclient.AsyncHTTPClient()
+        headers = {"Content-Type": "application/json"}
+        if auth_db is not None:
+            from woodglue.token_store import get_single_token
+
+            headers["Authorization"] = f"Bearer {get_single_token(auth_db)}"
+        single = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": f"bench.group_{(n - 1) % 10}.method_{n - 1}",
+                "params": {"item": item, "limit": 3},
+                "id": 1,
+            }
+        )
+        batch = json.dumps([{**json.loads(single), "id": i} for i in range(50)])
+
+        def post(body: str, url: str = url, client: Any = client, headers: Any = headers) -> Any:
+            return loop.run_until_complete(
+                client.fetch(url, method="POST", body=body, headers=headers)
+            )
+
+        benches[f"rpc_post[{n}]"] = lambda post=post, body=single: post(body)
+        benches[f"rpc_post_batch50[{n}]"] = lambda post=post, body=batch: post(body)
+    return benches
+
+
+# -- Runner --
+
+
+def measure(fn: Bench, repeat: int, min_time: float) -> dict[str, Any]:
+    """Time `fn` like `timeit`: calibrate loops to `min_time`, take `repeat` samples."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    with tempfile.TemporaryDirectory() as tmp:
+        auth = auth_benches(Path(tmp))
+        benches: dict[str, Bench] = {
+            **docs_benches(sizes),
+            **serialize_benches(),
+            **auth,
+            **rpc_benches(sizes, Path(tmp) / "auth_1.db" if args.auth else None),
+        }
+        results: dict[str, Any] = {}
+        for name, fn in benches.items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(fn, args.repeat, args.min_time)
+            print(f"{name:<50} {_fmt(results[name]['median'])}", flush=True)
+    try:
+        version = importlib.metadata.version("woodglue")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    report = {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "woodglue_version": version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.out}")
+    return 0
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def compare_results(
+    base: dict[str, Any], new: dict[str, Any], threshold: float
+) -> tuple[list[str], list[str]]:
+    """
+    Compare medians of two `run` reports. Returns `(lines, regressions)`
+    where `regressions` names benchmarks slower by more than `threshold`.
+
+    >>> base = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    >>> new = {"results": {"a": {"median": 1.5}, "b": {"median": 0.5}, "c": {"median": 1.0}}}
+    >>> lines, regressions = compare_results(base, new, 0.1)
+    >>> regressions
+    ['a']
+    >>> lines[0].split()
+    ['a', '1.00', 's', '1.50', 's', '+50.0%', 'REGRESSION']
+    """
+    lines: list[str] = []
+    regressions: list[str] = []
+    base_results: dict[str, Any] = base["results"]
+    for name, stats in new["results"].items():
+        if name not in base_results:
+            continue
+        before, after = base_results[name]["median"], stats["median"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  improved"
+        lines.append(f"{name:<50} {_fmt(before)}  {_fmt(after)}  {change:+7.1%}{flag}")
+    return lines, regressions
+
+
+def compare(args: argparse.Namespace) -> int:
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    lines, regressions = compare_results(base, new, args.threshold)
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n\n")[0].strip())
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="run the benchmarks")
+    run_p.add_argument("--sizes", default="10,100,1000", help="namespace sizes (methods)")
+    run_p.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    run_p.add_argument("--repeat", type=int, default=5)
+    run_p.add_argument("--min-time", type=float, default=0.1, help="seconds per sample")
+    run_p.add_argument("--auth", action="store_true", help="enable bearer auth for rpc_post")
+    run_p.add_argument("--out", default="", help="write JSON results here")
+    run_p.set_defaults(func=run)
+    cmp_p = sub.add_parser("compare", help="compare two result files")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=0.1)
+    cmp_p.set_defaults(func=compare)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Response compression negotiated from `Accept-Encoding`.
+
+`compression_transform()` builds a Tornado `OutputTransform` that encodes
+compressible responses with the best codec the client accepts: `zstd` and
+`br` when the optional `zstandard` / `brotli` packages are installed,
+`gzip` always. `DocsCache` keeps generated docs artifacts together with
+precompressed variants so they are encoded once, not per request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import importlib.util
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any, Protocol
+
+import tornado.httputil
+import tornado.web
+from typing_extensions import override
+
+from woodglue.config import CompressionConfig
+
+_OPTIONAL_MODULES: dict[str, str] = {"zstd": "zstandard", "br": "brotli"}
+
+COMPRESSIBLE_TYPES: frozenset[str] = frozenset(
+    {
+        "application/javascript",
+        "application/cbor",
+        "application/json",
+        "application/msgpack",
+        "application/xml",
+        "image/svg+xml",
+    }
+)
+
+
+@cache
+def encoding_available(encoding: str) -> bool:
+    """True if the codec for `encoding` can be used in this process."""
+    if encoding == "gzip":
+        return True
+    module = _OPTIONAL_MODULES.get(encoding)
+    return module is not None and importlib.util.find_spec(module) is not None
+
+
+def offered_encodings(config: CompressionConfig) -> list[str]:
+    """Configured encodings that are actually available, in preference order."""
+    return [e for e in config.encodings if encoding_available(e)]
+
+
+def negotiate(accept_encoding: str, offered: list[str]) -> str | None:
+    """
+    Pick the encoding to use given an `Accept-Encoding` header and the
+    server's `offered` encodings (in preference order). Highest q-value
+    wins; ties go to the server's preference. `q=0` excludes a coding.
+
+    >>> negotiate("gzip, deflate, br", ["zstd", "br", "gzip"])
+    'br'
+    >>> negotiate("gzip;q=1.0, br;q=0.5", ["zstd", "br", "gzip"])
+    'gzip'
+    >>> negotiate("*;q=0.1, gzip;q=0", ["gzip", "br"])
+    'br'
+    >>> negotiate("identity", ["gzip"]) is None
+    True
+    """
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best: str | None = None
+    best_q = 0.0
+    for encoding in offered:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _StreamCompressor(Protocol):
+    def feed(self, chunk: bytes, finishing: bool) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._obj: Any = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def feed(self, chunk: bytes, finishing: bool) -> bytes:
+        out = self._obj.compress(chunk)
+        return out + self._obj.flush(zlib.Z_FINISH if finishing else zlib.Z_SYNC_FLUSH)
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        zstandard: Any = importlib.import_module("zstandard")
+        self._flush_block: int = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._obj: Any = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def feed(self, chunk: bytes, finishing: bool) -> bytes:
+        out = self._obj.compress(chunk)
+        return out + (self._obj.flush() if finishing else self._obj.flush(self._flush_block))
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        brotli: Any = importlib.import_module("brotli")
+        self._obj: Any = brotli.Compressor(quality=quality)
+
+    def feed(self, chunk: bytes, finishing: bool) -> bytes:
+        out = self._obj.process(chunk)
+        return out + (self._obj.finish() if finishing else self._obj.flush())
+
+
+def _compressor(encoding: str, config: CompressionConfig) -> _StreamCompressor:
+    if encoding == "zstd":
+        return _ZstdCompressor(config.zstd_level)
+    if encoding == "br":
+        return _BrotliCompressor(config.brotli_quality)
+    return _GzipCompressor(config.gzip_level)
+
+
+def compress(data: bytes, encoding: str, config: CompressionConfig) -> bytes:
+    """One-shot compression of `data` with the given encoding."""
+    return _compressor(encoding, config).feed(data, True)
+
+
+def is_compressible(content_type: str) -> bool:
+    """
+    >>> is_compressible("application/json; charset=utf-8")
+    True
+    >>> is_compressible("image/png")
+    False
+    """
+    ctype = content_type.split(";")[0].strip().lower()
+    return ctype.startswith("text/") or ctype in COMPRESSIBLE_TYPES
+
+
+def _add_vary(headers: tornado.httputil.HTTPHeaders) -> None:
+    vary = headers.get("Vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def compression_transform(config: CompressionConfig) -> type[tornado.web.OutputTransform]:
+    """Build an `OutputTransform` class bound to `config`."""
+    offered = offered_encodings(config)
+
+    class CompressionTransform(tornado.web.OutputTransform):
+        def __init__(self, request: tornado.httputil.HTTPServerRequest) -> None:
+            super().__init__(request)
+            self._encoding: str | None = negotiate(
+                request.headers.get("Accept-Encoding", ""), offered
+            )
+            self._compressor: _StreamCompressor | None = None
+
+        @override
+        def transform_first_chunk(
+            self,
+            status_code: int,
+            headers: tornado.httputil.HTTPHeaders,
+            chunk: bytes,
+            finishing: bool,
+        ) -> tuple[int, tornado.httputil.HTTPHeaders, bytes]:
+            if "Content-Encoding" in headers or status_code in (204, 304):
+                return status_code, headers, chunk
+            if not is_compressible(headers.get("Content-Type", "")):
+                return status_code, headers, chunk
+            _add_vary(headers)
+            if self._encoding is None or (finishing and len(chunk) < config.min_size):
+                return status_code, headers, chunk
+            headers["Content-Encoding"] = self._encoding
+            self._compressor = _compressor(self._encoding, config)
+            chunk = self._compressor.feed(chunk, finishing)
+            if "Content-Length" in headers:
+                if finishing:
+                    headers["Content-Length"] = str(len(chunk))
+                else:
+                    del headers["Content-Length"]
+            return status_code, headers, chunk
+
+        @override
+        def transform_chunk(self, chunk: bytes, finishing: bool) -> bytes:
+            if self._compressor is None:
+                return chunk
+            return self._compressor.feed(chunk, finishing)
+
+    return CompressionTransform
+
+
+@dataclass
+class DocsArtifact:
+    """A generated docs body plus its precompressed variants by encoding."""
+
+    body: bytes
+    variants: dict[str, bytes] = field(default_factory=dict)
+    etag: str = ""
+    """Strong validator for `body`; variants append `-<encoding>`."""
+
+    def __post_init__(self) -> None:
+        if not self.etag:
+            self.etag = hashlib.sha1(self.body).hexdigest()
+
+
+class DocsCache:
+    """
+    Generated docs artifacts keyed by path. The method index is fixed once
+    the app is built, so each artifact is generated and compressed once.
+    """
+
+    config: CompressionConfig
+
+    def __init__(self, config: CompressionConfig) -> None:
+        self.config = config
+        self._artifacts: dict[str, DocsArtifact] = {}
+
+    def get(self, key: str, build: Callable[[], str | bytes]) -> DocsArtifact:
+        artifact = self._artifacts.get(key)
+        if artifact is None:
+            body = build()
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            artifact = DocsArtifact(body=body)
+            if self.config.enabled and len(body) >= self.config.min_size:
+                for encoding in offered_encodings(self.config):
+                    artifact.variants[encoding] = compress(body, encoding, self.config)
+            self._artifacts[key] = artifact
+        return artifact
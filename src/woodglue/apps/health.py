@@ -0,0 +1,32 @@
+"""Readiness endpoint backed by the event-loop lag monitor."""
+
+from __future__ import annotations
+
+import tornado.web
+from typing_extensions import override
+
+from woodglue.loop_monitor import LoopMonitor
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    """GET /healthz
+
+    Unauthenticated so load balancers can probe it. Responds 200 while the
+    loop lag is under `LoopMonitorConfig.shed_lag` and 503 otherwise, with
+    the current `LoopStats` as the JSON body.
+    """
+
+    @override
+    def get(self) -> None:
+        self.set_header("Content-Type", "application/json")
+        self.set_header("Cache-Control", "no-store")
+        loop_monitor: LoopMonitor | None = self.application.settings.get("loop_monitor")
+        if loop_monitor is None:
+            self.write({"status": "ok"})
+            return
+        stats = loop_monitor.stats()
+        if stats.overloaded:
+            self.set_status(503)
+        self.write(
+            {"status": "overloaded" if stats.overloaded else "ok", **stats.model_dump(mode="json")}
+        )
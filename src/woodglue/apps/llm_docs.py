@@ -10,17 +10,23 @@ Generates three artifact types:
 from __future__ import annotations
 
 import inspect
+import json
 import types
 import typing
+from collections.abc import Callable
 from typing import Any
 
 import tornado.web
 from lythonic.compose import Method
 from lythonic.compose.namespace import Namespace, NamespaceNode
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing_extensions import override
 
+from woodglue.call_policy import IDEMPOTENT_TAG
 from woodglue.config import NamespaceEntry
+from woodglue.http_cache import allows_get
+from woodglue.pagination import CURSOR_PARAM, LIMIT_PARAM, PAGINATED_TAG, page_item_type
+from woodglue.response_cache import cache_hint
 
 
 def walk_namespace(ns: Namespace) -> list[tuple[str, NamespaceNode]]:
@@ -211,6 +217,9 @@ def generate_method_markdown(prefix: str, method_name: str, node: NamespaceNode)
         "| Name | Type | Required | Description |",
         "|------|------|----------|-------------|",
     ]
+    if allows_get(node):
+        get_note = f"Read-only: also served by `GET /rpc/{qualified}`, params in the query string."
+        lines[3:3] = [get_note, ""]
 
     for arg in method.args:
         ann = resolved.get(arg.name, arg.annotation)
@@ -219,9 +228,26 @@ def generate_method_markdown(prefix: str, method_name: str, node: NamespaceNode)
         desc = arg.description or "-"
         lines.append(f"| {arg.name} | {atype} | {required} | {desc} |")
 
+    paginated = PAGINATED_TAG in node.tags
+    declared = {arg.name for arg in method.args}
+    if paginated and CURSOR_PARAM not in declared:
+        if LIMIT_PARAM not in declared:
+            lines.append(f"| {LIMIT_PARAM} | int | no | Page size |")
+        lines.append(f"| {CURSOR_PARAM} | str | no | `next_cursor` of the previous page |")
+
     # Return type
     ret = resolved.get("return", method.return_annotation)
-    if ret is not None and ret is not inspect.Parameter.empty:
+    if paginated:
+        item = _type_display(page_item_type(ret))
+        lines.extend(
+            [
+                "",
+                "## Returns",
+                "",
+                f"`Page[{item}]`: `items` and `next_cursor`, which is null on the last page.",
+            ]
+        )
+    elif ret is not None and ret is not inspect.Parameter.empty:
         lines.extend(["", "## Returns", "", f"`{_type_display(ret)}`"])
 
     # Referenced models
@@ -239,11 +265,20 @@ def generate_method_markdown(prefix: str, method_name: str, node: NamespaceNode)
 # ---- OpenAPI generation ----
 
 
+def _models_in(annotation: Any) -> list[type[BaseModel]]:
+    """BaseModel classes appearing anywhere in a (possibly generic) annotation."""
+    if _is_basemodel(annotation):
+        return [annotation]
+    return [m for arg in typing.get_args(annotation) for m in _models_in(arg)]
+
+
 def _python_type_to_schema(annotation: Any) -> dict[str, Any]:
     """Map a Python type annotation to a JSON Schema fragment.
 
     For BaseModel types, includes an `x-global-ref` vendor extension
     with the fully qualified module path for smart client deserialization.
+    Generic annotations (`list[X]`, `X | None`, `dict[str, X]`) get the
+    full pydantic schema, with `x-global-ref` on each model in `$defs`.
     """
     if annotation is None or annotation is inspect.Parameter.empty:
         return {"type": "string"}
@@ -259,7 +294,33 @@ def _python_type_to_schema(annotation: Any) -> dict[str, Any]:
         schema = annotation.model_json_schema()
         schema["x-global-ref"] = f"{annotation.__module__}:{annotation.__qualname__}"
         return schema
-    return {"type": "string"}
+    try:
+        schema = TypeAdapter(annotation).json_schema()
+    except Exception:
+        return {"type": "string"}
+    defs: dict[str, Any] = schema.get("$defs", {})
+    for model in _models_in(annotation):
+        if model.__name__ in defs:
+            defs[model.__name__]["x-global-ref"] = f"{model.__module__}:{model.__qualname__}"
+    return schema
+
+
+def _page_schema(annotation: Any) -> dict[str, Any]:
+    """Response schema of a paginated method: `items` plus `next_cursor`."""
+    items = _python_type_to_schema(list[page_item_type(annotation)])
+    defs = items.pop("$defs", None)
+    schema: dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "items": items,
+            "next_cursor": {"anyOf": [{"type": "string"}, {"type": "null"}]},
+        },
+        "required": ["items"],
+        "x-paginated": True,
+    }
+    if defs:
+        schema["$defs"] = defs
+    return schema
 
 
 def _json_safe_default(value: Any) -> Any:
@@ -292,6 +353,10 @@ def generate_openapi_spec(
                 properties[arg.name] = prop
                 if not arg.is_optional:
                     required.append(arg.name)
+            paginated = PAGINATED_TAG in node.tags
+            if paginated and CURSOR_PARAM not in properties:
+                properties.setdefault(LIMIT_PARAM, {"type": "integer", "minimum": 1})
+                properties[CURSOR_PARAM] = {"type": "string"}
 
             request_body_schema: dict[str, Any] = {
                 "type": "object",
@@ -301,7 +366,9 @@ def generate_openapi_spec(
                 request_body_schema["required"] = required
 
             ret = method.return_annotation
-            if ret is None or ret is inspect.Parameter.empty:
+            if paginated:
+                response_schema = _page_schema(ret)
+            elif ret is None or ret is inspect.Parameter.empty:
                 response_schema: dict[str, Any] = {"type": "object"}
             else:
                 response_schema = _python_type_to_schema(ret)
@@ -331,8 +398,17 @@ def generate_openapi_spec(
             }
             if method.doc:
                 operation["description"] = method.doc.strip()
+            hint = cache_hint(node)
+            if hint is not None:
+                operation["x-cache"] = hint.model_dump()
+            if IDEMPOTENT_TAG in node.tags:
+                operation["x-idempotent"] = True
+            if paginated:
+                operation["x-paginated"] = True
 
             paths[path] = {"post": operation}
+            if allows_get(node):
+                paths[path]["get"] = _get_operation(operation, properties, required)
 
     return {
         "openapi": "3.0.3",
@@ -344,6 +420,21 @@ def generate_openapi_spec(
     }
 
 
+def _get_operation(
+    operation: dict[str, Any], properties: dict[str, Any], required: list[str]
+) -> dict[str, Any]:
+    """
+    `GET` variant of a read-only method's operation: params become query
+    parameters. It has no `operationId`, which stays with the `POST`.
+    """
+    get_op = {k: v for k, v in operation.items() if k not in ("operationId", "requestBody")}
+    get_op["parameters"] = [
+        {"name": name, "in": "query", "required": name in required, "schema": schema}
+        for name, schema in properties.items()
+    ]
+    return get_op
+
+
 # ---- Tornado handlers ----
 
 
@@ -372,6 +463,40 @@ class _AuthDocHandler(tornado.web.RequestHandler):
             self.finish("Unauthorized")
             return
 
+    def _write_artifact(
+        self, key: str, content_type: str, build: Callable[[], str | bytes]
+    ) -> None:
+        """
+        Write a generated artifact through the app's `DocsCache`, choosing a
+        precompressed variant when the client accepts one. The artifact's
+        ETag is set up front, so `If-None-Match` revalidation answers 304
+        without hashing the body on every request.
+        """
+        from woodglue.apps.compression import DocsCache, negotiate
+
+        self.set_header("Content-Type", content_type)
+        docs_cache: DocsCache | None = self.application.settings.get("docs_cache")
+        if docs_cache is None:
+            self.write(build())
+            return
+        artifact = docs_cache.get(key, build)
+        self.set_header("Vary", "Accept-Encoding")
+        encoding = negotiate(
+            self.request.headers.get("Accept-Encoding", ""), list(artifact.variants)
+        )
+        # Tornado only checks If-None-Match itself when it computes the ETag
+        self.set_header(
+            "Etag", f'"{artifact.etag}-{encoding}"' if encoding else f'"{artifact.etag}"'
+        )
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        if encoding is None:
+            self.write(artifact.body)
+            return
+        self.set_header("Content-Encoding", encoding)
+        self.write(artifact.variants[encoding])
+
 
 class LlmsTxtHandler(_AuthDocHandler):
     """GET /docs/llms.txt"""
@@ -381,8 +506,9 @@ class LlmsTxtHandler(_AuthDocHandler):
         method_index: dict[str, dict[str, NamespaceNode]] = self.application.settings[
             "method_index"
         ]
-        self.set_header("Content-Type", "text/plain; charset=utf-8")
-        self.write(generate_llms_txt(method_index))
+        self._write_artifact(
+            "llms.txt", "text/plain; charset=utf-8", lambda: generate_llms_txt(method_index)
+        )
 
 
 class MethodDocHandler(_AuthDocHandler):
@@ -418,9 +544,11 @@ class MethodDocHandler(_AuthDocHandler):
         if node is None:
             raise tornado.web.HTTPError(404)
 
-        md = generate_method_markdown(prefix, method_name, node)
-        self.set_header("Content-Type", "text/markdown; charset=utf-8")
-        self.write(md)
+        self._write_artifact(
+            f"methods/{name}",
+            "text/markdown; charset=utf-8",
+            lambda: generate_method_markdown(prefix, method_name, node),
+        )
 
 
 class OpenApiHandler(_AuthDocHandler):
@@ -431,5 +559,8 @@ class OpenApiHandler(_AuthDocHandler):
         method_index: dict[str, dict[str, NamespaceNode]] = self.application.settings[
             "method_index"
         ]
-        self.set_header("Content-Type", "application/json")
-        self.write(generate_openapi_spec(method_index))
+        self._write_artifact(
+            "openapi.json",
+            "application/json",
+            lambda: json.dumps(generate_openapi_spec(method_index)),
+        )
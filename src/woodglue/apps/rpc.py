@@ -7,17 +7,46 @@ parameters against Method.args, and returns standard JSON-RPC 2.0 responses.
 
 from __future__ import annotations
 
+import asyncio
 import inspect
-import json
 import logging
+import random
+import time
+from collections.abc import Iterable
+from contextlib import nullcontext
 from typing import Any
 
+import tornado.escape
 import tornado.web
+from lythonic.compose.namespace import NamespaceNode
 from pydantic import BaseModel, ValidationError
+from pydantic_core import to_jsonable_python
 from typing_extensions import override
 
+from woodglue.codec import (
+    BINARY_TYPES,
+    JSON,
+    choose_response_type,
+    decode,
+    encode,
+    is_available,
+    media_type,
+)
+from woodglue.timing import (
+    REQUEST_ID_HEADER,
+    SERVER_TIMING_HEADER,
+    RequestTiming,
+    accept_request_id,
+    current_request_id,
+    log_access,
+)
+from woodglue.tracing import TRACEPARENT_HEADER, Span, Tracer, current_span, parse_traceparent
+
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = 100
+"""Most calls accepted in one JSON-RPC batch request."""
+
 # JSON-RPC 2.0 standard error codes
 PARSE_ERROR = -32700
 INVALID_REQUEST = -32600
@@ -25,38 +54,154 @@ METHOD_NOT_FOUND = -32601
 INVALID_PARAMS = -32602
 INTERNAL_ERROR = -32603
 
-
-def _error_response(code: int, message: str, request_id: Any = None) -> dict[str, Any]:
+# Implementation-defined server errors (-32000 to -32099)
+UNAUTHORIZED = -32000
+SERVER_BUSY = -32001
+DEADLINE_EXCEEDED = -32002
+OVERLOADED = -32003
+
+HTTP_STATUS: dict[int, int] = {
+    PARSE_ERROR: 400,
+    INVALID_REQUEST: 400,
+    METHOD_NOT_FOUND: 404,
+    INVALID_PARAMS: 400,
+    INTERNAL_ERROR: 500,
+    UNAUTHORIZED: 401,
+    SERVER_BUSY: 503,
+    DEADLINE_EXCEEDED: 504,
+    OVERLOADED: 503,
+}
+"""HTTP status for each error code on the per-method routes."""
+
+AUTH_REQUIRED_TAG = "auth_required"
+"""Methods with this tag are refused unless the request was authenticated."""
+
+
+def _error_response(
+    code: int, message: str, request_id: Any = None, data: Any = None
+) -> dict[str, Any]:
+    error: dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
     return {
         "jsonrpc": "2.0",
-        "error": {"code": code, "message": message},
+        "error": error,
         "id": request_id,
     }
 
 
-def _serialize_result(result: Any) -> Any:
-    """Serialize a result for JSON-RPC response."""
+def _serialize_result(result: Any, binary: bool = False) -> Any:
+    """
+    Serialize a result for JSON-RPC response. With `binary=True` (msgpack
+    or CBOR responses) `bytes` pass through unchanged instead of being
+    stringified, including `bytes` fields of models.
+    """
     if result is None or isinstance(result, str | int | float | bool):
         return result
+    if binary and isinstance(result, bytes):
+        return result
     if isinstance(result, BaseModel):
+        if binary:
+            return _binary_dump(result.model_dump())
         return result.model_dump(mode="json")
     if isinstance(result, list):
-        return list(map(_serialize_result, result))
+        return [_serialize_result(item, binary) for item in result]
     if isinstance(result, dict):
-        return {_serialize_result(k): _serialize_result(v) for k, v in result.items()}
+        return {
+            _serialize_result(k, binary): _serialize_result(v, binary) for k, v in result.items()
+        }
     return str(result)
 
 
+def _binary_dump(value: Any) -> Any:
+    """
+    Make a python-mode `model_dump()` encodable by msgpack/CBOR: `bytes`
+    stay native, everything else is converted as in JSON mode.
+
+    >>> import datetime
+    >>> _binary_dump({"raw": b"ab", "at": datetime.date(2024, 1, 2), "ids": (1, 2)})
+    {'raw': b'ab', 'at': '2024-01-02', 'ids': [1, 2]}
+    """
+    if value is None or isinstance(value, str | int | float | bool | bytes):
+        return value
+    if isinstance(value, dict):
+        return {_binary_dump(k): _binary_dump(v) for k, v in value.items()}
+    if isinstance(value, list | tuple | set | frozenset):
+        return [_binary_dump(item) for item in value]
+    return to_jsonable_python(value)
+
+
 class JsonRpcHandler(tornado.web.RequestHandler):
     """Tornado handler that speaks JSON-RPC 2.0 over HTTP POST.
 
+    Request bodies are JSON unless `Content-Type` names msgpack or CBOR;
+    the response encoding follows `Accept`, defaulting to the request's.
+
     Expects ``self.application.settings['namespaces']`` to be a dict mapping
     prefix strings to ``lythonic.compose.namespace.Namespace`` instances.
+
+    A JSON array body is a batch: its calls are dispatched concurrently and
+    answered with an array of responses in the same order.
+
+    Each call runs as a task bounded by its time budget; the task is
+    cancelled when the deadline passes or the client disconnects. Requests
+    carrying `"async_job": true` are handed to the `JobManager` instead and
+    answered with a `JobInfo` straight away.
+
+    Methods tagged `auth_required` are refused unless the request carried
+    a valid token, so they are unavailable while auth is disabled.
+
+    Time spent in auth, parse, validate, call and serialize is summed per
+    request (over all calls of a batch) and sent as a `Server-Timing`
+    header. The request id is echoed as `X-Request-Id`, and a sample of
+    requests is written to the access log (see `TimingConfig`).
     """
 
+    _call_tasks: set[asyncio.Future[Any]] | None = None
+    _client_gone: bool = False
+    _authenticated: bool = False
+    _request_type: str = JSON
+    _response_type: str = JSON
+
+    @override
+    def initialize(self) -> None:
+        # Tornado calls initialize() from __init__
+        self._timing: RequestTiming = RequestTiming()  # pyright: ignore[reportUninitializedInstanceVariable]
+        self._methods: list[str] = []  # pyright: ignore[reportUninitializedInstanceVariable]
+        self._request_id: str = accept_request_id(  # pyright: ignore[reportUninitializedInstanceVariable]
+            self.request.headers.get(REQUEST_ID_HEADER)
+        )
+        self._span: Span | None = None  # pyright: ignore[reportUninitializedInstanceVariable]
+        # Sampled calls for traffic capture: method, params, start, duration, in batch, error
+        self._captured: list[tuple[str, Any, float, float, bool, int | None]] = []  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def on_connection_close(self) -> None:
+        self._client_gone = True
+        for task in self._call_tasks or ():
+            task.cancel()
+
     @override
     def prepare(self) -> None:
-        self.set_header("Content-Type", "application/json")
+        # Set in the request's own task context, so it does not leak across requests
+        current_request_id.set(self._request_id)
+        self.set_header(REQUEST_ID_HEADER, self._request_id)
+        tracer: Tracer | None = self.application.settings.get("tracer")
+        if tracer is not None:
+            # Continue the caller's trace if it sent a traceparent header
+            parent = parse_traceparent(self.request.headers.get(TRACEPARENT_HEADER))
+            self._span = tracer.start_span(
+                f"{self.request.method} {self.request.path}",
+                "server",
+                parent,
+                request_id=self._request_id,
+            )
+            current_span.set(self._span.context)
+        self._request_type = media_type(self.request.headers.get("Content-Type"))
+        self._response_type = choose_response_type(
+            self.request.headers.get("Accept"), self._request_type
+        )
+        self.set_header("Content-Type", self._response_type)
         if not self.application.settings.get("auth_enabled", False):
             return
         auth_db = self.application.settings.get("auth_db")
@@ -68,9 +213,33 @@ class JsonRpcHandler(tornado.web.RequestHandler):
             return
         from woodglue.token_store import validate_token
 
-        if not validate_token(auth_db, token):
+        with self._timing.measure("auth"):
+            valid = validate_token(auth_db, token)
+        if not valid:
             self._write_unauthorized()
             return
+        self._authenticated = True
+
+    @override
+    def finish(self, chunk: str | bytes | dict[str, Any] | None = None) -> asyncio.Future[None]:
+        if self.application.settings["config"].timing.server_timing:
+            self.set_header(SERVER_TIMING_HEADER, self._timing.header())
+        return super().finish(chunk)
+
+    @override
+    def on_finish(self) -> None:
+        if self._captured:
+            self._record_captured()
+        timing = self.application.settings["config"].timing
+        slow = timing.slow_request
+        if (slow is not None and self._timing.total() >= slow) or (
+            random.random() < timing.access_log_sample_rate
+        ):
+            log_access(self._request_id, self._methods, self.get_status(), self._timing)
+        if self._span is not None:
+            status = self.get_status()
+            self._span.set(http_status=status, methods=self._methods)
+            self._span.end("error" if status >= 500 else "ok")
 
     def _extract_bearer_token(self) -> str:
         auth_header = self.request.headers.get("Authorization", "")
@@ -78,66 +247,269 @@ class JsonRpcHandler(tornado.web.RequestHandler):
             return auth_header[7:].strip()
         return ""
 
+    def _reply(self, payload: dict[str, Any]) -> None:
+        """Write a JSON-RPC envelope in the negotiated response encoding."""
+        if self._response_type == JSON:
+            self.write(payload)
+        else:
+            self.write(encode(payload, self._response_type))
+
+    def _reply_batch(self, payloads: list[dict[str, Any]]) -> None:
+        """Write a batch response; Tornado's `write()` refuses bare lists."""
+        self.write(encode(payloads, self._response_type))
+
     def _write_unauthorized(self) -> None:
-        self.write(
-            {"jsonrpc": "2.0", "error": {"code": -32000, "message": "Unauthorized"}, "id": None}
+        self._reply(
+            {
+                "jsonrpc": "2.0",
+                "error": {"code": UNAUTHORIZED, "message": "Unauthorized"},
+                "id": None,
+            }
         )
         self.finish()
 
     @override
     async def post(self) -> None:
-        request_id: Any = None
-
-        # Parse JSON body
+        # Parse body (JSON unless a binary Content-Type was sent)
+        request_type = self._request_type if self._request_type in BINARY_TYPES else JSON
+        if not is_available(request_type):
+            self._reply(_error_response(PARSE_ERROR, f"Unsupported content type: {request_type}"))
+            return
         try:
-            body = json.loads(self.request.body)
-        except (json.JSONDecodeError, TypeError):
-            self.write(_error_response(PARSE_ERROR, "Parse error"))
+            with self._timing.measure("parse"):
+                body = decode(self.request.body, request_type)
+        except (ValueError, TypeError):
+            self._reply(_error_response(PARSE_ERROR, "Parse error"))
             return
 
-        # Batch requests are not supported
-        if isinstance(body, list):
-            self.write(_error_response(INVALID_REQUEST, "Batch requests are not supported"))
+        binary = self._response_type in BINARY_TYPES
+
+        if not isinstance(body, list):
+            response = await self._dispatch(body, binary)
+            if response is not None:
+                with self._timing.measure("serialize"):
+                    self._reply(response)
+            return
+
+        # Batch: dispatch every call concurrently, reply once with all results
+        if not body:
+            self._reply(_error_response(INVALID_REQUEST, "Invalid Request: empty batch"))
+            return
+        if len(body) > MAX_BATCH_SIZE:
+            self._reply(
+                _error_response(
+                    INVALID_REQUEST, f"Batch too large: {len(body)} > {MAX_BATCH_SIZE} calls"
+                )
+            )
+            return
+        responses = await asyncio.gather(
+            *(self._dispatch(item, binary, in_batch=True) for item in body)
+        )
+        if self._client_gone:
             return
+        with self._timing.measure("serialize"):
+            self._reply_batch([r for r in responses if r is not None])
+
+    async def _dispatch(
+        self, body: Any, binary: bool, in_batch: bool = False
+    ) -> dict[str, Any] | None:
+        """
+        Run one call via `_recorded`, or replay the stored response of an
+        earlier call with the same idempotency key.
+        """
+        from woodglue.idempotency import (
+            IDEMPOTENCY_KEY_FIELD,
+            IDEMPOTENCY_KEY_HEADER,
+            REPLAYED_HEADER,
+            IdempotencyConflict,
+            IdempotencyStore,
+            token_scope,
+            valid_key,
+        )
 
+        store: IdempotencyStore | None = self.application.settings.get("idempotency")
+        if store is None or not isinstance(body, dict) or not isinstance(body.get("method"), str):
+            return await self._recorded(body, binary, in_batch)
+        key = body.get(IDEMPOTENCY_KEY_FIELD)
+        if key is None and not in_batch:
+            key = self.request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            return await self._recorded(body, binary, in_batch)
         request_id = body.get("id")
+        if not valid_key(key):
+            return _error_response(INVALID_REQUEST, "Invalid idempotency key", request_id)
+        # Bound the wait for an in-flight duplicate by this call's own deadline
+        from woodglue.deadline import current_deadline
 
-        # Validate required fields
-        if not isinstance(body, dict) or body.get("jsonrpc") != "2.0" or "method" not in body:
-            self.write(
-                _error_response(
-                    INVALID_REQUEST,
-                    "Invalid Request: missing 'jsonrpc' or 'method'",
-                    request_id,
+        prefix, _, method_name = body["method"].partition(".")
+        node = self.application.settings["method_index"].get(prefix, {}).get(method_name)
+        try:
+            budget = self._budget(prefix, method_name, node.tags if node is not None else ())
+        except ValueError:
+            budget = None  # reported by `_run_call`
+        deadline_token = current_deadline.set(
+            time.monotonic() + budget if budget is not None else None
+        )
+        try:
+            response, replayed = await store.run(
+                token_scope(self._extract_bearer_token()),
+                body["method"],
+                key,
+                body.get("params"),
+                self._response_type,
+                lambda: self._recorded(body, binary, in_batch),
+            )
+        except IdempotencyConflict as exc:
+            return _error_response(INVALID_REQUEST, str(exc), request_id)
+        except TimeoutError:
+            return _error_response(
+                DEADLINE_EXCEEDED,
+                f"Deadline exceeded after {budget}s waiting for a duplicate call",
+                request_id,
+            )
+        finally:
+            current_deadline.reset(deadline_token)
+        if not replayed or response is None:
+            return response
+        self._methods.append(body["method"])
+        if not in_batch:
+            self.set_header(REPLAYED_HEADER, "true")
+        return {**response, "id": request_id}
+
+    async def _recorded(
+        self, body: Any, binary: bool, in_batch: bool = False
+    ) -> dict[str, Any] | None:
+        """
+        Run one call via `_run_call`. If traffic capture samples it, the
+        call is recorded in `on_finish`, once the size of the response
+        body is known.
+        """
+        from woodglue.capture import TrafficCapture
+
+        capture: TrafficCapture | None = self.application.settings.get("capture")
+        if capture is None or not capture.sampled():
+            return await self._run_call(body, binary, in_batch)
+        started_at = time.time()
+        started = time.monotonic()
+        response = await self._run_call(body, binary, in_batch)
+        if response is not None and isinstance(body, dict) and isinstance(body.get("method"), str):
+            error = response.get("error")
+            self._captured.append(
+                (
+                    body["method"],
+                    self._named_params(body["method"], body.get("params")),
+                    started_at,
+                    time.monotonic() - started,
+                    in_batch,
+                    error.get("code") if isinstance(error, dict) else None,
                 )
             )
+        return response
+
+    def _record_captured(self) -> None:
+        """Hand sampled calls to traffic capture with the response size as sent."""
+        from woodglue.capture import TrafficCapture
+
+        capture: TrafficCapture | None = self.application.settings.get("capture")
+        if capture is None:
             return
+        # Set by finish(), after output transforms such as compression
+        length = self._headers.get("Content-Length")
+        size = int(length) if length is not None else None
+        for method, params, started_at, duration, in_batch, error in self._captured:
+            # A batch's calls share one body, so none of them gets its size
+            capture.record(method, params, started_at, duration, None if in_batch else size, error)
+
+    def _budget(self, prefix: str, method_name: str, tags: Iterable[str]) -> float | None:
+        """
+        Time budget of a call: the tightest of its configured timeouts and
+        the client's header. Raises `ValueError` for a malformed header.
+        """
+        from woodglue.config import NamespaceEntry
+        from woodglue.deadline import (
+            DEADLINE_HEADER,
+            effective_budget,
+            method_timeout,
+            parse_timeout_header,
+        )
+
+        client_budget = parse_timeout_header(self.request.headers.get(DEADLINE_HEADER))
+        entries: dict[str, NamespaceEntry] = self.application.settings.get("entries", {})
+        return effective_budget(
+            method_timeout(entries.get(prefix), method_name, tags), client_budget
+        )
+
+    def _named_params(self, method: str, params: Any) -> Any:
+        """Positional params keyed by argument name, when the method is known."""
+        if not isinstance(params, list):
+            return params
+        prefix, _, name = method.partition(".")
+        node = self.application.settings["method_index"].get(prefix, {}).get(name)
+        if node is None:
+            return params
+        return {arg.name: value for arg, value in zip(node.method.args, params, strict=False)}
+
+    async def _run_call(
+        self, body: Any, binary: bool, in_batch: bool = False
+    ) -> dict[str, Any] | None:
+        """
+        Run one JSON-RPC call and return its response envelope, or `None`
+        if the client disconnected while it ran. Outside a batch, results of
+        cached methods carry a `Cache-Control` hint.
+        """
+        request_id: Any = body.get("id") if isinstance(body, dict) else None
+
+        # Validate required fields
+        if not isinstance(body, dict) or body.get("jsonrpc") != "2.0" or "method" not in body:
+            return _error_response(
+                INVALID_REQUEST,
+                "Invalid Request: missing 'jsonrpc' or 'method'",
+                request_id,
+            )
 
         method: str = body["method"]
         params: Any = body.get("params")
+        self._methods.append(str(method))
 
         # Resolve namespace and method via dot prefix
         method_index: dict[str, dict[str, Any]] = self.application.settings["method_index"]
 
         dot_pos = method.find(".")
         if dot_pos < 0:
-            self.write(_error_response(METHOD_NOT_FOUND, f"Method not found: {method}", request_id))
-            return
+            return _error_response(METHOD_NOT_FOUND, f"Method not found: {method}", request_id)
 
         prefix = method[:dot_pos]
         method_name = method[dot_pos + 1 :]
 
         methods = method_index.get(prefix)
         if methods is None:
-            self.write(_error_response(METHOD_NOT_FOUND, f"Method not found: {method}", request_id))
-            return
+            return _error_response(METHOD_NOT_FOUND, f"Method not found: {method}", request_id)
 
         node = methods.get(method_name)
         if node is None:
-            self.write(_error_response(METHOD_NOT_FOUND, f"Method not found: {method}", request_id))
-            return
+            return _error_response(METHOD_NOT_FOUND, f"Method not found: {method}", request_id)
+
+        if AUTH_REQUIRED_TAG in node.tags and not self._authenticated:
+            return _error_response(
+                UNAUTHORIZED, f"{method} requires an authenticated request", request_id
+            )
+
+        # Shed low-priority calls while the event loop is lagging
+        from woodglue.loop_monitor import LoopMonitor
+
+        loop_monitor: LoopMonitor | None = self.application.settings.get("loop_monitor")
+        if loop_monitor is not None and loop_monitor.should_shed(node.tags):
+            retry_after = max(1, round(loop_monitor.current_lag()))
+            self.set_header("Retry-After", str(retry_after))
+            return _error_response(
+                OVERLOADED,
+                "Server overloaded, retry later",
+                request_id,
+                {"retryable": True, "retry_after": retry_after},
+            )
 
         # Build kwargs from params
+        validate_started = time.perf_counter()
         kwargs: dict[str, Any] = {}
         method_args = node.method.args
 
@@ -149,26 +521,30 @@ class JsonRpcHandler(tornado.web.RequestHandler):
             elif isinstance(params, dict):
                 kwargs = dict(params)
             else:
-                self.write(
-                    _error_response(
-                        INVALID_PARAMS,
-                        "params must be an array or object",
-                        request_id,
-                    )
+                return _error_response(
+                    INVALID_PARAMS,
+                    "params must be an array or object",
+                    request_id,
                 )
-                return
+
+        # Paginated methods: resolve `limit` / `cursor` before validation
+        from woodglue.pagination import PAGINATED_TAG, page_params
+
+        pager = None
+        if PAGINATED_TAG in node.tags:
+            try:
+                pager = page_params(node, kwargs, self.application.settings["config"].pagination)
+            except ValueError as exc:
+                return _error_response(INVALID_PARAMS, str(exc), request_id)
 
         # Validate required params
         for arg_info in method_args:
             if not arg_info.is_optional and arg_info.name not in kwargs:
-                self.write(
-                    _error_response(
-                        INVALID_PARAMS,
-                        f"Missing required parameter: {arg_info.name}",
-                        request_id,
-                    )
+                return _error_response(
+                    INVALID_PARAMS,
+                    f"Missing required parameter: {arg_info.name}",
+                    request_id,
                 )
-                return
 
         # Deserialize BaseModel params
         try:
@@ -182,40 +558,226 @@ class JsonRpcHandler(tornado.web.RequestHandler):
                         kwargs[arg_info.name]
                     )
         except ValidationError as exc:
-            self.write(
-                _error_response(
-                    INVALID_PARAMS,
-                    f"Invalid parameters: {exc}",
-                    request_id,
-                )
+            return _error_response(
+                INVALID_PARAMS,
+                f"Invalid parameters: {exc}",
+                request_id,
             )
-            return
+        self._timing.add("validate", time.perf_counter() - validate_started)
+
+        # Async job mode: record and schedule the call, reply with the job id
+        if body.get("async_job") is True:
+            from woodglue.idempotency import token_scope
+            from woodglue.jobs import JobManager, JobQueueFull
+
+            jobs: JobManager | None = self.application.settings.get("jobs")
+            if jobs is None:
+                return _error_response(INVALID_REQUEST, "Async jobs are not enabled", request_id)
+            try:
+                info = await jobs.submit(
+                    prefix,
+                    method,
+                    node,
+                    kwargs,
+                    _serialize_result,
+                    token_scope(self._extract_bearer_token()),
+                )
+            except JobQueueFull as exc:
+                return _error_response(SERVER_BUSY, str(exc), request_id)
+            return {"jsonrpc": "2.0", "result": info.model_dump(mode="json"), "id": request_id}
+
+        # Resolve the time budget: tightest of method config and client header
+        from woodglue.deadline import DEADLINE_HEADER, current_deadline
 
-        # Set current_mount context var for this namespace
+        try:
+            budget = self._budget(prefix, method_name, node.tags)
+        except ValueError:
+            return _error_response(INVALID_REQUEST, f"Invalid {DEADLINE_HEADER} header", request_id)
+
+        # Set current_mount, current_deadline and current_scope context vars for this call
+        from woodglue.idempotency import token_scope
+        from woodglue.jobs import current_scope
         from woodglue.mount import MountContext, current_mount
 
         mounts: dict[str, MountContext] = self.application.settings.get("mounts", {})
         mount = mounts.get(prefix)
         token = current_mount.set(mount) if mount else None
-
-        # Call the method
+        deadline_token = current_deadline.set(
+            time.monotonic() + budget if budget is not None else None
+        )
+        scope_token = current_scope.set(token_scope(self._extract_bearer_token()))
+
+        # Admit through concurrency limits, then call the method
+        from woodglue.bulkhead import BulkheadRegistry, BulkheadRejected
+
+        bulkheads: BulkheadRegistry = self.application.settings["bulkheads"]
+
+        # Sampled allocation profiling of the call and its serialization
+        from woodglue.memory_profile import CALL, SERIALIZE, MemoryProfiler
+
+        profiler: MemoryProfiler | None = self.application.settings.get("memory_profiler")
+        profiled = profiler is not None and profiler.sampled()
+
+        tracer: Tracer | None = self.application.settings.get("tracer")
+
+        async def invoke() -> Any:
+            with tracer.span(method, "method") if tracer else nullcontext():
+                async with bulkheads.admit(prefix, method_name, node.tags):
+                    with profiler.measure(method, CALL) if profiler and profiled else nullcontext():
+                        result = node(**kwargs)
+                        if inspect.isawaitable(result):
+                            result = await result
+                        if pager is not None:
+                            result = pager(result)
+                    return result
+
+        # Run as a task (copies the context vars above) so it can be
+        # cancelled on deadline or client disconnect; `attributed` lets the
+        # CPU profiler charge samples to this method
+        from woodglue.cpu_profile import attributed
+
+        call_task = asyncio.ensure_future(attributed(method, invoke()))
+        if self._call_tasks is None:
+            self._call_tasks = set()
+        self._call_tasks.add(call_task)
+        call_started = time.perf_counter()
         try:
-            result = node(**kwargs)
-            if inspect.isawaitable(result):
-                result = await result
+            result = await asyncio.wait_for(call_task, budget)
+        except BulkheadRejected as exc:
+            return _error_response(SERVER_BUSY, str(exc), request_id)
+        except asyncio.CancelledError:
+            if not self._client_gone:
+                raise
+            logger.info("Client disconnected, cancelled %s", method)
+            return None
+        except TimeoutError:
+            if not call_task.cancelled():
+                # raised by the method itself, not by our deadline
+                logger.exception("Internal error calling %s", method)
+                return _error_response(INTERNAL_ERROR, "Internal error", request_id)
+            return _error_response(
+                DEADLINE_EXCEEDED, f"Deadline exceeded after {budget}s", request_id
+            )
         except Exception:
             logger.exception("Internal error calling %s", method)
-            self.write(_error_response(INTERNAL_ERROR, "Internal error", request_id))
-            return
+            return _error_response(INTERNAL_ERROR, "Internal error", request_id)
         finally:
+            self._timing.add("call", time.perf_counter() - call_started)
+            self._call_tasks.discard(call_task)
+            current_deadline.reset(deadline_token)
+            current_scope.reset(scope_token)
             if token is not None:
                 current_mount.reset(token)
 
         # Return result
-        self.write(
-            {
-                "jsonrpc": "2.0",
-                "result": _serialize_result(result),
-                "id": request_id,
-            }
-        )
+        # Advertise server-side cache TTLs so clients can reuse the result
+        from woodglue.response_cache import cache_hint
+
+        hint = cache_hint(node)
+        if hint is not None and not in_batch:
+            self.set_header("Cache-Control", hint.header())
+
+        with (
+            self._timing.measure("serialize"),
+            profiler.measure(method, SERIALIZE) if profiler and profiled else nullcontext(),
+        ):
+            payload = _serialize_result(result, binary)
+        return {
+            "jsonrpc": "2.0",
+            "result": payload,
+            "id": request_id,
+        }
+
+
+class MethodHandler(JsonRpcHandler):
+    """
+    Per-method routes `/rpc/{prefix}.{method}`, the paths of the OpenAPI spec.
+
+    `POST` takes the params (an object or array) as the body. Methods
+    tagged `read_only` or `pure` also answer `GET`, with params in the
+    query string (see `woodglue.http_cache`). Either way the reply is the
+    bare result, or `{"error": ...}` with the HTTP status from
+    `HTTP_STATUS`. Results carry a content-hash `ETag`; `GET` responses
+    also carry `Cache-Control` and answer a matching `If-None-Match`
+    with 304.
+    """
+
+    def _qualified(self) -> str:
+        return tornado.escape.url_unescape(self.request.path.rsplit("/", 1)[-1])
+
+    @override
+    def _write_unauthorized(self) -> None:
+        self.set_status(401)
+        self.set_header("Cache-Control", "no-store")
+        self._reply({"error": {"code": UNAUTHORIZED, "message": "Unauthorized"}})
+        self.finish()
+
+    @override
+    async def get(self) -> None:
+        from woodglue.http_cache import allows_get, query_params
+
+        qualified = self._qualified()
+        prefix, _, name = qualified.partition(".")
+        node = self.application.settings["method_index"].get(prefix, {}).get(name)
+        if node is None:
+            await self._route(None)
+            return
+        if not allows_get(node):
+            self.set_header("Allow", "POST")
+            self._route_error(405, INVALID_REQUEST, f"{qualified} is not read-only, use POST")
+            return
+        await self._route(query_params(node, self.request.query_arguments), node)
+
+    @override
+    async def post(self) -> None:
+        request_type = self._request_type if self._request_type in BINARY_TYPES else JSON
+        if not is_available(request_type):
+            self._route_error(415, PARSE_ERROR, f"Unsupported content type: {request_type}")
+            return
+        try:
+            with self._timing.measure("parse"):
+                params = decode(self.request.body, request_type) if self.request.body else None
+        except (ValueError, TypeError):
+            self._route_error(400, PARSE_ERROR, "Parse error")
+            return
+        await self._route(params)
+
+    def _route_error(self, status: int, code: int, message: str, data: Any = None) -> None:
+        self.set_status(status)
+        self.set_header("Cache-Control", "no-store")
+        error: dict[str, Any] = {"code": code, "message": message}
+        if data is not None:
+            error["data"] = data
+        self._reply({"error": error})
+
+    async def _route(self, params: Any, node: NamespaceNode | None = None) -> None:
+        """
+        Run the route's method through `_dispatch` and write the bare
+        result. `node` is given for `GET`, whose responses are cacheable.
+        """
+        body = {"jsonrpc": "2.0", "method": self._qualified(), "params": params, "id": None}
+        binary = self._response_type in BINARY_TYPES
+        response = await self._dispatch(body, binary)
+        if response is None:
+            return
+        error = response.get("error")
+        if error is not None:
+            code = error["code"]
+            self._route_error(HTTP_STATUS.get(code, 500), code, error["message"], error.get("data"))
+            return
+
+        from woodglue.http_cache import cache_control, content_etag
+
+        with self._timing.measure("serialize"):
+            data = encode(response["result"], self._response_type)
+        self.set_header("Etag", content_etag(data))
+        if node is not None:
+            # Only responses that needed no token may be shared between clients
+            self.set_header("Cache-Control", cache_control(node, not self._authenticated))
+            # The body also depends on the negotiated wire encoding
+            self.set_header("Vary", "Accept")
+            # Tornado only checks If-None-Match itself when it computes the ETag
+            if self.check_etag_header():
+                self.set_status(304)
+                return
+        self.write(data)
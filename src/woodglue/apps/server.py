@@ -8,11 +8,20 @@ from typing import Any
 import tornado.web
 from lythonic.compose.namespace import Namespace
 
+from woodglue.apps.compression import DocsCache, compression_transform
+from woodglue.apps.health import HealthHandler
 from woodglue.apps.llm_docs import build_method_index
-from woodglue.apps.rpc import JsonRpcHandler
+from woodglue.apps.rpc import JsonRpcHandler, MethodHandler
+from woodglue.bulkhead import BulkheadRegistry
+from woodglue.capture import TrafficCapture
 from woodglue.config import NamespaceEntry, WoodglueConfig
 from woodglue.engine import EngineRegistry
+from woodglue.idempotency import IdempotencyStore
+from woodglue.jobs import JobManager
+from woodglue.loop_monitor import LoopMonitor
+from woodglue.memory_profile import MemoryProfiler
 from woodglue.mount import MountContext
+from woodglue.tracing import Tracer
 
 
 def create_app(
@@ -20,6 +29,13 @@ def create_app(
     config: WoodglueConfig | None = None,
     engine_registry: EngineRegistry | None = None,
     mounts: dict[str, MountContext] | None = None,
+    bulkheads: BulkheadRegistry | None = None,
+    loop_monitor: LoopMonitor | None = None,
+    jobs: JobManager | None = None,
+    capture: TrafficCapture | None = None,
+    memory_profiler: MemoryProfiler | None = None,
+    tracer: Tracer | None = None,
+    idempotency: IdempotencyStore | None = None,
 ) -> tornado.web.Application:
     """
     Build a Tornado Application with JSON-RPC and optional docs/UI routes.
@@ -27,10 +43,33 @@ def create_app(
     `namespaces` maps prefix strings to `(Namespace, NamespaceEntry)` tuples.
     The plain `Namespace` dict (all namespaces) is stored in app settings for
     internal use. The `method_index` is filtered by `expose_api`.
+
+    Concurrency limits declared on each `NamespaceEntry` are configured
+    into `bulkheads` (a fresh `BulkheadRegistry` if not given).
+
+    `loop_monitor` (if given) drives load shedding and `/healthz`; the
+    caller is responsible for starting it once the IOLoop runs. Without
+    `jobs`, `"async_job"` requests are rejected. With `capture`, sampled
+    RPC calls are recorded for `wgl replay`. With `memory_profiler`, sampled
+    calls are charged their allocations while it is enabled. With `tracer`,
+    requests and method calls are recorded as spans. With `idempotency`,
+    calls carrying an idempotency key run once and retries get the stored
+    response.
+
+    Each method is also routed at `/rpc/{prefix}.{method}`, the path the
+    OpenAPI spec lists for it; read-only methods answer `GET` there.
+
+    With `config.compression.enabled`, responses are compressed according
+    to the client's `Accept-Encoding`.
     """
     if config is None:
         config = WoodglueConfig(namespaces={})
 
+    if bulkheads is None:
+        bulkheads = BulkheadRegistry()
+    for prefix, (_, entry) in namespaces.items():
+        bulkheads.configure(prefix, entry)
+
     # Plain namespace dict for internal use (e.g. `wgl run`)
     plain_namespaces = {prefix: ns for prefix, (ns, _) in namespaces.items()}
 
@@ -38,6 +77,8 @@ def create_app(
 
     handlers: list[Any] = [
         (r"/rpc", JsonRpcHandler),
+        (r"/rpc/[^/]+", MethodHandler),
+        (r"/healthz", HealthHandler),
     ]
 
     if config.docs.enabled:
@@ -59,8 +100,13 @@ def create_app(
                 )
             )
 
+    transforms: list[type[tornado.web.OutputTransform]] = []
+    if config.compression.enabled:
+        transforms.append(compression_transform(config.compression))
+
     return tornado.web.Application(
         handlers,
+        transforms=transforms,
         namespaces=plain_namespaces,
         method_index=method_index,
         config=config,
@@ -68,4 +114,13 @@ def create_app(
         auth_db=config.storage.auth_db,
         engine_registry=engine_registry,
         mounts=mounts or {},
+        entries={prefix: entry for prefix, (_, entry) in namespaces.items()},
+        bulkheads=bulkheads,
+        loop_monitor=loop_monitor,
+        jobs=jobs,
+        capture=capture,
+        memory_profiler=memory_profiler,
+        tracer=tracer,
+        idempotency=idempotency,
+        docs_cache=DocsCache(config.compression),
     )
@@ -2,12 +2,16 @@
 System namespace: server introspection and engine management.
 
 Builds a Namespace with introspection methods (list_namespaces, list_methods,
-describe_method) plus engine/trigger facade methods, all tagged `["api"]`.
+describe_method, concurrency_stats, loop_stats, log_stats), memory and CPU
+profiling, recorded traces and async job status and cancellation, plus
+engine/trigger facade methods, all tagged `["api"]`.
 Always mounted as the `system` prefix with `expose_api=True`.
 """
 
 from __future__ import annotations
 
+import asyncio
+import time
 from collections.abc import Sequence
 from typing import Any
 
@@ -17,8 +21,17 @@ from lythonic.compose.namespace import Namespace, NamespaceNode
 from pydantic import BaseModel
 
 from woodglue.apps.llm_docs import API_TAG, walk_namespace
+from woodglue.apps.rpc import AUTH_REQUIRED_TAG
+from woodglue.bulkhead import BulkheadRegistry, BulkheadStats
 from woodglue.config import NamespaceEntry
+from woodglue.cpu_profile import CpuProfile, CpuProfiler
 from woodglue.engine import EngineRegistry, NamespaceEngine
+from woodglue.jobs import JobInfo, JobManager, JobResult, current_scope
+from woodglue.log_queue import LogQueue, LogQueueStats
+from woodglue.loop_monitor import LoopMonitor, LoopStats
+from woodglue.memory_profile import MemoryProfiler, MemoryProfileStats
+from woodglue.mount import current_mount
+from woodglue.tracing import SpanRecord, Tracer, TraceSummary
 
 
 class ArgInfo(BaseModel):
@@ -89,6 +102,13 @@ def _get_engine(registry: EngineRegistry | None, namespace: str) -> NamespaceEng
 def build_system_namespace(
     namespaces: dict[str, tuple[Namespace, NamespaceEntry]],
     registry: EngineRegistry | None,
+    bulkheads: BulkheadRegistry | None = None,
+    loop_monitor: LoopMonitor | None = None,
+    jobs: JobManager | None = None,
+    memory_profiler: MemoryProfiler | None = None,
+    cpu_profiler: CpuProfiler | None = None,
+    tracer: Tracer | None = None,
+    log_queue: LogQueue | None = None,
 ) -> Namespace:
     """Build a Namespace with introspection and engine facade functions."""
     ns = Namespace()
@@ -188,6 +208,120 @@ def build_system_namespace(
             trigger_configs=trigger_configs,
         )
 
+    def concurrency_stats() -> list[BulkheadStats]:
+        """Active calls and queue depth for every configured concurrency limit."""
+        if bulkheads is None:
+            return []
+        return bulkheads.stats()
+
+    def loop_stats() -> LoopStats | None:
+        """Event-loop lag measurements, or null if the monitor is disabled."""
+        if loop_monitor is None:
+            return None
+        return loop_monitor.stats()
+
+    def log_stats() -> LogQueueStats | None:
+        """Log writer queue depth and dropped records, or null if logging is not queued."""
+        if log_queue is None:
+            return None
+        return log_queue.stats()
+
+    # -- Memory profiling --
+
+    def _get_profiler() -> MemoryProfiler:
+        if memory_profiler is None:
+            raise ValueError("Memory profiling is not available")
+        return memory_profiler
+
+    def memory_profile(top: int = 0) -> MemoryProfileStats:
+        """Peak and retained allocations per method; `top` adds the largest allocation sites."""
+        return _get_profiler().stats(top)
+
+    def set_memory_profile(
+        enabled: bool, sample_rate: float | None = None, reset: bool = False
+    ) -> MemoryProfileStats:
+        """Switch memory profiling on or off; `reset` drops the aggregates so far."""
+        profiler = _get_profiler()
+        if sample_rate is not None and not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        if enabled:
+            profiler.enable(sample_rate)
+        else:
+            profiler.disable()
+        if reset:
+            profiler.reset()
+        return profiler.stats()
+
+    async def start_profile(
+        duration: float, namespace: str | None = None, save: bool = False
+    ) -> CpuProfile:
+        """Sample CPU stacks for `duration` seconds as collapsed stacks for flame graphs."""
+        if cpu_profiler is None:
+            raise ValueError("CPU profiling is not enabled")
+        if namespace is not None and namespace not in namespaces:
+            raise ValueError(f"Namespace '{namespace}' not found")
+        profile = await cpu_profiler.run(duration, namespace)
+        if save:
+            mount = current_mount.get(None)
+            if mount is None:
+                raise ValueError("No state directory to save the profile in")
+            path = mount.state_path(f"cpu-profile-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+            await asyncio.get_running_loop().run_in_executor(
+                None, path.write_text, (profile.collapsed or "") + "\n"
+            )
+            profile.collapsed = None
+            profile.path = str(path)
+        return profile
+
+    # -- Tracing --
+
+    def _get_tracer() -> Tracer:
+        if tracer is None:
+            raise ValueError("Tracing is not enabled")
+        return tracer
+
+    # The exporter waits for its writer and queries SQLite, so both run off the IOLoop
+    async def traces(
+        limit: int = 20, name: str | None = None, min_duration: float | None = None
+    ) -> list[TraceSummary]:
+        """Recent traces, newest first; filter by root span `name` or `min_duration` seconds."""
+        exporter = _get_tracer().exporter
+        return await asyncio.get_running_loop().run_in_executor(
+            None, exporter.traces, limit, name, min_duration
+        )
+
+    async def trace_spans(trace_id: str) -> list[SpanRecord]:
+        """All recorded spans of one trace, in start order."""
+        exporter = _get_tracer().exporter
+        return await asyncio.get_running_loop().run_in_executor(None, exporter.spans, trace_id)
+
+    # -- Async job methods --
+
+    def _get_jobs() -> JobManager:
+        if jobs is None:
+            raise ValueError("Async jobs are not enabled")
+        return jobs
+
+    async def job_status(job_id: str) -> JobInfo:
+        """Status of an async job (without its result)."""
+        info = await _get_jobs().status(job_id, current_scope.get())
+        if info is None:
+            raise ValueError(f"Job '{job_id}' not found")
+        return info
+
+    async def job_result(job_id: str) -> JobResult:
+        """Status and result of an async job; `result` is null until it succeeds."""
+        found = await _get_jobs().result(job_id, current_scope.get())
+        if found is None:
+            raise ValueError(f"Job '{job_id}' not found")
+        return found
+
+    async def cancel_job(job_id: str) -> JobInfo:
+        """Cancel a pending or running async job."""
+        manager = _get_jobs()
+        await manager.cancel(job_id, current_scope.get())
+        return await job_status(job_id)
+
     # -- Engine methods --
 
     def recent_runs(namespace: str, limit: int = 20, status: str | None = None) -> list[DagRun]:
@@ -250,6 +384,15 @@ def build_system_namespace(
         (list_namespaces, "list_namespaces"),
         (list_methods, "list_methods"),
         (describe_method, "describe_method"),
+        (concurrency_stats, "concurrency_stats"),
+        (loop_stats, "loop_stats"),
+        (log_stats, "log_stats"),
+        (memory_profile, "memory_profile"),
+        (traces, "traces"),
+        (trace_spans, "trace_spans"),
+        (job_status, "job_status"),
+        (job_result, "job_result"),
+        (cancel_job, "cancel_job"),
         (recent_runs, "recent_runs"),
         (active_runs, "active_runs"),
         (inspect_run, "inspect_run"),
@@ -261,5 +404,12 @@ def build_system_namespace(
         (deactivate_trigger, "deactivate_trigger"),
     ]:
         ns.register(fn, nsref=fn_nsref, tags=tags)
+    # Profilers slow every call and stacks expose code paths and local state,
+    # so never let anonymous callers drive them
+    for fn, fn_nsref in [
+        (set_memory_profile, "set_memory_profile"),
+        (start_profile, "start_profile"),
+    ]:
+        ns.register(fn, nsref=fn_nsref, tags=[*tags, AUTH_REQUIRED_TAG])
 
     return ns
@@ -0,0 +1,255 @@
+"""
+Client-side load balancing across several woodglue servers.
+
+`BalancedClient` keeps one `WoodglueClient` per endpoint and picks one for
+each call: `p2c` (power of two choices) samples two endpoints and takes
+the one with fewer outstanding requests, `least_outstanding` scans them
+all. Endpoints are ejected passively after `max_failures` consecutive
+transport failures and put back by an active `/healthz` probe, which also
+ejects endpoints that report themselves overloaded. Calls are routed by
+namespace prefix (the part of the method name before the first dot), from
+explicit `routes` or from the methods each endpoint lists in its spec.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import Sequence
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+from woodglue.client import WoodglueClient, transport_failure
+
+logger = logging.getLogger(__name__)
+
+
+class BalancerConfig(BaseModel):
+    """Endpoint selection and health settings; times in seconds."""
+
+    strategy: Literal["p2c", "least_outstanding"] = "p2c"
+
+    max_failures: int = Field(default=3, ge=1)
+    """Consecutive transport failures before an endpoint is ejected."""
+
+    health_interval: float | None = Field(default=5.0, gt=0)
+    """Period of the active `/healthz` probe; `None` disables it."""
+
+    health_timeout: float = Field(default=2.0, gt=0)
+
+
+class EndpointStats(BaseModel):
+    url: str
+    healthy: bool
+    outstanding: int
+    requests: int
+    failures: int
+    ejections: int
+    prefixes: list[str] | None
+    """Prefixes listed in the endpoint's spec; `None` before `load_spec()`."""
+
+
+class _Endpoint:
+    def __init__(self, client: WoodglueClient) -> None:
+        self.client: WoodglueClient = client
+        self.prefixes: set[str] | None = None
+        self.healthy: bool = True
+        self.outstanding: int = 0
+        self.consecutive_failures: int = 0
+        self.requests: int = 0
+        self.failures: int = 0
+        self.ejections: int = 0
+
+    def serves(self, prefix: str) -> bool:
+        return self.prefixes is None or prefix in self.prefixes
+
+    def stats(self) -> EndpointStats:
+        return EndpointStats(
+            url=self.client.base_url,
+            healthy=self.healthy,
+            outstanding=self.outstanding,
+            requests=self.requests,
+            failures=self.failures,
+            ejections=self.ejections,
+            prefixes=sorted(self.prefixes) if self.prefixes is not None else None,
+        )
+
+
+def method_prefix(method: str) -> str:
+    """
+    Namespace prefix of a qualified method name.
+
+    >>> method_prefix("reports.daily.summary")
+    'reports'
+    """
+    return method.partition(".")[0]
+
+
+class BalancedClient:
+    """
+    `WoodglueClient` over several endpoints.
+
+    `client_kwargs` (token, encoding, pool, policy, ...) are passed to
+    every per-endpoint client. `routes` maps a namespace prefix to the
+    endpoint URLs that serve it; other prefixes go to any endpoint, or,
+    after `load_spec()`, to the endpoints whose spec lists the method's
+    prefix. When every candidate is ejected, calls are spread over all of
+    them rather than failing outright.
+
+    Transport failures (connection errors, 502/503/504) count against the
+    endpoint. Idempotent methods then fail over to another candidate;
+    other methods raise, since the server may have run the call.
+    """
+
+    config: BalancerConfig
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        *,
+        config: BalancerConfig | None = None,
+        routes: dict[str, Sequence[str]] | None = None,
+        rng: random.Random | None = None,
+        **client_kwargs: Any,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.config = config or BalancerConfig()
+        self._rng: random.Random = rng or random.Random()
+        self._endpoints: list[_Endpoint] = [
+            _Endpoint(WoodglueClient(url, **client_kwargs)) for url in endpoints
+        ]
+        by_url = {e.client.base_url: e for e in self._endpoints}
+        self._routes: dict[str, list[_Endpoint]] = {}
+        for prefix, urls in (routes or {}).items():
+            unknown = [url for url in urls if url.rstrip("/") not in by_url]
+            if unknown or not urls:
+                raise ValueError(f"Route '{prefix}' names unknown endpoints: {unknown}")
+            self._routes[prefix] = [by_url[url.rstrip("/")] for url in urls]
+        self._health_task: asyncio.Task[None] | None = None
+
+    async def load_spec(self, strict: bool = False) -> None:
+        """
+        Load the spec from every reachable endpoint and learn which
+        prefixes each one serves; explicit `routes` still take precedence.
+        Unreachable endpoints are marked failed and skipped.
+        """
+        results = await asyncio.gather(
+            *(e.client.load_spec(strict) for e in self._endpoints), return_exceptions=True
+        )
+        loaded = 0
+        for endpoint, result in zip(self._endpoints, results, strict=True):
+            if isinstance(result, BaseException):
+                if not transport_failure(result):
+                    raise result
+                logger.warning("Cannot load spec from %s: %s", endpoint.client.base_url, result)
+                self._failed(endpoint)
+                continue
+            loaded += 1
+            endpoint.prefixes = {method_prefix(m) for m in endpoint.client.methods}
+        if not loaded:
+            first = results[0]
+            assert isinstance(first, BaseException)
+            raise first
+
+    async def call(self, method: str, **kwargs: Any) -> Any:
+        """Call `method` on a chosen endpoint; same arguments as `WoodglueClient.call()`."""
+        self._start_health_checks()
+        candidates = self._candidates(method_prefix(method))
+        tried: list[_Endpoint] = []
+        while True:
+            endpoint = self._pick([e for e in candidates if e not in tried] or candidates)
+            tried.append(endpoint)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            try:
+                result = await endpoint.client.call(method, **kwargs)
+            except Exception as exc:
+                if not transport_failure(exc):
+                    raise
+                self._failed(endpoint)
+                if (
+                    isinstance(exc, TimeoutError)
+                    or len(tried) >= len(candidates)
+                    or not endpoint.client.is_idempotent(method)
+                ):
+                    raise
+                logger.debug("Failing over %s from %s", method, endpoint.client.base_url)
+                continue
+            finally:
+                endpoint.outstanding -= 1
+            endpoint.consecutive_failures = 0
+            return result
+
+    def _candidates(self, prefix: str) -> list[_Endpoint]:
+        serving = (
+            self._routes.get(prefix)
+            or [e for e in self._endpoints if e.serves(prefix)]
+            or self._endpoints
+        )
+        return [e for e in serving if e.healthy] or serving
+
+    def _pick(self, candidates: list[_Endpoint]) -> _Endpoint:
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.config.strategy == "p2c":
+            first, second = self._rng.sample(candidates, 2)
+            return first if first.outstanding <= second.outstanding else second
+        # Shuffle first so ties do not always land on the same endpoint
+        shuffled = self._rng.sample(candidates, len(candidates))
+        return min(shuffled, key=lambda e: e.outstanding)
+
+    def _failed(self, endpoint: _Endpoint) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.healthy and endpoint.consecutive_failures >= self.config.max_failures:
+            logger.warning("Ejecting endpoint %s", endpoint.client.base_url)
+            endpoint.healthy = False
+            endpoint.ejections += 1
+
+    async def check_health(self) -> None:
+        """Probe every endpoint's `/healthz` once and update its state."""
+        results = await asyncio.gather(
+            *(e.client.check_health(self.config.health_timeout) for e in self._endpoints)
+        )
+        for endpoint, ok in zip(self._endpoints, results, strict=True):
+            if ok:
+                if not endpoint.healthy:
+                    logger.info("Endpoint %s is back", endpoint.client.base_url)
+                endpoint.healthy = True
+                endpoint.consecutive_failures = 0
+            elif endpoint.healthy:
+                logger.warning("Endpoint %s failed its health check", endpoint.client.base_url)
+                endpoint.healthy = False
+                endpoint.ejections += 1
+
+    def _start_health_checks(self) -> None:
+        if self._health_task is not None or self.config.health_interval is None:
+            return
+        self._health_task = asyncio.ensure_future(self._health_loop(self.config.health_interval))
+
+    async def _health_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_health()
+            except Exception:
+                logger.exception("Health check failed")
+
+    def stats(self) -> list[EndpointStats]:
+        """Per-endpoint health, load and failure counts."""
+        return [e.stats() for e in self._endpoints]
+
+    def clients(self) -> list[WoodglueClient]:
+        """The per-endpoint clients, e.g. for their `stats()`."""
+        return [e.client for e in self._endpoints]
+
+    def close(self) -> None:
+        """Stop health checks and close each endpoint's client."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for endpoint in self._endpoints:
+            endpoint.client.close()
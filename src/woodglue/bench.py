@@ -0,0 +1,346 @@
+"""
+Load generation and latency measurement for `wgl bench`.
+
+`run_bench()` drives one method or a weighted mix through a
+`WoodglueClient` for a fixed duration, either closed-loop (`concurrency`
+workers calling back to back) or open-loop at a fixed `rate`. In
+open-loop mode latency is measured from each call's scheduled start, so
+time spent queued behind slow calls is not hidden (coordinated omission).
+Latencies go into a `LatencyHistogram`, a log-linear histogram in the
+style of HdrHistogram with bounded relative error. Results are a
+`BenchResult` that serializes to JSON for comparison across releases.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.metadata
+import json
+import math
+import random
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field
+from tornado.httpclient import HTTPClientError
+
+from woodglue.client import WoodglueClient, WoodglueRpcError
+
+# 2**(SUB_BITS - 1) values per power of two: under 0.8% relative error
+_SUB_BITS = 8
+
+
+class LatencyHistogram:
+    """
+    Latencies in microseconds, bucketed log-linearly: exact below 256us,
+    then 128 buckets per power of two. Percentiles report the highest
+    value of their bucket, as HdrHistogram does.
+
+    >>> h = LatencyHistogram()
+    >>> for us in range(1, 1001):
+    ...     h.record(us / 1e6)
+    >>> h.count, h.min, h.max
+    (1000, 1, 1000)
+    >>> h.percentile(50), h.percentile(99)
+    (501, 991)
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[int, int] = {}
+        self.count: int = 0
+        self.total: int = 0
+        self.min: int = 0
+        self.max: int = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        shift = max(0, value.bit_length() - _SUB_BITS)
+        return (shift << _SUB_BITS) + (value >> shift)
+
+    @staticmethod
+    def _highest(index: int) -> int:
+        shift, sub = index >> _SUB_BITS, index & ((1 << _SUB_BITS) - 1)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value = max(0, round(seconds * 1e6))
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.min = value if self.count == 0 else min(self.min, value)
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: LatencyHistogram) -> None:
+        for index, n in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + n
+        if other.count:
+            self.min = other.min if self.count == 0 else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, p: float) -> int:
+        """Value at percentile `p` (0-100) in microseconds; 0 when empty."""
+        if self.count == 0:
+            return 0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._highest(index), self.max)
+        return self.max
+
+    def summary(self) -> LatencySummary:
+        ms = 1e-3
+        return LatencySummary(
+            count=self.count,
+            min=self.min * ms,
+            mean=self.total / self.count * ms if self.count else 0.0,
+            p50=self.percentile(50) * ms,
+            p90=self.percentile(90) * ms,
+            p99=self.percentile(99) * ms,
+            p999=self.percentile(99.9) * ms,
+            max=self.max * ms,
+        )
+
+
+class LatencySummary(BaseModel):
+    """Latency distribution in milliseconds."""
+
+    count: int
+    min: float
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    p999: float
+    max: float
+
+
+class BenchTarget(BaseModel):
+    """One method in the load mix, picked in proportion to `weight`."""
+
+    method: str
+    params: dict[str, Any] = Field(default_factory=dict)
+    weight: float = Field(default=1.0, gt=0)
+
+
+def load_mix(path: Path) -> list[BenchTarget]:
+    """
+    Read a load mix: a JSON list of targets, or one target per line
+    (JSON Lines), each with `method` and optional `params` / `weight`.
+    """
+    text = path.read_text()
+    if text.lstrip().startswith("["):
+        raw: list[Any] = json.loads(text)
+    else:
+        raw = [json.loads(line) for line in text.splitlines() if line.strip()]
+    targets = [BenchTarget.model_validate(item) for item in raw]
+    if not targets:
+        raise ValueError(f"No targets in {path}")
+    return targets
+
+
+class BenchConfig(BaseModel):
+    """How to drive the load; times in seconds."""
+
+    duration: float = Field(default=10.0, gt=0)
+    concurrency: int = Field(default=10, ge=1)
+    """Closed-loop workers, or the in-flight cap at a fixed `rate`."""
+
+    rate: float | None = Field(default=None, gt=0)
+    """Calls per second (open loop); `None` runs closed-loop."""
+
+
+class BenchResult(BaseModel):
+    started_at: datetime
+    woodglue_version: str
+    url: str
+    config: BenchConfig
+    targets: list[BenchTarget]
+    elapsed: float
+    requests: int
+    errors: int
+    throughput: float
+    """Completed calls per second, errors included."""
+    latency: LatencySummary
+    """Successful calls only."""
+    error_kinds: dict[str, int]
+    server: dict[str, float] | None
+    """Deltas of server counters over the run; `None` if not readable."""
+
+
+def error_kind(exc: BaseException) -> str:
+    """
+    Short label used to group errors in the report.
+
+    >>> error_kind(WoodglueRpcError(-32001, "busy"))
+    'rpc -32001'
+    >>> error_kind(TimeoutError())
+    'timeout'
+    """
+    if isinstance(exc, WoodglueRpcError):
+        return f"rpc {exc.code}"
+    if isinstance(exc, HTTPClientError):
+        return f"http {exc.code}"
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    return type(exc).__name__
+
+
+async def server_counters(client: WoodglueClient) -> dict[str, float] | None:
+    """
+    Cumulative server counters from `system.loop_stats` and
+    `system.concurrency_stats`, flattened to `loop.<field>` and
+    `bulkhead.<prefix>.<key>.<field>`. `None` if they cannot be read.
+    """
+    try:
+        loop, bulkheads = await asyncio.gather(
+            client.call("system.loop_stats", return_type=dict[str, Any] | None),
+            client.call("system.concurrency_stats", return_type=list[dict[str, Any]]),
+        )
+    except Exception:
+        return None
+    counters: dict[str, float] = {}
+    if loop is not None:
+        for field in ("samples", "stalls", "shed"):
+            counters[f"loop.{field}"] = float(loop.get(field, 0))
+    for stats in bulkheads:
+        name = f"bulkhead.{stats['prefix']}.{stats['key']}"
+        for field in ("admitted", "rejected", "timed_out"):
+            counters[f"{name}.{field}"] = float(stats.get(field, 0))
+    return counters
+
+
+def _delta(
+    before: dict[str, float] | None, after: dict[str, float] | None
+) -> dict[str, float] | None:
+    if before is None or after is None:
+        return None
+    return {key: value - before.get(key, 0.0) for key, value in after.items()}
+
+
+def _version() -> str:
+    try:
+        return importlib.metadata.version("woodglue")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class _Run:
+    def __init__(self, targets: list[BenchTarget], rng: random.Random) -> None:
+        self.targets: list[BenchTarget] = targets
+        self.weights: list[float] = [t.weight for t in targets]
+        self.rng: random.Random = rng
+        self.histogram: LatencyHistogram = LatencyHistogram()
+        self.requests: int = 0
+        self.errors: dict[str, int] = {}
+
+    async def one(self, client: WoodglueClient, started: float) -> None:
+        target = self.rng.choices(self.targets, self.weights)[0]
+        try:
+            await client.call_params(target.method, target.params)
+        except Exception as exc:
+            kind = error_kind(exc)
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+        else:
+            self.histogram.record(time.monotonic() - started)
+        finally:
+            self.requests += 1
+
+
+async def _closed_loop(client: WoodglueClient, run: _Run, config: BenchConfig) -> None:
+    end = time.monotonic() + config.duration
+
+    async def worker() -> None:
+        while time.monotonic() < end:
+            await run.one(client, time.monotonic())
+
+    await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+
+
+async def _open_loop(client: WoodglueClient, run: _Run, config: BenchConfig, rate: float) -> None:
+    slots = asyncio.Semaphore(config.concurrency)
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def scheduled(at: float) -> None:
+        async with slots:
+            await run.one(client, at)
+
+    start = time.monotonic()
+    for i in range(math.ceil(config.duration * rate)):
+        at = start + i / rate
+        delay = at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(scheduled(at))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def run_bench(
+    client: WoodglueClient,
+    targets: Iterable[BenchTarget],
+    config: BenchConfig,
+    rng: random.Random | None = None,
+) -> BenchResult:
+    """Drive `targets` through `client` as configured and summarize the run."""
+    targets = list(targets)
+    if not targets:
+        raise ValueError("At least one target is required")
+    run = _Run(targets, rng or random.Random())
+    started_at = datetime.now(UTC)
+    before = await server_counters(client)
+    started = time.monotonic()
+    if config.rate is None:
+        await _closed_loop(client, run, config)
+    else:
+        await _open_loop(client, run, config, config.rate)
+    elapsed = time.monotonic() - started
+    after = await server_counters(client)
+    return BenchResult(
+        started_at=started_at,
+        woodglue_version=_version(),
+        url=client.base_url,
+        config=config,
+        targets=targets,
+        elapsed=elapsed,
+        requests=run.requests,
+        errors=sum(run.errors.values()),
+        throughput=run.requests / elapsed if elapsed > 0 else 0.0,
+        latency=run.histogram.summary(),
+        error_kinds=dict(sorted(run.errors.items())),
+        server=_delta(before, after),
+    )
+
+
+def format_report(result: BenchResult) -> str:
+    """Human-readable summary of a run."""
+    lat = result.latency
+    mode = (
+        f"rate {result.config.rate:g}/s, max {result.config.concurrency} in flight"
+        if result.config.rate is not None
+        else f"concurrency {result.config.concurrency}"
+    )
+    lines = [
+        f"{result.url}  {', '.join(t.method for t in result.targets)}",
+        f"  {result.elapsed:.1f}s, {mode}",
+        f"  requests:   {result.requests} ({result.errors} errors)",
+        f"  throughput: {result.throughput:.1f} req/s",
+        f"  latency ms: min {lat.min:.2f}  mean {lat.mean:.2f}  p50 {lat.p50:.2f}  "
+        f"p90 {lat.p90:.2f}  p99 {lat.p99:.2f}  p99.9 {lat.p999:.2f}  max {lat.max:.2f}",
+    ]
+    for kind, count in result.error_kinds.items():
+        lines.append(f"  error {kind}: {count}")
+    if result.server:
+        changed = {k: v for k, v in result.server.items() if v}
+        for key, value in sorted(changed.items()):
+            lines.append(f"  server {key}: {value:+g}")
+    return "\n".join(lines)
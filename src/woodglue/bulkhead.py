@@ -0,0 +1,199 @@
+"""
+Per-namespace and per-method concurrency limits (bulkheads).
+
+Each `Bulkhead` admits up to `max_concurrent` calls and parks up to
+`max_queue` more in a FIFO wait queue. Callers that find the queue full,
+or wait longer than `queue_timeout`, are rejected with `BulkheadRejected`
+so cheap methods stay responsive while expensive ones are saturated.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from pydantic import BaseModel
+
+from woodglue.config import ConcurrencyLimit, NamespaceEntry
+
+NAMESPACE_KEY = "*"
+"""Bulkhead key used for the namespace-wide `NamespaceEntry.concurrency` limit."""
+
+
+class BulkheadRejected(Exception):
+    """Raised when a call cannot be admitted: queue full or queue timeout."""
+
+    def __init__(self, name: str, reason: str):
+        self.name: str = name
+        self.reason: str = reason
+        super().__init__(f"Server busy: {name} {reason}")
+
+
+class BulkheadStats(BaseModel):
+    """Point-in-time counters for one bulkhead."""
+
+    prefix: str
+    key: str
+    max_concurrent: int
+    max_queue: int
+    active: int
+    queued: int
+    admitted: int
+    rejected: int
+    timed_out: int
+
+
+class Bulkhead:
+    """
+    Concurrency limiter with a bounded FIFO wait queue.
+
+    Slots are handed directly to the next waiter on `release()`, so a
+    steady stream of new callers cannot overtake queued ones.
+    """
+
+    prefix: str
+    key: str
+    limit: ConcurrencyLimit
+    active: int
+    admitted: int
+    rejected: int
+    timed_out: int
+
+    def __init__(self, prefix: str, key: str, limit: ConcurrencyLimit) -> None:
+        self.prefix = prefix
+        self.key = key
+        self.limit = limit
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def name(self) -> str:
+        if self.key == NAMESPACE_KEY:
+            return f"'{self.prefix}'"
+        return f"'{self.prefix}:{self.key}'"
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed. Raises `BulkheadRejected`."""
+        if self.active < self.limit.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.limit.max_queue:
+            self.rejected += 1
+            raise BulkheadRejected(self.name, "queue is full")
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, self.limit.queue_timeout)
+        except TimeoutError:
+            self._discard(fut)
+            self.timed_out += 1
+            raise BulkheadRejected(
+                self.name, f"queue timeout after {self.limit.queue_timeout}s"
+            ) from None
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was handed over just before cancellation
+                self.release()
+            else:
+                self._discard(fut)
+            raise
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Return a slot, handing it to the oldest live waiter if any."""
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, fut: asyncio.Future[None]) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def stats(self) -> BulkheadStats:
+        return BulkheadStats(
+            prefix=self.prefix,
+            key=self.key,
+            max_concurrent=self.limit.max_concurrent,
+            max_queue=self.limit.max_queue,
+            active=self.active,
+            queued=self.queued,
+            admitted=self.admitted,
+            rejected=self.rejected,
+            timed_out=self.timed_out,
+        )
+
+
+class BulkheadRegistry:
+    """
+    Bulkheads for all namespaces, built from `NamespaceEntry.concurrency`
+    and `NamespaceEntry.limits`.
+    """
+
+    def __init__(self) -> None:
+        self._bulkheads: dict[tuple[str, str], Bulkhead] = {}
+        self._resolved: dict[tuple[str, str], list[Bulkhead]] = {}
+
+    def configure(self, prefix: str, entry: NamespaceEntry) -> None:
+        """Create the bulkheads declared by a namespace entry."""
+        for key, limit in sorted(entry.limits.items()):
+            self._bulkheads[(prefix, key)] = Bulkhead(prefix, key, limit)
+        if entry.concurrency is not None:
+            self._bulkheads[(prefix, NAMESPACE_KEY)] = Bulkhead(
+                prefix, NAMESPACE_KEY, entry.concurrency
+            )
+        self._resolved = {}
+
+    def resolve(self, prefix: str, nsref: str, tags: Iterable[str]) -> list[Bulkhead]:
+        """
+        Bulkheads a call must pass, in acquisition order: method and tag
+        limits first (sorted by key), namespace-wide limit last. Acquiring
+        the narrow limits first keeps queued expensive calls from holding
+        namespace slots that cheap calls need.
+        """
+        cache_key = (prefix, nsref)
+        found = self._resolved.get(cache_key)
+        if found is None:
+            keys = {nsref, *tags}
+            found = [
+                bh
+                for (bh_prefix, key), bh in sorted(self._bulkheads.items())
+                if bh_prefix == prefix and key in keys
+            ]
+            ns_wide = self._bulkheads.get((prefix, NAMESPACE_KEY))
+            if ns_wide is not None:
+                found.append(ns_wide)
+            self._resolved[cache_key] = found
+        return found
+
+    @asynccontextmanager
+    async def admit(self, prefix: str, nsref: str, tags: Iterable[str]) -> AsyncGenerator[None]:
+        """Hold a slot in every applicable bulkhead for the duration of the block."""
+        bulkheads = self.resolve(prefix, nsref, tags)
+        if not bulkheads:
+            yield
+            return
+        async with AsyncExitStack() as stack:
+            for bh in bulkheads:
+                await bh.acquire()
+                stack.callback(bh.release)
+            yield
+
+    def stats(self) -> list[BulkheadStats]:
+        """Counters for every configured bulkhead, sorted by prefix and key."""
+        return [bh.stats() for _, bh in sorted(self._bulkheads.items())]
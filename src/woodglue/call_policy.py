@@ -0,0 +1,88 @@
+"""
+Client call policies: deadlines, retries and hedged requests.
+
+Methods tagged `idempotent` are marked `x-idempotent` in the OpenAPI spec.
+For those, `WoodglueClient` may retry transport failures and retryable
+JSON-RPC errors with jittered exponential backoff, and may hedge: if the
+first attempt has not answered within the method's recent p95 latency, a
+second identical request is sent and the first answer wins. The deadline
+applies to every method and is forwarded as `X-Woodglue-Timeout`.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import deque
+
+from pydantic import BaseModel, Field
+
+IDEMPOTENT_TAG = "idempotent"
+
+# SERVER_BUSY and OVERLOADED from woodglue.apps.rpc
+DEFAULT_RETRY_CODES: frozenset[int] = frozenset({-32001, -32003})
+
+
+class CallPolicy(BaseModel):
+    """Deadline, retry and hedging settings for a call; times in seconds."""
+
+    timeout: float | None = Field(default=None, gt=0)
+    """Overall deadline across all attempts; applies to any method."""
+
+    retries: int = Field(default=0, ge=0)
+    """Extra attempts after the first (idempotent methods only)."""
+
+    backoff: float = Field(default=0.05, ge=0)
+    max_backoff: float = Field(default=1.0, ge=0)
+    retry_codes: frozenset[int] = DEFAULT_RETRY_CODES
+
+    hedge: bool = False
+    """Send a second request once the first is slower than `hedge_quantile`."""
+
+    hedge_quantile: float = Field(default=0.95, gt=0, lt=1)
+    hedge_delay: float = Field(default=0.1, gt=0)
+    """Hedge delay used until `hedge_min_samples` latencies are recorded."""
+
+    hedge_min_samples: int = Field(default=20, ge=1)
+
+    def backoff_delay(self, retry: int) -> float:
+        """
+        Jittered delay before retry number `retry` (0-based): uniformly
+        between half and all of `backoff * 2**retry`, capped at `max_backoff`.
+
+        >>> policy = CallPolicy(backoff=0.1, max_backoff=0.3)
+        >>> 0.05 <= policy.backoff_delay(0) <= 0.1
+        True
+        >>> 0.15 <= policy.backoff_delay(5) <= 0.3
+        True
+        """
+        cap = min(self.max_backoff, self.backoff * 2**retry)
+        return random.uniform(cap / 2, cap)
+
+
+class LatencyWindow:
+    """Most recent successful call latencies for one method."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Nearest-rank quantile of the window, or `None` when empty.
+
+        >>> w = LatencyWindow()
+        >>> for i in range(1, 101):
+        ...     w.record(i / 100)
+        >>> w.quantile(0.95)
+        0.95
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, round(q * len(ordered)) - 1))
+        return ordered[rank]
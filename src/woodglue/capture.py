@@ -0,0 +1,218 @@
+"""
+Traffic capture for realistic load tests.
+
+With `CaptureConfig.enabled`, `JsonRpcHandler` hands a sample of calls to
+`TrafficCapture` once their response is written. A writer thread redacts
+the params and appends one compact JSON line per call to an append-only
+file in the data directory, so the IOLoop only enqueues the call.
+`read_capture()` reads the file back for `wgl replay`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from queue import Full, Queue
+from typing import IO, Any
+
+from pydantic import BaseModel
+
+from woodglue.config import CaptureConfig
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "<redacted>"
+
+Redactor = Callable[[str, Any], Any]
+
+
+class CaptureRecord(BaseModel):
+    """One captured call; times in seconds."""
+
+    t: float
+    """Wall-clock start time (Unix epoch)."""
+    method: str
+    params: Any = None
+    duration: float
+    size: int | None = None
+    """Bytes of the response body as sent; unset for calls in a batch."""
+    error: int | None = None
+    """JSON-RPC error code, if the call failed."""
+
+
+def redact(value: Any, names: Iterable[str]) -> Any:
+    """
+    Mask values under any key in `names` (case-insensitive), at any depth.
+
+    >>> redact({"user": "ann", "auth": {"Token": "x"}, "items": [{"password": 1}]},
+    ...        ["token", "password"])
+    {'user': 'ann', 'auth': {'Token': '<redacted>'}, 'items': [{'password': '<redacted>'}]}
+    """
+    lowered = {name.lower() for name in names}
+
+    def walk(v: Any) -> Any:
+        if isinstance(v, dict):
+            return {
+                k: REDACTED if isinstance(k, str) and k.lower() in lowered else walk(item)
+                for k, item in v.items()
+            }
+        if isinstance(v, list):
+            return [walk(item) for item in v]
+        return v
+
+    return walk(value) if lowered else value
+
+
+_Call = tuple[str, Any, float, float, int | None, int | None]
+"""(method, params, started_at, duration, size, error) of a sampled call."""
+
+
+class TrafficCapture:
+    """
+    Samples calls and appends them to a JSON Lines capture file from a
+    writer thread.
+    """
+
+    config: CaptureConfig
+    path: Path
+
+    def __init__(
+        self,
+        config: CaptureConfig,
+        path: Path,
+        redactor: Redactor | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.config = config
+        self.path = path
+        if redactor is None and config.redactor is not None:
+            from lythonic import GlobalRef
+
+            redactor = GlobalRef(config.redactor).get_instance()
+        self._redactor: Redactor | None = redactor
+        self._rng: random.Random = rng or random.Random()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: IO[str] | None = path.open("a", encoding="utf-8")
+        self._size: int = path.stat().st_size
+        self._queue: Queue[_Call | None] = Queue(config.max_queue)
+        self._writer: threading.Thread = threading.Thread(
+            target=self._write_loop, name="woodglue-capture", daemon=True
+        )
+        self._writer.start()
+        self.recorded: int = 0
+        # Counted apart so the IOLoop and the writer never update one counter
+        self._dropped: int = 0
+        self._failed: int = 0
+
+    @property
+    def skipped(self) -> int:
+        """Sampled calls not written: queue full, size cap reached or unencodable."""
+        return self._dropped + self._failed
+
+    def sampled(self) -> bool:
+        """Decide whether to capture the next call."""
+        if self._file is None:
+            return False
+        rate = self.config.sample_rate
+        return rate >= 1.0 or self._rng.random() < rate
+
+    def record(
+        self,
+        method: str,
+        params: Any,
+        started_at: float,
+        duration: float,
+        size: int | None,
+        error: int | None = None,
+    ) -> None:
+        """Queue a call for the writer thread; skipped if the queue is full."""
+        if self._file is None:
+            return
+        if self._size >= self.config.max_bytes:
+            self._dropped += 1
+            return
+        try:
+            self._queue.put_nowait((method, params, started_at, duration, size, error))
+        except Full:
+            self._dropped += 1
+
+    def _write_loop(self) -> None:
+        while True:
+            call = self._queue.get()
+            try:
+                if call is None:
+                    return
+                self._write(*call)
+                if self._queue.empty():
+                    self._flush()
+            finally:
+                self._queue.task_done()
+
+    def _write(
+        self,
+        method: str,
+        params: Any,
+        started_at: float,
+        duration: float,
+        size: int | None,
+        error: int | None,
+    ) -> None:
+        if self._file is None or self._size >= self.config.max_bytes:
+            self._failed += 1
+            return
+        try:
+            params = redact(params, self.config.redact)
+            if self._redactor is not None:
+                params = self._redactor(method, params)
+            record = CaptureRecord(
+                t=round(started_at, 6),
+                method=method,
+                params=params,
+                duration=round(duration, 6),
+                size=size,
+                error=error,
+            )
+            line = record.model_dump_json(exclude_none=True) + "\n"
+            self._file.write(line)
+        except Exception:
+            logger.exception("Cannot capture call to %s", method)
+            self._failed += 1
+            return
+        self._size += len(line.encode("utf-8"))
+        self.recorded += 1
+
+    def _flush(self) -> None:
+        try:
+            if self._file is not None:
+                self._file.flush()
+        except OSError:
+            logger.exception("Cannot flush capture file %s", self.path)
+
+    def flush(self) -> None:
+        """Wait until every queued call is written to the file."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write out the queued calls, stop the writer and close the file."""
+        if self._file is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        self._file = None
+
+
+def read_capture(path: Path) -> Iterator[CaptureRecord]:
+    """Records of a capture file in order; a truncated last line is skipped."""
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield CaptureRecord.model_validate(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping malformed capture line in %s", path)
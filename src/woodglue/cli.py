@@ -6,6 +6,8 @@ Commands:
     wgl stop           Stop a running instance
     wgl run <nsref>    Run a callable or DAG once
     wgl status         Show server status
+    wgl bench          Load-test a method and report latency
+    wgl replay <file>  Replay captured traffic and report latency per method
 """
 
 from __future__ import annotations
@@ -102,6 +104,17 @@ def start(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
         log_level=config.storage.log_level,
         loggers=config.storage.loggers,
     ).setup_logging()
+    # Tag log lines with the request id and mount prefix they belong to
+    from woodglue.timing import install_request_log_filter
+
+    install_request_log_filter()
+    # Write log records on a separate thread, off the IOLoop
+    log_queue = None
+    if config.log_queue.enabled:
+        from woodglue.log_queue import LogQueue
+
+        log_queue = LogQueue(config.log_queue)
+        log_queue.start()
     print(f"  Logging to {config.storage.log_file}")
 
     # CLI args override config values
@@ -135,6 +148,18 @@ def start(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
 
     from woodglue.engine import EngineRegistry, activate_triggers, create_engine
 
+    # Tracing spans go to a SQLite file in the system mount's state dir
+    tracer = None
+    if config.tracing.enabled:
+        from woodglue.tracing import SqliteSpanExporter, Tracer
+
+        trace_db = MountContext("system", mounts_dir).state_path(config.tracing.file)
+        exporter = SqliteSpanExporter(
+            trace_db, config.tracing.max_spans, max_queue=config.tracing.max_queue
+        )
+        tracer = Tracer(config.tracing, exporter)
+        print(f"  Tracing to {trace_db}")
+
     registry = EngineRegistry()
     for prefix, (ns, entry) in namespaces.items():
         if entry.run_engine:
@@ -143,7 +168,7 @@ def start(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
             storage.resolve_paths(mount.state_dir)
             storage.log_file = None  # global logging already configured
             ns.mount(storage)
-            engine = create_engine(prefix, ns)
+            engine = create_engine(prefix, ns, tracer)
             activated = activate_triggers(engine)
             registry.register(engine)
             if activated:
@@ -151,16 +176,64 @@ def start(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
 
     # Always mount the system namespace (introspection + engine facade)
     from woodglue.apps.system_api import build_system_namespace
-
-    system_ns = build_system_namespace(namespaces, registry if registry.has_engines() else None)
+    from woodglue.bulkhead import BulkheadRegistry
+    from woodglue.cpu_profile import CpuProfiler
+    from woodglue.jobs import JobManager
+    from woodglue.loop_monitor import LoopMonitor
+    from woodglue.memory_profile import MemoryProfiler
+
+    bulkheads = BulkheadRegistry()
+    loop_monitor = LoopMonitor(config.loop_monitor) if config.loop_monitor.enabled else None
+    mounts["system"] = MountContext("system", mounts_dir)
+    jobs = JobManager(config.jobs, mounts) if config.jobs.enabled else None
+    # Always available so it can be switched on at runtime via system.set_memory_profile
+    memory_profiler = MemoryProfiler(config.memory_profile)
+    system_ns = build_system_namespace(
+        namespaces,
+        registry if registry.has_engines() else None,
+        bulkheads,
+        loop_monitor,
+        jobs,
+        memory_profiler,
+        CpuProfiler(config.cpu_profile) if config.cpu_profile.enabled else None,
+        tracer=tracer,
+        log_queue=log_queue,
+    )
     system_entry = NamespaceEntry(gref="builtin:system", expose_api=True)
     namespaces["system"] = (system_ns, system_entry)
-    mounts["system"] = MountContext("system", mounts_dir)
 
-    app = create_app(namespaces=namespaces, config=config, engine_registry=registry, mounts=mounts)
+    capture = None
+    if config.capture.enabled:
+        from woodglue.capture import TrafficCapture
+
+        capture = TrafficCapture(config.capture, data_dir / config.capture.file)
+        print(f"  Capturing traffic to {capture.path}")
+
+    idempotency = None
+    if config.idempotency.enabled:
+        from woodglue.idempotency import IdempotencyStore
+
+        idempotency = IdempotencyStore(
+            config.idempotency, mounts["system"].state_path(config.idempotency.file)
+        )
+
+    app = create_app(
+        namespaces=namespaces,
+        config=config,
+        engine_registry=registry,
+        mounts=mounts,
+        bulkheads=bulkheads,
+        loop_monitor=loop_monitor,
+        jobs=jobs,
+        capture=capture,
+        memory_profiler=memory_profiler,
+        tracer=tracer,
+        idempotency=idempotency,
+    )
     app.listen(port, host)
     print(f"Woodglue listening on http://{host}:{port}")
     print(f"  RPC endpoint: http://{host}:{port}/rpc")
+    print(f"  Health:       http://{host}:{port}/healthz")
     if config.docs.enabled:
         print(f"  LLM docs:     http://{host}:{port}/docs/llms.txt")
     if config.ui.enabled:
@@ -172,13 +245,30 @@ def start(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
     pid_path = _pid_file(data_dir)
     pid_path.write_text(str(os.getpid()))
 
-    # Start trigger managers once the IOLoop is running
+    # Start trigger managers and the loop monitor once the IOLoop is running
+    if tracer is not None:
+        from woodglue.tracing import propagate_context
+
+        tornado.ioloop.IOLoop.current().add_callback(propagate_context)
     if registry.has_engines():
         tornado.ioloop.IOLoop.current().add_callback(registry.start_all)
+    if loop_monitor is not None:
+        tornado.ioloop.IOLoop.current().add_callback(loop_monitor.start)
 
     try:
         tornado.ioloop.IOLoop.current().start()
     finally:
+        if loop_monitor is not None:
+            loop_monitor.stop()
+        if jobs is not None:
+            jobs.shutdown()
+        if capture is not None:
+            capture.close()
+        if idempotency is not None:
+            idempotency.close()
+        memory_profiler.disable()
+        if tracer is not None:
+            tracer.exporter.close()
         if registry.has_engines():
             import asyncio
 
@@ -186,6 +276,8 @@ def start(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
             loop.run_until_complete(registry.stop_all())
         if pid_path.exists():
             pid_path.unlink()
+        if log_queue is not None:
+            log_queue.stop()
 
 
 @main_at.actions.wrap
@@ -257,6 +349,99 @@ def status(ctx: RunContext) -> None:  # pyright: ignore[reportUnusedParameter]
         print("Server not running")
 
 
+@main_at.actions.wrap
+def bench(
+    ctx: RunContext,
+    method: str = "",
+    params: str = "{}",
+    mix: str = "",
+    url: str = "",
+    duration: float = 10.0,
+    concurrency: int = 10,
+    rate: float = 0.0,
+    out: str = "",
+) -> None:
+    """Load-test a method (or a JSON mix file) and report latency percentiles"""
+    # --params is the JSON params object for --method; --mix is a load_mix()
+    # file instead. Runs --concurrency closed-loop workers, or --rate calls/s
+    # when set, against --url (default: this instance). --out saves the JSON.
+    import asyncio
+    import json
+
+    from woodglue.bench import BenchConfig, BenchTarget, format_report, load_mix, run_bench
+    from woodglue.client import ClientPoolConfig, WoodglueClient
+
+    root: WoodglueMain = ctx.path.get("/")  # pyright: ignore[reportAssignmentType]
+    if mix:
+        targets = load_mix(Path(mix))
+    elif method:
+        targets = [BenchTarget(method=method, params=json.loads(params))]
+    else:
+        print("Specify --method or --mix")
+        return
+    config = BenchConfig(duration=duration, concurrency=concurrency, rate=rate or None)
+    base_url = url or f"http://{root.host}:{root.port}"
+
+    async def _bench() -> str:
+        client = WoodglueClient(
+            base_url, data_dir=root.data, pool=ClientPoolConfig(max_concurrency=concurrency)
+        )
+        try:
+            result = await run_bench(client, targets, config)
+        finally:
+            client.close()
+        print(format_report(result))
+        return result.model_dump_json(indent=2)
+
+    report = asyncio.run(_bench())
+    if out:
+        Path(out).write_text(report)
+        print(f"  Results written to {out}")
+
+
+@main_at.actions.wrap
+def replay(
+    ctx: RunContext,
+    capture: str,
+    url: str = "",
+    speed: float = 1.0,
+    concurrency: int = 50,
+    out: str = "",
+) -> None:
+    """Replay a traffic capture and report latency per method"""
+    # --speed multiplies the captured pace; --speed=0 replays as fast as
+    # --concurrency allows. --url defaults to this instance.
+    import asyncio
+
+    from woodglue.capture import read_capture
+    from woodglue.client import ClientPoolConfig, WoodglueClient
+    from woodglue.replay import ReplayConfig, format_replay, run_replay
+
+    root: WoodglueMain = ctx.path.get("/")  # pyright: ignore[reportAssignmentType]
+    records = list(read_capture(Path(capture)))
+    if not records:
+        print(f"No calls in {capture}")
+        return
+    config = ReplayConfig(speed=speed or None, concurrency=concurrency)
+    base_url = url or f"http://{root.host}:{root.port}"
+
+    async def _replay() -> str:
+        client = WoodglueClient(
+            base_url, data_dir=root.data, pool=ClientPoolConfig(max_concurrency=concurrency)
+        )
+        try:
+            result = await run_replay(client, records, config)
+        finally:
+            client.close()
+        print(format_replay(result))
+        return result.model_dump_json(indent=2)
+
+    report = asyncio.run(_replay())
+    if out:
+        Path(out).write_text(report)
+        print(f"  Results written to {out}")
+
+
 def main() -> None:
     if not main_at.run_args(sys.argv).success:
         sys.exit(1)
@@ -3,28 +3,328 @@ Async JSON-RPC 2.0 client for woodglue servers.
 
 `WoodglueClient` makes typed RPC calls, optionally resolving return types
 from `x-global-ref` in the OpenAPI spec. Uses Tornado's `AsyncHTTPClient`.
+Envelopes are JSON by default; pass `encoding=codec.MSGPACK` or
+`codec.CBOR` to use a binary encoding. With `batch_window` set, calls
+issued close together are sent as one JSON-RPC batch. Pass a
+`ClientPoolConfig` to give the client its own connection pool instead of
+Tornado's process-wide one; `stats()` reports pool saturation and queue
+time either way. Inside a `with server_timing()` block, the server's
+per-phase timing of each response is collected for client-side tracing.
 """
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
+import hashlib
+import importlib
 import json
-from collections.abc import Callable
+import logging
+import operator
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator, Iterable, Mapping
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Generic, Literal, TypeVar
 
-from pydantic import BaseModel
-from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+from pydantic import BaseModel, Field, TypeAdapter, model_validator
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest, HTTPResponse
+from tornado.iostream import StreamClosedError
+
+from woodglue import codec
+from woodglue.call_policy import CallPolicy, LatencyWindow
+from woodglue.deadline import DEADLINE_HEADER
+from woodglue.idempotency import token_scope
+from woodglue.response_cache import CacheHint, ResponseCache, cache_key, parse_cache_control
+from woodglue.timing import (
+    REQUEST_ID_HEADER,
+    SERVER_TIMING_HEADER,
+    ServerTiming,
+    parse_server_timing,
+)
+from woodglue.tracing import TRACEPARENT_HEADER, current_span, format_traceparent
+
+logger = logging.getLogger(__name__)
+
+# Set by `call_many(batch=True)` so its calls queue up as one batch
+_force_batch: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "woodglue_force_batch", default=False
+)
+
+# Set by `server_timing()`; responses append their timing breakdown to it
+_timing_trace: contextvars.ContextVar[list[ServerTiming] | None] = contextvars.ContextVar(
+    "woodglue_timing_trace", default=None
+)
+
+
+@contextmanager
+def server_timing() -> Generator[list[ServerTiming]]:
+    """
+    Collect the `Server-Timing` breakdown and request id of every `/rpc`
+    response received by calls made inside the block, in arrival order.
+    Retries and hedges add one entry per attempt; calls sent in one batch
+    share the batch's entry.
+
+        with server_timing() as timings:
+            await client.call("myapp.greet", name="World")
+        print(timings[0].phases)  # {'parse': 0.02, 'validate': 0.05, ...}
+    """
+    trace: list[ServerTiming] = []
+    token = _timing_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _timing_trace.reset(token)
+
+
+def _observe(resp: HTTPResponse, traces: Iterable[list[ServerTiming] | None]) -> None:
+    timing: ServerTiming | None = None
+    for trace in traces:
+        if trace is None:
+            continue
+        if timing is None:
+            timing = ServerTiming(
+                request_id=resp.headers.get(REQUEST_ID_HEADER),
+                phases=parse_server_timing(resp.headers.get(SERVER_TIMING_HEADER)),
+            )
+        if not any(t is timing for t in trace):
+            trace.append(timing)
 
 
 class WoodglueRpcError(Exception):
     """Raised when the server returns a JSON-RPC error response."""
 
-    def __init__(self, code: int, message: str):
+    def __init__(self, code: int, message: str, data: Any = None):
         self.code: int = code
         self.message: str = message
+        self.data: Any = data
         super().__init__(f"JSON-RPC error {code}: {message}")
 
 
+T = TypeVar("T")
+
+_SCALARS: dict[str, Any] = {"integer": int, "number": float, "boolean": bool, "null": type(None)}
+_STRING_FORMATS: dict[str, Any] = {"date-time": datetime, "date": date}
+
+
+def schema_to_type(
+    schema: dict[str, Any],
+    defs: dict[str, Any],
+    resolve: Callable[[str], Any],
+) -> Any:
+    """
+    Rebuild a Python type from an OpenAPI response schema. Models come
+    from `x-global-ref` via `resolve`; arrays, objects, unions and scalars
+    map to `list`, `dict`, `|` and builtins. Anything else is `Any`.
+
+    >>> schema_to_type({"anyOf": [{"type": "array", "items": {"type": "integer"}},
+    ...                           {"type": "null"}]}, {}, print)
+    list[int] | None
+    """
+    gref = schema.get("x-global-ref")
+    if gref:
+        return resolve(gref)
+    ref = schema.get("$ref")
+    if isinstance(ref, str):
+        return schema_to_type(defs.get(ref.rsplit("/", 1)[-1], {}), defs, resolve)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            parts = list(dict.fromkeys(schema_to_type(s, defs, resolve) for s in schema[key]))
+            return Any if Any in parts else functools.reduce(operator.or_, parts)
+    kind = schema.get("type")
+    if kind == "array" and "prefixItems" not in schema:
+        return list[schema_to_type(schema.get("items", {}), defs, resolve)]
+    if kind == "object" and isinstance(schema.get("additionalProperties"), dict):
+        return dict[str, schema_to_type(schema["additionalProperties"], defs, resolve)]
+    if kind == "string":
+        return _STRING_FORMATS.get(schema.get("format", ""), str)
+    return _SCALARS.get(kind or "", Any)
+
+
+def response_schemas(spec: dict[str, Any]) -> dict[str, Any]:
+    """Map each `operationId` in an OpenAPI spec to its 200 response schema."""
+    schemas: dict[str, Any] = {}
+    for path_item in spec.get("paths", {}).values():
+        for operation in path_item.values():
+            op_id = operation.get("operationId")
+            if not op_id:
+                continue
+            schemas[op_id] = (
+                operation.get("responses", {})
+                .get("200", {})
+                .get("content", {})
+                .get("application/json", {})
+                .get("schema", {})
+            )
+    return schemas
+
+
+def spec_cache_hints(spec: dict[str, Any]) -> dict[str, Any]:
+    """Map each `operationId` to its `x-cache` hint, for cached methods only."""
+    return {
+        operation["operationId"]: operation["x-cache"]
+        for path_item in spec.get("paths", {}).values()
+        for operation in path_item.values()
+        if operation.get("operationId") and "x-cache" in operation
+    }
+
+
+def spec_idempotent(spec: dict[str, Any]) -> list[str]:
+    """`operationId`s marked `x-idempotent` in an OpenAPI spec."""
+    return [
+        operation["operationId"]
+        for path_item in spec.get("paths", {}).values()
+        for operation in path_item.values()
+        if operation.get("operationId") and operation.get("x-idempotent")
+    ]
+
+
+def _read_spec_cache(path: Path, base_url: str) -> dict[str, Any] | None:
+    try:
+        cached = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("base_url") != base_url:
+        return None
+    if not isinstance(cached.get("etag"), str) or not isinstance(cached.get("schemas"), dict):
+        return None
+    return cached
+
+
+def _write_spec_cache(path: Path, base_url: str, etag: str, entry: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"base_url": base_url, "etag": etag, **entry}))
+    tmp.replace(path)
+
+
+class _RpcErrorBody(BaseModel):
+    code: int
+    message: str
+    data: Any = None
+
+
+class _Envelope(BaseModel, Generic[T]):
+    result: T | None = None
+    error: _RpcErrorBody | None = None
+
+
+@cache
+def _adapter(tp: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(tp)
+
+
+def _validate(result: Any, tp: Any) -> Any:
+    return result if tp is None else _adapter(tp).validate_python(result)
+
+
+def _result(data: dict[str, Any]) -> Any:
+    """The `result` of a decoded response envelope; raises on an `error`."""
+    if "error" in data:
+        err = data["error"]
+        raise WoodglueRpcError(err["code"], err["message"], err.get("data"))
+    return data.get("result")
+
+
+# Gateway and connection failures (599) are worth another attempt
+_RETRYABLE_HTTP: frozenset[int] = frozenset({502, 503, 504, 599})
+
+
+def transport_failure(exc: BaseException) -> bool:
+    """True for connection errors and gateway/unavailable HTTP statuses."""
+    if isinstance(exc, HTTPClientError):
+        return exc.code in _RETRYABLE_HTTP
+    return isinstance(exc, OSError | StreamClosedError)
+
+
+def _retryable(exc: Exception, policy: CallPolicy) -> bool:
+    if isinstance(exc, WoodglueRpcError):
+        return exc.code in policy.retry_codes
+    return transport_failure(exc)
+
+
+@cache
+def _envelope_model(tp: Any) -> type[_Envelope[Any]]:
+    return _Envelope[tp]
+
+
+class ClientPoolConfig(BaseModel):
+    """
+    HTTP connection pool settings for one `WoodglueClient`.
+
+    Only the `curl` backend (requires `pycurl`, see the `curl` extra)
+    reuses connections to the server. The `simple` backend opens a
+    connection per request, so it rejects `keep_alive=True`.
+    """
+
+    max_concurrency: int = Field(default=10, ge=1)
+    """
+    Cap on this client's concurrent requests in total, across every host
+    it talks to (Tornado's `max_clients`, not a per-host limit); further
+    requests wait in the client queue.
+    """
+
+    connect_timeout: float = Field(default=20.0, gt=0)
+    request_timeout: float = Field(default=20.0, gt=0)
+    """Covers queue wait plus the request itself, as in Tornado."""
+
+    keep_alive: bool | None = None
+    """Reuse connections between requests; `None` means on with `curl`."""
+
+    backend: Literal["simple", "curl"] = "simple"
+
+    @model_validator(mode="after")
+    def _keep_alive_needs_curl(self) -> ClientPoolConfig:
+        if self.keep_alive and self.backend == "simple":
+            raise ValueError("keep_alive requires the curl backend")
+        return self
+
+
+class ClientStats(BaseModel):
+    """Client-side request metrics; times in seconds."""
+
+    requests: int
+    errors: int
+    in_flight: int
+    max_in_flight: int
+    max_concurrency: int
+    saturated: int
+    """Requests issued while `max_concurrency` requests were already in flight."""
+    queue_time_total: float
+    queue_time_max: float
+    mean_queue_time: float
+    attempts: int
+    """Attempts made under a `CallPolicy`, including retries and hedges."""
+    retries: int
+    hedges: int
+    hedge_wins: int
+    """Hedge requests that answered before the original."""
+    timeouts: int
+
+
+def _make_http_client(pool: ClientPoolConfig) -> AsyncHTTPClient:
+    if pool.backend == "curl":
+        curl_httpclient = importlib.import_module("tornado.curl_httpclient")
+        return curl_httpclient.CurlAsyncHTTPClient(
+            force_instance=True, max_clients=pool.max_concurrency
+        )
+    return AsyncHTTPClient(force_instance=True, max_clients=pool.max_concurrency)
+
+
+def _curl_keep_alive(enabled: bool) -> Callable[[Any], None]:
+    def prepare(curl: Any) -> None:
+        pycurl = importlib.import_module("pycurl")
+        if enabled:
+            curl.setopt(pycurl.TCP_KEEPALIVE, 1)
+        else:
+            curl.setopt(pycurl.FORBID_REUSE, 1)
+
+    return prepare
+
+
 class WoodglueClient:
     """
     Async client for woodglue JSON-RPC servers.
@@ -37,14 +337,91 @@ class WoodglueClient:
     2. `resolver` callable (receives the `x-global-ref` string)
     3. Type from `load_spec()` if loaded
     4. Return raw dict/primitive
+
+    `load_spec()` rebuilds each method's full return type (`list[X]`,
+    `X | None`, scalars) from the response schema. Results are validated
+    with a cached `TypeAdapter`; JSON responses are validated straight
+    from the response bytes.
+
+    Auto-batching is opt-in: with `batch_window` (seconds) set, calls are
+    queued and sent together once the window elapses or `batch_size`
+    calls are waiting. Each call still returns or raises on its own.
+    `call_many()` batches a known set of calls without a window.
+
+    With a `ResponseCache`, results of methods the server marks cacheable
+    (`x-cache` in the spec or `Cache-Control` on the response) are reused
+    for `max-age` seconds and served stale, while refreshing in the
+    background, for a further `stale-while-revalidate` seconds.
+
+    A `CallPolicy` (client default via `policy`, per method via `policies`,
+    or per call) sets an overall deadline, and for idempotent methods
+    (`x-idempotent` in the spec, or listed in `idempotent`) jittered
+    retries and hedged requests.
+
+    Without `pool` the client shares Tornado's process-wide
+    `AsyncHTTPClient` (10 concurrent requests). With `pool` it owns a
+    dedicated client; call `close()` when done with it.
     """
 
-    def __init__(self, base_url: str, *, token: str | None = None, data_dir: Path | None = None):
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        token: str | None = None,
+        data_dir: Path | None = None,
+        encoding: str = codec.JSON,
+        batch_window: float | None = None,
+        batch_size: int = 50,
+        pool: ClientPoolConfig | None = None,
+        spec_cache_dir: Path | None = None,
+        response_cache: ResponseCache | None = None,
+        policy: CallPolicy | None = None,
+        policies: dict[str, CallPolicy] | None = None,
+        idempotent: Iterable[str] = (),
+    ):
+        if not codec.is_available(encoding):
+            raise ValueError(f"Encoding not available: {encoding}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self._batch_window: float | None = batch_window
+        self._batch_size: int = batch_size
+        self._queued: list[
+            tuple[dict[str, Any], asyncio.Future[dict[str, Any]], list[ServerTiming] | None]
+        ] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._sending: set[asyncio.Task[None]] = set()
         self._base_url: str = base_url.rstrip("/")
-        self._http: AsyncHTTPClient = AsyncHTTPClient()
+        self._encoding: str = encoding
+        self._pool: ClientPoolConfig | None = pool
+        self._spec_cache_dir: Path | None = spec_cache_dir
+        self._response_cache: ResponseCache | None = response_cache
+        self._cache_hints: dict[str, CacheHint] = {}
+        self._refreshing: dict[str, asyncio.Future[None]] = {}
+        self._policy: CallPolicy | None = policy
+        self._policies: dict[str, CallPolicy] = dict(policies or {})
+        self._idempotent: set[str] = set(idempotent)
+        self._latencies: dict[str, LatencyWindow] = {}
+        self._attempts: int = 0
+        self._retries: int = 0
+        self._hedges: int = 0
+        self._hedge_wins: int = 0
+        self._timeouts: int = 0
+        self._http: AsyncHTTPClient = AsyncHTTPClient() if pool is None else _make_http_client(pool)
+        self._max_concurrency: int = (
+            pool.max_concurrency if pool is not None else getattr(self._http, "max_clients", 10)
+        )
+        self._requests: int = 0
+        self._errors: int = 0
+        self._in_flight: int = 0
+        self._max_in_flight: int = 0
+        self._saturated: int = 0
+        self._queue_time_total: float = 0.0
+        self._queue_time_max: float = 0.0
         self._request_id: int = 0
         self._return_types: dict[str, type[BaseModel]] = {}
         self._return_grefs: dict[str, str] = {}
+        self._page_types: dict[str, Any] = {}
+        self._methods: frozenset[str] = frozenset()
         if token is not None:
             self._token: str | None = token
         elif data_dir is not None:
@@ -54,6 +431,8 @@ class WoodglueClient:
             self._token = get_single_token(auth_db) if auth_db.exists() else None
         else:
             self._token = None
+        # Keys response cache entries, so a shared cache never crosses tokens
+        self._identity: str = token_scope(self._token or "")
 
     async def load_spec(self, strict: bool = False) -> None:
         """
@@ -61,104 +440,542 @@ class WoodglueClient:
 
         With `strict=True`, raises `ImportError` if any gref cannot be
         resolved. With `strict=False`, skips unresolvable grefs.
-        """
-        from lythonic import GlobalRef
 
+        With `spec_cache_dir` set, the response schemas are cached on disk
+        per base URL together with the spec's ETag and revalidated with
+        `If-None-Match`, so a warm start costs one 304 round trip.
+        """
         headers: dict[str, str] = {}
         if self._token:
             headers["Authorization"] = f"Bearer {self._token}"
-        resp = await self._http.fetch(f"{self._base_url}/docs/openapi.json", headers=headers)
-        spec = json.loads(resp.body)
-
-        for _path, path_item in spec.get("paths", {}).items():
-            for _http_method, operation in path_item.items():
-                op_id = operation.get("operationId")
-                if not op_id:
-                    continue
-
-                resp_content = (
-                    operation.get("responses", {})
-                    .get("200", {})
-                    .get("content", {})
-                    .get("application/json", {})
-                )
-                schema = resp_content.get("schema", {})
-                gref_str = schema.get("x-global-ref")
-                if not gref_str:
-                    continue
+        cache_file = self._spec_cache_file()
+        cached = _read_spec_cache(cache_file, self._base_url) if cache_file else None
+        if cached is not None:
+            headers["If-None-Match"] = cached["etag"]
+        resp = await self._fetch(
+            HTTPRequest(f"{self._base_url}/docs/openapi.json", headers=headers),
+            raise_error=False,
+        )
+        if resp.code == 304 and cached is not None:
+            entry: dict[str, Any] = cached
+        else:
+            resp.rethrow()
+            spec = json.loads(resp.body)
+            entry = {
+                "schemas": response_schemas(spec),
+                "cache_hints": spec_cache_hints(spec),
+                "idempotent": spec_idempotent(spec),
+            }
+            etag = resp.headers.get("Etag")
+            if cache_file is not None and etag:
+                _write_spec_cache(cache_file, self._base_url, etag, entry)
+        for op_id, hint in entry.get("cache_hints", {}).items():
+            self._cache_hints[op_id] = CacheHint.model_validate(hint)
+        self._idempotent.update(entry.get("idempotent", []))
+        self._methods = frozenset(entry["schemas"])
+        self._resolve_return_types(entry["schemas"], strict)
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @property
+    def methods(self) -> frozenset[str]:
+        """Qualified method names from the last `load_spec()` (empty before)."""
+        return self._methods
+
+    def is_idempotent(self, method: str) -> bool:
+        return method in self._idempotent
 
+    def _spec_cache_file(self) -> Path | None:
+        if self._spec_cache_dir is None:
+            return None
+        key = hashlib.sha256(self._base_url.encode("utf-8")).hexdigest()[:32]
+        return self._spec_cache_dir / f"{key}.json"
+
+    def _resolve_return_types(self, schemas: dict[str, Any], strict: bool) -> None:
+        from lythonic import GlobalRef
+
+        resolved: dict[str, Any] = {}
+
+        for op_id, schema in schemas.items():
+            gref_str = schema.get("x-global-ref")
+            if gref_str:
                 self._return_grefs[op_id] = gref_str
 
-                try:
-                    gref = GlobalRef(gref_str)
-                    cls = gref.get_instance()
-                    if isinstance(cls, type) and issubclass(cls, BaseModel):
-                        self._return_types[op_id] = cls
-                except Exception as exc:
-                    if strict:
-                        raise ImportError(
-                            f"Cannot resolve x-global-ref '{gref_str}' for method '{op_id}'"
-                        ) from exc
+            def resolve(gref_str: str, op_id: str = op_id) -> Any:
+                if gref_str not in resolved:
+                    resolved[gref_str] = Any
+                    try:
+                        cls = GlobalRef(gref_str).get_instance()
+                        if isinstance(cls, type) and issubclass(cls, BaseModel):
+                            resolved[gref_str] = cls
+                    except Exception as exc:
+                        if strict:
+                            raise ImportError(
+                                f"Cannot resolve x-global-ref '{gref_str}' for method '{op_id}'"
+                            ) from exc
+                return resolved[gref_str]
+
+            if schema.get("x-paginated"):
+                # Pages are plain dicts; `pages()` validates their items
+                items = schema_to_type(
+                    schema.get("properties", {}).get("items", {}),
+                    schema.get("$defs", {}),
+                    resolve,
+                )
+                self._page_types[op_id] = items
+                continue
+            tp = schema_to_type(schema, schema.get("$defs", {}), resolve)
+            if tp is not Any:
+                self._return_types[op_id] = tp
 
     async def call(
         self,
         method: str,
         *,
-        return_type: type[BaseModel] | None = None,
+        return_type: Any = None,
         resolver: Callable[[str], type[BaseModel] | None] | None = None,
+        policy: CallPolicy | None = None,
+        idempotency_key: str | None = None,
         **kwargs: Any,
     ) -> Any:
         """
         Call a JSON-RPC method and return the deserialized result.
 
+        `return_type` may be any type pydantic can validate, e.g. a model
+        or `list[Model]`. `policy` overrides the client's per-method or
+        default `CallPolicy` for this call.
+
+        With `idempotency_key`, the server runs the call at most once per
+        key and answers retries with the stored result, so the policy's
+        retries apply even to methods not marked idempotent.
+
         `kwargs` are sent as the JSON-RPC `params` object. BaseModel
         values in kwargs are serialized via `model_dump(mode="json")`.
         """
+        return await self.call_params(
+            method,
+            kwargs,
+            return_type=return_type,
+            resolver=resolver,
+            policy=policy,
+            idempotency_key=idempotency_key,
+        )
+
+    async def call_params(
+        self,
+        method: str,
+        params: Mapping[str, Any],
+        *,
+        return_type: Any = None,
+        resolver: Callable[[str], type[BaseModel] | None] | None = None,
+        policy: CallPolicy | None = None,
+        idempotency_key: str | None = None,
+    ) -> Any:
+        """
+        `call()` with the params given as a mapping, so params named like
+        `call()`'s own options (`method`, `policy`, ...) are sent as well.
+        """
+        params = {
+            key: value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+            for key, value in params.items()
+        }
+
+        envelope: dict[str, Any] = {"jsonrpc": "2.0", "method": method, "params": params}
+        if idempotency_key is not None:
+            envelope["idempotency_key"] = idempotency_key
+        resolved_type = return_type
+        if resolved_type is None and resolver is not None:
+            gref_str = self._return_grefs.get(method)
+            if gref_str:
+                resolved_type = resolver(gref_str)
+        if resolved_type is None:
+            resolved_type = self._return_types.get(method)
+
+        cache = self._response_cache
+        key = cache_key(method, params, self._base_url, self._identity)
+        if cache is not None and method in self._cache_hints:
+            hit = cache.get(key)
+            if hit is not None:
+                cached_result, stale = hit
+                if stale:
+                    self._revalidate(key, method, envelope)
+                return _validate(cached_result, resolved_type)
+
+        if policy is None:
+            policy = self._policies.get(method, self._policy)
+
+        if cache is None and not self._batching() and resolved_type is not None:
+
+            async def typed_attempt(budget: float | None) -> Any:
+                resp = await self._post_raw(self._with_id(envelope), budget)
+                content_type = codec.media_type(resp.headers.get("Content-Type")) or codec.JSON
+                if content_type != codec.JSON:
+                    return _validate(_result(codec.decode(resp.body, content_type)), resolved_type)
+                # Validate envelope and result in one pass over the raw bytes
+                parsed = _envelope_model(resolved_type).model_validate_json(resp.body)
+                if parsed.error is not None:
+                    err = parsed.error
+                    raise WoodglueRpcError(err.code, err.message, err.data)
+                return parsed.result
+
+            return await self._with_policy(
+                method, policy, typed_attempt, idempotency_key is not None
+            )
+
+        async def attempt(budget: float | None) -> tuple[Any, CacheHint | None]:
+            data, hint = await self._exchange(self._with_id(envelope), budget)
+            return _result(data), hint
+
+        result, hint = await self._with_policy(method, policy, attempt, idempotency_key is not None)
+        if cache is not None:
+            self._remember(key, method, result, hint)
+        return _validate(result, resolved_type)
+
+    async def pages(
+        self,
+        method: str,
+        *,
+        limit: int | None = None,
+        item_type: Any = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[list[Any]]:
+        """
+        Iterate over the pages of a method tagged `paginated`, following
+        `next_cursor` until the last page. Each page is a list of items,
+        validated as `item_type` or, after `load_spec()`, the item type the
+        spec declares. `limit` is the page size (the server caps it).
+        """
+        tp = list[item_type] if item_type is not None else self._page_types.get(method)
+        cursor: str | None = None
+        while True:
+            params = dict(kwargs)
+            if limit is not None:
+                params["limit"] = limit
+            if cursor is not None:
+                params["cursor"] = cursor
+            page = await self.call(method, **params)
+            yield _validate(page["items"], tp)
+            cursor = page.get("next_cursor")
+            if not cursor:
+                return
+
+    async def call_many(
+        self,
+        calls: Iterable[tuple[str, dict[str, Any]]],
+        *,
+        batch: bool = True,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """
+        Run several `(method, params)` calls concurrently; results come
+        back in order, typed as in `call()`.
+
+        With `batch=True` they are sent as JSON-RPC batches of up to
+        `batch_size` even without `batch_window`; with `batch=False` (and
+        no `batch_window`) they are pipelined as separate requests over
+        the connection pool. With
+        `return_exceptions=True` a failed call's exception is returned in
+        its place instead of raised.
+        """
+        token = _force_batch.set(batch or _force_batch.get())
+        try:
+            # gather() copies the context into each task, flag included
+            return await asyncio.gather(
+                *(self.call_params(method, params) for method, params in calls),
+                return_exceptions=return_exceptions,
+            )
+        finally:
+            _force_batch.reset(token)
+
+    def _batching(self) -> bool:
+        return self._batch_window is not None or _force_batch.get()
+
+    def _with_id(self, envelope: dict[str, Any]) -> dict[str, Any]:
+        """Copy of `envelope` with a new id, so retries and hedges never collide."""
         self._request_id += 1
+        return {**envelope, "id": self._request_id}
 
-        params: dict[str, Any] = {}
-        for key, value in kwargs.items():
-            if isinstance(value, BaseModel):
-                params[key] = value.model_dump(mode="json")
-            else:
-                params[key] = value
-
-        body = json.dumps(
-            {
-                "jsonrpc": "2.0",
-                "method": method,
-                "params": params,
-                "id": self._request_id,
-            }
+    async def _with_policy(
+        self,
+        method: str,
+        policy: CallPolicy | None,
+        attempt: Callable[[float | None], Awaitable[T]],
+        keyed: bool = False,
+    ) -> T:
+        """
+        Run `attempt` under `policy`: an overall deadline for any method;
+        retries and hedging only for idempotent ones or `keyed` calls
+        (sent with an idempotency key).
+        """
+        if policy is None:
+            return await attempt(None)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.timeout if policy.timeout is not None else None
+        repeatable = keyed or method in self._idempotent
+        retries = policy.retries if repeatable else 0
+        for retry in range(retries + 1):
+            budget = deadline - loop.time() if deadline is not None else None
+            try:
+                if budget is not None and budget <= 0:
+                    raise TimeoutError
+                if repeatable and policy.hedge:
+                    return await self._hedged(method, policy, attempt, budget)
+                return await self._timed(method, attempt, budget)
+            except TimeoutError:
+                self._timeouts += 1
+                raise
+            except Exception as exc:
+                if retry == retries or not _retryable(exc, policy):
+                    raise
+                delay = policy.backoff_delay(retry)
+                if deadline is not None and loop.time() + delay >= deadline:
+                    raise
+                self._retries += 1
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def _timed(
+        self, method: str, attempt: Callable[[float | None], Awaitable[T]], budget: float | None
+    ) -> T:
+        self._attempts += 1
+        started = time.monotonic()
+        result = await asyncio.wait_for(attempt(budget), budget)
+        self._latency(method).record(time.monotonic() - started)
+        return result
+
+    def _latency(self, method: str) -> LatencyWindow:
+        window = self._latencies.get(method)
+        if window is None:
+            window = self._latencies[method] = LatencyWindow()
+        return window
+
+    async def _hedged(
+        self,
+        method: str,
+        policy: CallPolicy,
+        attempt: Callable[[float | None], Awaitable[T]],
+        budget: float | None,
+    ) -> T:
+        """First answer of the primary and, if it is slow, one hedge request."""
+        window = self._latency(method)
+        delay = policy.hedge_delay
+        if len(window) >= policy.hedge_min_samples:
+            delay = window.quantile(policy.hedge_quantile) or delay
+        primary = asyncio.ensure_future(self._timed(method, attempt, budget))
+        pending: set[asyncio.Future[T]] = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if budget is not None and budget <= delay:
+                return await primary
+            self._hedges += 1
+            hedge_budget = budget - delay if budget is not None else None
+            pending.add(asyncio.ensure_future(self._timed(method, attempt, hedge_budget)))
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        if task is not primary:
+                            self._hedge_wins += 1
+                        return task.result()
+                    error = exc
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _exchange(
+        self, envelope: dict[str, Any], budget: float | None = None
+    ) -> tuple[dict[str, Any], CacheHint | None]:
+        """Send one call; returns the response envelope and any cache hint."""
+        if self._batching():
+            return await self._enqueue(envelope), None
+        resp = await self._post_raw(envelope, budget)
+        data = codec.decode(
+            resp.body, codec.media_type(resp.headers.get("Content-Type")) or codec.JSON
         )
+        return data, parse_cache_control(resp.headers.get("Cache-Control"))
+
+    def _remember(self, key: str, method: str, result: Any, hint: CacheHint | None) -> None:
+        if hint is not None:
+            self._cache_hints[method] = hint
+        else:
+            hint = self._cache_hints.get(method)
+        if hint is not None and self._response_cache is not None:
+            self._response_cache.put(key, result, hint)
+
+    def _revalidate(self, key: str, method: str, envelope: dict[str, Any]) -> None:
+        """Refresh a stale entry in the background, once per key at a time."""
+        if key in self._refreshing:
+            return
+
+        async def refresh() -> None:
+            try:
+                data, hint = await self._exchange(self._with_id(envelope))
+                if "error" not in data:
+                    self._remember(key, method, data.get("result"), hint)
+            except Exception:
+                logger.debug("Background refresh of %s failed", method, exc_info=True)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.ensure_future(refresh())
 
-        headers: dict[str, str] = {"Content-Type": "application/json"}
+    def stats(self) -> ClientStats:
+        """Request counts, pool saturation, queue time and policy outcomes."""
+        return ClientStats(
+            requests=self._requests,
+            errors=self._errors,
+            in_flight=self._in_flight,
+            max_in_flight=self._max_in_flight,
+            max_concurrency=self._max_concurrency,
+            saturated=self._saturated,
+            queue_time_total=self._queue_time_total,
+            queue_time_max=self._queue_time_max,
+            mean_queue_time=self._queue_time_total / self._requests if self._requests else 0.0,
+            attempts=self._attempts,
+            retries=self._retries,
+            hedges=self._hedges,
+            hedge_wins=self._hedge_wins,
+            timeouts=self._timeouts,
+        )
+
+    async def check_health(self, timeout: float = 2.0) -> bool:
+        """Probe `/healthz`; `True` only for a 200 within `timeout` seconds."""
+        request = HTTPRequest(
+            f"{self._base_url}/healthz", connect_timeout=timeout, request_timeout=timeout
+        )
+        try:
+            resp = await self._http.fetch(request, raise_error=False)
+        except Exception:
+            return False
+        return resp.code == 200
+
+    def close(self) -> None:
+        """Close the client's own connection pool (no-op for the shared one)."""
+        if self._pool is not None:
+            self._http.close()
+
+    async def _fetch(self, request: HTTPRequest, raise_error: bool = True) -> HTTPResponse:
+        pool = self._pool
+        if pool is not None:
+            request.connect_timeout = pool.connect_timeout
+            request.request_timeout = pool.request_timeout
+            if pool.backend == "curl":
+                request.prepare_curl_callback = _curl_keep_alive(pool.keep_alive is not False)
+        if self._in_flight >= self._max_concurrency:
+            self._saturated += 1
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        started = time.monotonic()
+        response: HTTPResponse | None = None
+        try:
+            response = await self._http.fetch(request, raise_error=raise_error)
+            return response
+        except HTTPClientError as exc:
+            response = exc.response
+            self._errors += 1
+            raise
+        except Exception:
+            self._errors += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._requests += 1
+            if response is not None and response.request_time is not None:
+                # request_time starts once a connection slot is free
+                queued = max(0.0, time.monotonic() - started - response.request_time)
+                self._queue_time_total += queued
+                self._queue_time_max = max(self._queue_time_max, queued)
+
+    def _headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {"Content-Type": self._encoding, "Accept": self._encoding}
         if self._token:
             headers["Authorization"] = f"Bearer {self._token}"
+        span = current_span.get()
+        if span is not None:
+            # Continue the caller's trace on the server
+            headers[TRACEPARENT_HEADER] = format_traceparent(span)
+        return headers
 
+    async def _post_raw(
+        self, payload: Any, budget: float | None = None, observe: bool = True
+    ) -> HTTPResponse:
+        """
+        POST an envelope (or a batch of them) to `/rpc`. With `observe`,
+        the response timing goes to the caller's `server_timing()` block.
+        """
+        headers = self._headers()
+        if budget is not None:
+            headers[DEADLINE_HEADER] = f"{budget:.3f}"
         req = HTTPRequest(
             f"{self._base_url}/rpc",
             method="POST",
-            body=body,
+            body=codec.encode(payload, self._encoding),
             headers=headers,
         )
-        resp = await self._http.fetch(req)
-        data = json.loads(resp.body)
+        resp = await self._fetch(req)
+        if observe:
+            _observe(resp, [_timing_trace.get()])
+        return resp
 
-        if "error" in data:
-            err = data["error"]
-            raise WoodglueRpcError(err["code"], err["message"])
+    def _enqueue(self, envelope: dict[str, Any]) -> asyncio.Future[dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[dict[str, Any]] = loop.create_future()
+        self._queued.append((envelope, future, _timing_trace.get()))
+        if len(self._queued) >= self._batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._batch_window or 0.0, self.flush)
+        return future
 
-        result = data.get("result")
+    def flush(self) -> None:
+        """Send queued calls now instead of waiting for the batch window."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queued, self._queued = self._queued, []
+        if not queued:
+            return
+        task = asyncio.ensure_future(self._send_batch(queued))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
 
-        resolved_type = return_type
-        if resolved_type is None and resolver is not None:
-            gref_str = self._return_grefs.get(method)
-            if gref_str:
-                resolved_type = resolver(gref_str)
-        if resolved_type is None:
-            resolved_type = self._return_types.get(method)
-
-        if resolved_type is not None and isinstance(result, dict):
-            return resolved_type.model_validate(result)
-        return result
+    async def _send_batch(
+        self,
+        queued: list[
+            tuple[dict[str, Any], asyncio.Future[dict[str, Any]], list[ServerTiming] | None]
+        ],
+    ) -> None:
+        try:
+            # Observed below for every queued call's trace, not just the flusher's
+            resp = await self._post_raw([envelope for envelope, _, _ in queued], observe=False)
+            data = codec.decode(
+                resp.body, codec.media_type(resp.headers.get("Content-Type")) or codec.JSON
+            )
+        except Exception as exc:
+            for _, future, _ in queued:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        _observe(resp, [trace for _, _, trace in queued])
+        # A single envelope back (e.g. Unauthorized) applies to every call
+        by_id: dict[Any, dict[str, Any]] = (
+            {r.get("id"): r for r in data} if isinstance(data, list) else {}
+        )
+        for envelope, future, _ in queued:
+            if future.done():
+                continue
+            response = by_id.get(envelope["id"], data if isinstance(data, dict) else None)
+            if response is None:
+                future.set_exception(
+                    WoodglueRpcError(-32603, f"No response for request id {envelope['id']}")
+                )
+            else:
+                future.set_result(response)
@@ -0,0 +1,100 @@
+"""
+Wire encodings for JSON-RPC envelopes.
+
+JSON is always available. `application/msgpack` and `application/cbor`
+use the optional `msgpack` / `cbor2` packages and carry `bytes` natively.
+The envelope (`jsonrpc`, `method`, `params`, `result`, `error`, `id`) is
+the same in every encoding; only the framing differs.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import json
+from functools import cache
+from typing import Any
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+_ALIASES: dict[str, str] = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+_MODULES: dict[str, str] = {MSGPACK: "msgpack", CBOR: "cbor2"}
+
+BINARY_TYPES: frozenset[str] = frozenset(_MODULES)
+
+
+def media_type(header: str | None) -> str:
+    """
+    Normalize a `Content-Type` value to a bare, canonical media type.
+
+    >>> media_type("application/x-msgpack; charset=binary")
+    'application/msgpack'
+    >>> media_type(None)
+    ''
+    """
+    if not header:
+        return ""
+    bare = header.split(";")[0].strip().lower()
+    return _ALIASES.get(bare, bare)
+
+
+@cache
+def is_available(content_type: str) -> bool:
+    """True if `content_type` can be encoded and decoded in this process."""
+    if content_type == JSON:
+        return True
+    module = _MODULES.get(content_type)
+    return module is not None and importlib.util.find_spec(module) is not None
+
+
+def encode(data: Any, content_type: str) -> bytes:
+    """Encode an envelope in the given media type."""
+    if content_type == MSGPACK:
+        return importlib.import_module("msgpack").packb(data, use_bin_type=True)
+    if content_type == CBOR:
+        return importlib.import_module("cbor2").dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+
+def decode(body: bytes, content_type: str) -> Any:
+    """Decode an envelope; raises `ValueError` on malformed input."""
+    try:
+        if content_type == MSGPACK:
+            return importlib.import_module("msgpack").unpackb(body, raw=False)
+        if content_type == CBOR:
+            return importlib.import_module("cbor2").loads(body)
+        return json.loads(body)
+    except ValueError:
+        raise
+    except Exception as exc:
+        raise ValueError(f"Cannot decode {content_type or JSON} body: {exc}") from exc
+
+
+def choose_response_type(accept: str | None, request_type: str) -> str:
+    """
+    Pick the response media type. An explicit binary type in `Accept`
+    wins; otherwise a binary request gets a reply in the same encoding
+    unless the client asked for JSON. Unavailable types fall back to JSON.
+
+    >>> choose_response_type(None, "application/json")
+    'application/json'
+    >>> choose_response_type("application/json", "application/msgpack")
+    'application/json'
+    """
+    accepted = [media_type(part) for part in (accept or "").split(",") if part.strip()]
+    for candidate in accepted:
+        if candidate in BINARY_TYPES and is_available(candidate):
+            return candidate
+    if (
+        request_type in BINARY_TYPES
+        and is_available(request_type)
+        and (not accepted or "*/*" in accepted or request_type in accepted)
+    ):
+        return request_type
+    return JSON
@@ -9,10 +9,10 @@ settings.
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any
 
 from lythonic.compose.engine import StorageConfig
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from pydantic_yaml import parse_yaml_file_as
 
 CONFIG_FILENAME = "woodglue.yaml"
@@ -24,6 +24,18 @@ class WoodglueStorageConfig(StorageConfig):
     auth_db: Path | None = None
 
 
+class ConcurrencyLimit(BaseModel):
+    """
+    Bulkhead settings: at most `max_concurrent` calls run at once, up to
+    `max_queue` more wait for a slot, and a waiter gives up after
+    `queue_timeout` seconds.
+    """
+
+    max_concurrent: int = Field(ge=1)
+    max_queue: int = Field(default=0, ge=0)
+    queue_timeout: float = Field(default=5.0, gt=0)
+
+
 class DocsConfig(BaseModel):
     """Documentation generation settings."""
 
@@ -41,6 +53,15 @@ class NamespaceEntry(BaseModel):
     """
     Per-namespace configuration. Exactly one of `gref`, `file`, or `entries`
     must be set to specify how the namespace is instantiated.
+
+    `concurrency` caps all RPC calls into the namespace. `limits` adds
+    narrower bulkheads keyed by method nsref or by tag: a call acquires
+    every limit whose key matches its nsref or one of its tags (each key
+    is one shared bulkhead), then the namespace-wide `concurrency`.
+
+    `timeout` bounds how long any call into the namespace may run (in
+    seconds, including time queued for a bulkhead); `timeouts` overrides it
+    per nsref or tag. The tightest matching value wins.
     """
 
     gref: str | None = None
@@ -48,6 +69,10 @@ class NamespaceEntry(BaseModel):
     entries: list[dict[str, Any]] | None = None
     expose_api: bool = True
     run_engine: bool = False
+    concurrency: ConcurrencyLimit | None = None
+    limits: dict[str, ConcurrencyLimit] = {}
+    timeout: float | None = Field(default=None, gt=0)
+    timeouts: dict[str, Annotated[float, Field(gt=0)]] = {}
 
     @model_validator(mode="after")
     def _exactly_one_source(self) -> NamespaceEntry:
@@ -57,6 +82,193 @@ class NamespaceEntry(BaseModel):
         return self
 
 
+class LoopMonitorConfig(BaseModel):
+    """
+    Event-loop lag sampling and load shedding.
+
+    The loop is sampled every `interval` seconds. While the measured lag
+    exceeds `shed_lag`, new calls to methods carrying any of `shed_tags`
+    are rejected with a retryable error. A stall longer than
+    `stall_threshold` logs the stack of the code blocking the loop.
+    """
+
+    enabled: bool = True
+    interval: float = Field(default=0.1, gt=0)
+    shed_lag: float | None = Field(default=0.5, gt=0)
+    stall_threshold: float = Field(default=1.0, gt=0)
+    shed_tags: list[str] = ["low_priority"]
+
+
+class LogQueueConfig(BaseModel):
+    """
+    Log writes off the IOLoop thread.
+
+    When enabled, `wgl start` hands log records to a writer thread through
+    a queue holding at most `max_queue` records. Records that arrive while
+    the queue is full are dropped and counted rather than blocking the
+    caller.
+    """
+
+    enabled: bool = True
+    max_queue: int = Field(default=10_000, ge=1)
+
+
+class JobsConfig(BaseModel):
+    """
+    Asynchronous job mode for long-running RPC calls.
+
+    At most `max_workers` jobs run at once; up to `max_pending` may be
+    queued or running before submissions are rejected. Finished results
+    are kept for `result_ttl` seconds; expired ones are purged from the
+    namespaces' job files every `purge_interval` seconds.
+    """
+
+    enabled: bool = True
+    max_workers: int = Field(default=4, ge=1)
+    max_pending: int = Field(default=100, ge=1)
+    result_ttl: float = Field(default=3600.0, gt=0)
+    purge_interval: float = Field(default=600.0, gt=0)
+
+
+class IdempotencyConfig(BaseModel):
+    """
+    Replay of stored responses for calls retried with an idempotency key.
+
+    The first successful response per (token, method, key) is kept for
+    `ttl` seconds in `file` under the system mount's state dir. The
+    `memory_entries` most recently used are also held in memory. Expired
+    responses are purged from the file every `purge_interval` seconds.
+    """
+
+    enabled: bool = True
+    ttl: float = Field(default=86_400.0, gt=0)
+    file: str = "idempotency.db"
+    memory_entries: int = Field(default=1000, ge=0)
+    purge_interval: float = Field(default=600.0, gt=0)
+
+
+class PaginationConfig(BaseModel):
+    """
+    Page sizes for methods tagged `paginated`: `default_limit` items
+    when the caller sends no `limit`, never more than `max_limit`.
+    """
+
+    default_limit: int = Field(default=100, ge=1)
+    max_limit: int = Field(default=1000, ge=1)
+
+    @model_validator(mode="after")
+    def _default_within_max(self) -> PaginationConfig:
+        if self.default_limit > self.max_limit:
+            raise ValueError("default_limit must not exceed max_limit")
+        return self
+
+
+class CompressionConfig(BaseModel):
+    """
+    Response compression negotiated via `Accept-Encoding`.
+
+    `encodings` lists codecs in server preference order; `zstd` and `br`
+    are used only when the optional `zstandard` / `brotli` packages are
+    installed. Bodies smaller than `min_size` bytes are sent as-is.
+    """
+
+    enabled: bool = True
+    encodings: list[str] = ["zstd", "br", "gzip"]
+    min_size: int = Field(default=1024, ge=0)
+    gzip_level: int = Field(default=6, ge=1, le=9)
+    zstd_level: int = Field(default=3, ge=1, le=22)
+    brotli_quality: int = Field(default=4, ge=0, le=11)
+
+
+class CaptureConfig(BaseModel):
+    """
+    Opt-in recording of sampled RPC calls for `wgl replay`.
+
+    A `sample_rate` fraction of calls is appended to `file` (relative to
+    the data directory) as JSON Lines: method, params, start time,
+    duration, response size and error code. Params whose name is listed
+    in `redact` are masked at any depth; `redactor` is an optional gref
+    to a `(method, params) -> params` callable applied afterwards.
+    Capture stops once the file reaches `max_bytes`. Records are written
+    by a background thread; at most `max_queue` wait for it, and calls
+    sampled while the queue is full are skipped.
+    """
+
+    enabled: bool = False
+    sample_rate: float = Field(default=1.0, gt=0, le=1)
+    file: str = "capture.jsonl"
+    redact: list[str] = ["password", "secret", "token"]
+    redactor: str | None = None
+    max_bytes: int = Field(default=100 * 1024 * 1024, ge=0)
+    max_queue: int = Field(default=10_000, ge=1)
+
+
+class MemoryProfileConfig(BaseModel):
+    """
+    Opt-in, sampled allocation profiling of RPC calls.
+
+    While enabled, `tracemalloc` traces allocations `frames` stack frames
+    deep, and a `sample_rate` fraction of calls is measured: peak and
+    retained bytes of the method call and of result serialization,
+    aggregated per method. It can be switched on and off at runtime with
+    `system.set_memory_profile`.
+    """
+
+    enabled: bool = False
+    sample_rate: float = Field(default=0.1, gt=0, le=1)
+    frames: int = Field(default=1, ge=1)
+
+
+class CpuProfileConfig(BaseModel):
+    """
+    On-demand sampling CPU profiler behind `system.start_profile`.
+
+    While a profile runs, a background thread samples the stacks of all
+    threads every `interval` seconds. A single profile may run for at
+    most `max_duration` seconds.
+    """
+
+    enabled: bool = True
+    interval: float = Field(default=0.005, gt=0)
+    max_duration: float = Field(default=300.0, gt=0)
+
+
+class TimingConfig(BaseModel):
+    """
+    Per-request phase timing for `/rpc`.
+
+    With `server_timing`, responses carry a `Server-Timing` header with
+    the milliseconds spent in auth, parse, validate, call and serialize.
+    An `access_log_sample_rate` fraction of requests, plus every request
+    slower than `slow_request` seconds, is logged as one JSON record to
+    the `woodglue.access` logger.
+    """
+
+    server_timing: bool = True
+    access_log_sample_rate: float = Field(default=0.01, ge=0, le=1)
+    slow_request: float | None = Field(default=1.0, gt=0)
+
+
+class TracingConfig(BaseModel):
+    """
+    Span tracing, exported to a local SQLite file.
+
+    RPC requests and method calls, trigger fires, and the DAG runs and
+    node executions of namespaces with `run_engine` produce spans. A
+    `sample_rate` fraction of new traces is kept; traces continued from
+    an incoming `traceparent` header follow its sampled flag. Spans are
+    written to `file` in the system mount's state dir by a background
+    thread, keeping the latest `max_spans`. At most `max_queue` spans wait
+    for it; spans that find the queue full are dropped.
+    """
+
+    enabled: bool = False
+    sample_rate: float = Field(default=1.0, ge=0, le=1)
+    file: str = "traces.db"
+    max_spans: int = Field(default=100_000, ge=1)
+    max_queue: int = Field(default=10_000, ge=1)
+
+
 class AuthConfig(BaseModel):
     """Bearer token authentication settings."""
 
@@ -79,6 +291,17 @@ class WoodglueConfig(BaseModel):
     docs: DocsConfig = DocsConfig()
     ui: UiConfig = UiConfig()
     auth: AuthConfig = AuthConfig()
+    loop_monitor: LoopMonitorConfig = LoopMonitorConfig()
+    log_queue: LogQueueConfig = LogQueueConfig()
+    jobs: JobsConfig = JobsConfig()
+    idempotency: IdempotencyConfig = IdempotencyConfig()
+    pagination: PaginationConfig = PaginationConfig()
+    compression: CompressionConfig = CompressionConfig()
+    capture: CaptureConfig = CaptureConfig()
+    memory_profile: MemoryProfileConfig = MemoryProfileConfig()
+    cpu_profile: CpuProfileConfig = CpuProfileConfig()
+    timing: TimingConfig = TimingConfig()
+    tracing: TracingConfig = TracingConfig()
 
 
 def load_config(data_dir: Path) -> WoodglueConfig:
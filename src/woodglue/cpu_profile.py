@@ -0,0 +1,163 @@
+"""
+On-demand sampling CPU profiler.
+
+`CpuProfiler.run()` starts a thread that, every `interval` seconds,
+reads the stack of every other thread via `sys._current_frames()`. No
+tracing hooks are installed, so the server pays only for the sampling
+itself and only while a profile runs.
+
+`JsonRpcHandler` runs each call inside `attributed()`, whose frame sits
+on the stack whenever that call's code is executing. The sampler uses it
+to put the JSON-RPC method at the root of the stack (`rpc t.add;...`).
+Other samples are rooted at their thread name. The result is in the
+collapsed-stack format read by `flamegraph.pl`, speedscope and similar
+tools.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Awaitable
+from pathlib import Path
+from types import FrameType
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from woodglue.config import CpuProfileConfig
+
+T = TypeVar("T")
+
+
+async def attributed(method: str, call: Awaitable[T]) -> T:  # pyright: ignore[reportUnusedParameter]
+    """Await `call`, marking the stack as running JSON-RPC `method`."""
+    return await call
+
+
+_ATTRIBUTED_CODE = attributed.__code__
+
+
+class ProfileBusy(Exception):
+    """Raised when a profile is requested while another one runs."""
+
+
+class CpuProfile(BaseModel):
+    """
+    Result of `system.start_profile`. `collapsed` holds one
+    `frame;frame;... count` line per distinct stack, unless it was saved
+    to `path` instead.
+    """
+
+    duration: float
+    interval: float
+    ticks: int
+    """Sampling rounds taken."""
+    samples: int
+    """Stacks kept, summed over threads."""
+    methods: dict[str, int]
+    """Samples attributed to each JSON-RPC method."""
+    collapsed: str | None = None
+    path: str | None = None
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def format_collapsed(stacks: Counter[str]) -> str:
+    """
+    One `stack count` line per stack, in stable order.
+
+    >>> print(format_collapsed(Counter({"rpc a.b;f (x.py:1)": 3, "MainThread;g (y.py:2)": 1})))
+    MainThread;g (y.py:2) 1
+    rpc a.b;f (x.py:1) 3
+    """
+    return "\n".join(f"{stack} {count}" for stack, count in sorted(stacks.items()))
+
+
+class _Sampler:
+    def __init__(self, interval: float, namespace: str | None) -> None:
+        self.interval: float = interval
+        self.namespace: str | None = namespace
+        self.stop: threading.Event = threading.Event()
+        self.stacks: Counter[str] = Counter()
+        self.methods: Counter[str] = Counter()
+        self.ticks: int = 0
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self.stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.ticks += 1
+            for ident, frame in sys._current_frames().items():  # pyright: ignore[reportPrivateUsage]
+                if ident != own:
+                    self._sample(frame, names.get(ident) or f"thread-{ident}")
+
+    def _sample(self, leaf: FrameType, thread_name: str) -> None:
+        labels: list[str] = []
+        method: str | None = None
+        frame: FrameType | None = leaf
+        while frame is not None:
+            if frame.f_code is _ATTRIBUTED_CODE:
+                method = frame.f_locals.get("method")
+                break
+            labels.append(frame_label(frame))
+            frame = frame.f_back
+        if self.namespace is not None and (
+            method is None or method.partition(".")[0] != self.namespace
+        ):
+            return
+        labels.append(f"rpc {method}" if method is not None else thread_name)
+        labels.reverse()
+        self.stacks[";".join(labels)] += 1
+        if method is not None:
+            self.methods[method] += 1
+
+
+class CpuProfiler:
+    """Runs one sampling profile at a time."""
+
+    config: CpuProfileConfig
+
+    def __init__(self, config: CpuProfileConfig) -> None:
+        self.config = config
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def run(self, duration: float, namespace: str | None = None) -> CpuProfile:
+        """
+        Sample all threads for `duration` seconds. With `namespace`, keep
+        only samples of calls to methods under that prefix.
+        """
+        if not 0 < duration <= self.config.max_duration:
+            raise ValueError(f"duration must be in (0, {self.config.max_duration}] seconds")
+        if not self._lock.acquire(blocking=False):
+            raise ProfileBusy("A CPU profile is already running")
+        try:
+            sampler = _Sampler(self.config.interval, namespace)
+            thread = threading.Thread(target=sampler.run, name="woodglue-cpu-profiler", daemon=True)
+            started = time.monotonic()
+            thread.start()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                sampler.stop.set()
+                thread.join()
+        finally:
+            self._lock.release()
+        return CpuProfile(
+            duration=time.monotonic() - started,
+            interval=self.config.interval,
+            ticks=sampler.ticks,
+            samples=sum(sampler.stacks.values()),
+            methods=dict(sampler.methods.most_common()),
+            collapsed=format_collapsed(sampler.stacks),
+        )
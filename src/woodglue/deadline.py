@@ -0,0 +1,78 @@
+"""
+Per-call execution deadlines.
+
+The RPC handler derives a time budget from `NamespaceEntry.timeout` /
+`NamespaceEntry.timeouts` and the client's `X-Woodglue-Timeout` header,
+then exposes the absolute deadline to the running method through the
+`current_deadline` context var. Long-running methods can call
+`remaining_budget()` to size downstream timeouts or stop early.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable
+from contextvars import ContextVar
+
+from woodglue.config import NamespaceEntry
+
+DEADLINE_HEADER = "X-Woodglue-Timeout"
+"""Request header carrying the client's time budget in seconds."""
+
+current_deadline: ContextVar[float | None] = ContextVar("current_deadline", default=None)
+"""Absolute `time.monotonic()` deadline of the current RPC call, if bounded."""
+
+
+def remaining_budget() -> float | None:
+    """
+    Seconds left before the current call's deadline, or `None` when the
+    call is unbounded. Never negative.
+
+    >>> remaining_budget() is None
+    True
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def parse_timeout_header(value: str | None) -> float | None:
+    """
+    Parse a `X-Woodglue-Timeout` value. Missing header means no budget;
+    malformed or non-positive values raise `ValueError`.
+
+    >>> parse_timeout_header("2.5")
+    2.5
+    >>> parse_timeout_header(None) is None
+    True
+    """
+    if value is None or not value.strip():
+        return None
+    seconds = float(value)
+    if not seconds > 0:
+        raise ValueError(f"{DEADLINE_HEADER} must be a positive number of seconds")
+    return seconds
+
+
+def method_timeout(entry: NamespaceEntry | None, nsref: str, tags: Iterable[str]) -> float | None:
+    """Tightest configured timeout for a method, or `None` if unbounded."""
+    if entry is None:
+        return None
+    keys = {nsref, *tags}
+    candidates = [v for k, v in entry.timeouts.items() if k in keys]
+    if entry.timeout is not None:
+        candidates.append(entry.timeout)
+    return min(candidates, default=None)
+
+
+def effective_budget(*budgets: float | None) -> float | None:
+    """
+    Smallest of the given budgets, ignoring `None`.
+
+    >>> effective_budget(None, 3.0, 1.5)
+    1.5
+    >>> effective_budget(None, None) is None
+    True
+    """
+    return min((b for b in budgets if b is not None), default=None)
@@ -3,10 +3,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from lythonic.compose.namespace import Namespace
 from lythonic.compose.trigger import TriggerManager, TriggerStore
 
+if TYPE_CHECKING:
+    from woodglue.tracing import Tracer
+
 
 @dataclass
 class NamespaceEngine:
@@ -51,15 +55,33 @@ class EngineRegistry:
             engine.trigger_manager.stop()
 
 
-def create_engine(prefix: str, namespace: Namespace) -> NamespaceEngine:
-    """Create engine instances for a namespace. Namespace must be mounted first."""
+def create_engine(
+    prefix: str, namespace: Namespace, tracer: Tracer | None = None
+) -> NamespaceEngine:
+    """
+    Create engine instances for a namespace. Namespace must be mounted first.
+
+    With `tracer`, the namespace's DAG runs, node executions and trigger
+    fires are recorded as spans.
+    """
     storage = namespace._storage  # pyright: ignore[reportPrivateUsage]  # set by mount()
     assert storage.triggers_db is not None, "namespace must be mounted with triggers_db"
     trigger_store = TriggerStore(storage.triggers_db)
     provenance = namespace._provenance  # pyright: ignore[reportPrivateUsage]
-    trigger_manager = TriggerManager(
-        namespace=namespace, store=trigger_store, provenance=provenance
-    )
+    if tracer is None:
+        trigger_manager = TriggerManager(
+            namespace=namespace, store=trigger_store, provenance=provenance
+        )
+    else:
+        from woodglue.tracing import TracingProvenance, TracingTriggerManager
+
+        if provenance is not None:
+            provenance = TracingProvenance(provenance.db_path, tracer)
+            namespace._provenance = provenance  # pyright: ignore[reportPrivateUsage]
+        trigger_manager = TracingTriggerManager(
+            namespace=namespace, store=trigger_store, provenance=provenance
+        )
+        trigger_manager.tracer = tracer
     return NamespaceEngine(
         prefix=prefix,
         namespace=namespace,
@@ -0,0 +1,107 @@
+"""
+HTTP caching for the per-method routes `/rpc/{prefix}.{method}`.
+
+`POST /rpc` carries the method name in the body, so no HTTP cache can
+tell two calls apart. The per-method routes that the OpenAPI spec lists
+put the method in the URL instead. Methods tagged `read_only` or `pure`
+also answer `GET`, with their params in the query string. A browser or
+a caching proxy in front of the server (such as Caddy) can then store
+those responses:
+
+- Every result carries a weak `ETag` hashed from the encoded body. It
+  is weak because the compression transform may re-encode the body. A
+  `GET` with a matching `If-None-Match` is answered `304 Not Modified`
+  without a body.
+- `Cache-Control` on `GET` follows the method's `NsCacheConfig` (see
+  `woodglue.response_cache`). Methods without a cache config get
+  `no-cache`, so caches store the result but revalidate it every time.
+  Responses to requests that carried a token are `private`, so shared
+  caches never serve them to other clients.
+
+Query values are parsed as JSON, so `?n=3&flag=true&ids=[1,2]` gives an
+int, a bool and a list. Params annotated `str` are taken verbatim, and so
+is any value that is not valid JSON.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import typing
+from typing import Any
+
+from lythonic.compose.namespace import NamespaceNode
+
+from woodglue.pagination import CURSOR_PARAM
+from woodglue.response_cache import cache_hint
+
+READ_ONLY_TAG = "read_only"
+"""Methods with this tag have no side effects and answer `GET`."""
+
+PURE_TAG = "pure"
+"""Like `read_only`, and the result depends only on the params."""
+
+GET_TAGS: frozenset[str] = frozenset({READ_ONLY_TAG, PURE_TAG})
+
+
+def allows_get(node: NamespaceNode) -> bool:
+    """True if the method may be called with `GET`."""
+    return not GET_TAGS.isdisjoint(node.tags)
+
+
+def content_etag(body: bytes) -> str:
+    """
+    Weak entity tag for an encoded response body.
+
+    >>> content_etag(b'{"sum": 3}')
+    'W/"925c2940263ce22afe85fb717c513903d80a5ac2"'
+    """
+    return f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+def cache_control(node: NamespaceNode, shared: bool) -> str:
+    """
+    `Cache-Control` for a `GET` response of the method. With `shared`,
+    proxies may store it too (`public`); otherwise only the client.
+    """
+    hint = cache_hint(node)
+    if hint is not None:
+        return hint.header(public=shared)
+    return "public, no-cache" if shared else "private, no-cache"
+
+
+def _is_text(annotation: Any) -> bool:
+    """
+    >>> _is_text(str), _is_text(str | None), _is_text(int)
+    (True, True, False)
+    """
+    return annotation is str or str in typing.get_args(annotation)
+
+
+def query_value(raw: str, text: bool) -> Any:
+    """
+    A query string value: verbatim if `text`, else parsed as JSON when
+    it is valid JSON.
+
+    >>> query_value("3", False), query_value("3", True), query_value("bob", False)
+    (3, '3', 'bob')
+    >>> query_value("[1, 2]", False), query_value("null", False)
+    ([1, 2], None)
+    """
+    if text:
+        return raw
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def query_params(node: NamespaceNode, arguments: dict[str, list[bytes]]) -> dict[str, Any]:
+    """Call params from a request's query arguments; the last of repeated names wins."""
+    text = {arg.name for arg in node.method.args if _is_text(arg.annotation)}
+    text.add(CURSOR_PARAM)
+    return {
+        name: query_value(values[-1].decode("utf-8", "replace"), name in text)
+        for name, values in arguments.items()
+        if values
+    }
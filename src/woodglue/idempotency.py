@@ -0,0 +1,300 @@
+"""
+Idempotency keys for retried JSON-RPC calls.
+
+A client that retries after a timeout cannot tell whether the first
+attempt ran, so side-effecting methods such as `system.fire_trigger` may
+run twice. A call can carry an idempotency key: an `"idempotency_key"`
+member of the request object, or for a non-batch request the
+`Idempotency-Key` header. The first successful response for a
+(token, method, key) is stored in `IdempotencyStore`, and later calls
+with the same key get that response back without running the method.
+A duplicate that arrives while the first call still runs waits for its
+outcome, but no longer than its own deadline. The stored response is
+kept for the configured TTL.
+
+SQLite reads and writes run on a single worker thread, never on the
+IOLoop, and expired responses are purged on a timer.
+
+Error responses are not stored, so a call that failed can be retried.
+Reusing a key with different params is rejected. So is reusing it with a
+different response encoding, because a msgpack or CBOR response may hold
+`bytes` that JSON cannot carry.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from woodglue import codec
+from woodglue.config import IdempotencyConfig
+from woodglue.deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_FIELD = "idempotency_key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_KEY_RE = re.compile(r"[\x21-\x7e]{1,255}")
+
+
+class IdempotencyConflict(Exception):
+    """Raised when a key is reused with different params or response encoding."""
+
+
+def valid_key(value: Any) -> bool:
+    """
+    True for a 1-255 character printable ASCII key without spaces.
+
+    >>> valid_key("retry-7f3a")
+    True
+    >>> valid_key("has space"), valid_key(""), valid_key(42)
+    (False, False, False)
+    """
+    return isinstance(value, str) and _KEY_RE.fullmatch(value) is not None
+
+
+def token_scope(token: str) -> str:
+    """
+    Scope for a bearer token: a short hash, so tokens are never stored.
+
+    >>> token_scope("")
+    ''
+    >>> len(token_scope("secret"))
+    16
+    """
+    return hashlib.sha256(token.encode()).hexdigest()[:16] if token else ""
+
+
+def params_fingerprint(params: Any) -> str:
+    """
+    Hash of the params, independent of object key order.
+
+    >>> params_fingerprint({"a": 1, "b": 2}) == params_fingerprint({"b": 2, "a": 1})
+    True
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+_Entry = tuple[str, str, bytes, float]
+"""(params fingerprint, content type, encoded response, stored at)."""
+
+
+_Ident = tuple[str, str, str]
+"""(scope, method, key)."""
+
+
+def _check(fingerprint: str, content_type: str, call_fingerprint: str, call_type: str) -> None:
+    """Raise `IdempotencyConflict` unless a keyed call matches the stored or first one."""
+    if fingerprint != call_fingerprint:
+        raise IdempotencyConflict("Idempotency key was used with different params")
+    if content_type != call_type:
+        raise IdempotencyConflict("Idempotency key was used with a different response encoding")
+
+
+class IdempotencyStore:
+    """
+    Stored responses by (scope, method, key) in SQLite, with the most
+    recently used `config.memory_entries` also held in memory.
+
+    `run()` does its SQLite I/O on a single worker thread, which the
+    purge timer also uses. Call `close()` to stop the timer and the worker.
+    """
+
+    config: IdempotencyConfig
+    db_path: Path
+
+    def __init__(self, config: IdempotencyConfig, db_path: Path) -> None:
+        self.config = config
+        self.db_path = db_path
+        self.replayed: int = 0
+        self._memory: OrderedDict[_Ident, _Entry] = OrderedDict()
+        self._inflight: dict[_Ident, tuple[str, str, asyncio.Future[Any]]] = {}
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="woodglue-idempotency"
+        )
+        self._purge_timer: asyncio.TimerHandle | None = None
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "  scope TEXT NOT NULL,"
+                "  method TEXT NOT NULL,"
+                "  key TEXT NOT NULL,"
+                "  fingerprint TEXT NOT NULL,"
+                "  content_type TEXT NOT NULL,"
+                "  response BLOB NOT NULL,"
+                "  stored_at REAL NOT NULL,"
+                "  PRIMARY KEY (scope, method, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)")
+            conn.commit()
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at >= self.config.ttl
+
+    def _read(self, ident: _Ident) -> _Entry | None:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            row = conn.execute(
+                "SELECT fingerprint, content_type, response, stored_at FROM responses "
+                "WHERE scope = ? AND method = ? AND key = ?",
+                ident,
+            ).fetchone()
+        return None if row is None else (row[0], row[1], bytes(row[2]), row[3])
+
+    def _write(self, ident: _Ident, entry: _Entry) -> None:
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*ident, *entry),
+                )
+                conn.commit()
+        except sqlite3.Error:
+            logger.exception("Cannot store idempotent response for %s", ident[1])
+
+    def _fresh(self, ident: _Ident, entry: _Entry | None) -> _Entry | None:
+        if entry is None:
+            return None
+        if self._expired(entry[3]):
+            self._memory.pop(ident, None)
+            return None
+        self._remember(ident, entry)
+        return entry
+
+    def _encode(
+        self, fingerprint: str, content_type: str, response: dict[str, Any]
+    ) -> _Entry | None:
+        try:
+            return (fingerprint, content_type, codec.encode(response, content_type), time.time())
+        except (TypeError, ValueError):
+            logger.exception("Cannot encode idempotent response")
+            return None
+
+    def purge(self) -> int:
+        """Delete expired responses from the file; returns how many."""
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                deleted = conn.execute(
+                    "DELETE FROM responses WHERE stored_at < ?", (time.time() - self.config.ttl,)
+                ).rowcount
+                conn.commit()
+        except sqlite3.Error:
+            logger.exception("Cannot purge idempotent responses")
+            return 0
+        return deleted
+
+    def _remember(self, ident: _Ident, entry: _Entry) -> None:
+        if self.config.memory_entries <= 0:
+            return
+        self._memory[ident] = entry
+        self._memory.move_to_end(ident)
+        while len(self._memory) > self.config.memory_entries:
+            self._memory.popitem(last=False)
+
+    async def _lookup(self, ident: _Ident) -> _Entry | None:
+        entry = self._memory.get(ident)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            entry = await loop.run_in_executor(self._executor, self._read, ident)
+        return self._fresh(ident, entry)
+
+    def _store(
+        self, ident: _Ident, fingerprint: str, content_type: str, response: dict[str, Any]
+    ) -> None:
+        entry = self._encode(fingerprint, content_type, response)
+        if entry is None:
+            return
+        self._remember(ident, entry)
+        self._executor.submit(self._write, ident, entry)
+
+    def _schedule_purge(self) -> None:
+        if self._purge_timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def tick() -> None:
+            self._executor.submit(self.purge)
+            self._purge_timer = loop.call_later(self.config.purge_interval, tick)
+
+        self._purge_timer = loop.call_later(self.config.purge_interval, tick)
+
+    async def _wait(self, future: asyncio.Future[Any]) -> Any:
+        """
+        Outcome of the first call, within the waiting call's own deadline.
+        Raises `TimeoutError` when the deadline passes first.
+        """
+        # Shielded: a waiter giving up must not cancel the first call
+        waiter = asyncio.shield(future)
+        deadline = current_deadline.get()
+        if deadline is None:
+            return await waiter
+        return await asyncio.wait_for(waiter, max(0.0, deadline - time.monotonic()))
+
+    async def run(
+        self,
+        scope: str,
+        method: str,
+        key: str,
+        params: Any,
+        content_type: str,
+        call: Callable[[], Awaitable[dict[str, Any] | None]],
+    ) -> tuple[dict[str, Any] | None, bool]:
+        """
+        Response for a keyed call and whether it was replayed. Runs `call`
+        only if no response is stored and no duplicate is in flight.
+        Raises `IdempotencyConflict` if the key was used with other params
+        or another response `content_type`, and `TimeoutError` if `current_deadline` passes while waiting for a
+        duplicate.
+        """
+        self._schedule_purge()
+        ident = (scope, method, key)
+        fingerprint = params_fingerprint(params)
+        inflight = self._inflight.get(ident)
+        if inflight is not None:
+            _check(inflight[0], inflight[1], fingerprint, content_type)
+            response = await self._wait(inflight[2])
+            if response is not None and "result" in response:
+                self.replayed += 1
+                return response, True
+            # The first call failed, so this one is not a duplicate of a success
+            return await self.run(scope, method, key, params, content_type, call)
+
+        # Registered before the first await, so duplicates wait on this call
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._inflight[ident] = (fingerprint, content_type, future)
+        response: dict[str, Any] | None = None
+        try:
+            stored = await self._lookup(ident)
+            if stored is not None:
+                _check(stored[0], stored[1], fingerprint, content_type)
+                response = codec.decode(stored[2], stored[1])
+                self.replayed += 1
+                return response, True
+            response = await call()
+        finally:
+            del self._inflight[ident]
+            future.set_result(response)
+        if response is not None and "result" in response:
+            self._store(ident, fingerprint, content_type, response)
+        return response, False
+
+    def close(self) -> None:
+        """Stop the purge timer and wait for pending writes."""
+        if self._purge_timer is not None:
+            self._purge_timer.cancel()
+            self._purge_timer = None
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,366 @@
+"""
+Asynchronous job mode for long-running RPC methods.
+
+A JSON-RPC request with `"async_job": true` is not awaited by the HTTP
+request. Instead `JobManager.submit()` records a job in the namespace's
+`jobs.db` (under `MountContext.state_dir`), returns its id immediately and
+runs the call in a bounded worker pool: async methods run as tasks, sync
+methods in a thread pool so they do not stall the IOLoop. Status and
+results are read back through `system.job_status` / `system.job_result`.
+
+A job belongs to the bearer token that submitted it: other callers see
+neither its status nor its result and cannot cancel it. Job records are
+read and written on a single worker thread, off the IOLoop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import sqlite3
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from contextvars import ContextVar
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Literal, TypeVar
+
+from lythonic.compose.namespace import NamespaceNode
+from pydantic import BaseModel
+
+from woodglue.config import JobsConfig
+from woodglue.mount import MountContext, current_mount
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+JOBS_DB = "jobs.db"
+
+current_scope: ContextVar[str] = ContextVar("current_scope", default="")
+"""Scope of the bearer token of the call being served (see `token_scope()`)."""
+
+JobStatus = Literal["pending", "running", "succeeded", "failed", "cancelled"]
+
+_FINISHED: tuple[str, ...] = ("succeeded", "failed", "cancelled")
+
+
+class JobInfo(BaseModel):
+    """Job metadata without the result payload."""
+
+    job_id: str
+    method: str
+    status: JobStatus
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+
+
+class JobResult(JobInfo):
+    """Job metadata plus the serialized result (null until succeeded)."""
+
+    result: Any = None
+
+
+class JobQueueFull(Exception):
+    """Raised by `JobManager.submit()` when `max_pending` jobs are in flight."""
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def split_job_id(job_id: str) -> tuple[str, str]:
+    """
+    Split a job id into `(prefix, key)`.
+
+    >>> split_job_id("reports:0f3a")
+    ('reports', '0f3a')
+    """
+    prefix, sep, key = job_id.rpartition(":")
+    if not sep or not prefix or not key:
+        raise ValueError(f"Malformed job id: {job_id!r}")
+    return prefix, key
+
+
+class JobStore:
+    """SQLite-backed job records for one namespace."""
+
+    db_path: Path
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "  job_id TEXT PRIMARY KEY,"
+                "  method TEXT NOT NULL,"
+                "  status TEXT NOT NULL,"
+                "  created_at TEXT NOT NULL,"
+                "  started_at TEXT,"
+                "  finished_at TEXT,"
+                "  result TEXT,"
+                "  error TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "scope" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+            # Jobs left unfinished by a previous process will never complete
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? "
+                "WHERE status IN ('pending', 'running')",
+                (_now(), "Interrupted by server restart"),
+            )
+            conn.commit()
+
+    def _execute(self, sql: str, params: tuple[Any, ...]) -> None:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute(sql, params)
+            conn.commit()
+
+    def create(self, job_id: str, method: str, scope: str = "") -> str:
+        """Record a pending job owned by `scope`; returns its `created_at`."""
+        created_at = _now()
+        self._execute(
+            "INSERT INTO jobs (job_id, method, status, created_at, scope) "
+            "VALUES (?, ?, 'pending', ?, ?)",
+            (job_id, method, created_at, scope),
+        )
+        return created_at
+
+    def mark_running(self, job_id: str) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ?",
+            (_now(), job_id),
+        )
+
+    def finish(
+        self, job_id: str, status: JobStatus, result: str | None = None, error: str | None = None
+    ) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE job_id = ?",
+            (status, _now(), result, error, job_id),
+        )
+
+    def get(self, job_id: str, scope: str = "") -> JobResult | None:
+        """The job, if it exists and belongs to `scope`."""
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            row = conn.execute(
+                "SELECT job_id, method, status, created_at, started_at, finished_at, result, error "
+                "FROM jobs WHERE job_id = ? AND scope = ?",
+                (job_id, scope),
+            ).fetchone()
+        if row is None:
+            return None
+        return JobResult(
+            job_id=row[0],
+            method=row[1],
+            status=row[2],
+            created_at=row[3],
+            started_at=row[4],
+            finished_at=row[5],
+            result=json.loads(row[6]) if row[6] is not None else None,
+            error=row[7],
+        )
+
+    def purge_expired(self, ttl: float) -> int:
+        """Delete finished jobs older than `ttl` seconds. Returns the count removed."""
+        cutoff = (datetime.now(UTC) - timedelta(seconds=ttl)).isoformat()
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cur = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(_FINISHED))}) "
+                "AND finished_at < ?",
+                (*_FINISHED, cutoff),
+            )
+            conn.commit()
+            return cur.rowcount
+
+
+class JobManager:
+    """
+    Runs submitted calls in a bounded worker pool and tracks them in
+    per-namespace `JobStore`s, which are only touched from one worker
+    thread. Expired jobs are purged every `config.purge_interval` seconds.
+    """
+
+    config: JobsConfig
+
+    def __init__(self, config: JobsConfig, mounts: dict[str, MountContext]) -> None:
+        self.config = config
+        self._mounts: dict[str, MountContext] = mounts
+        self._stores: dict[str, JobStore] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._scopes: dict[str, str] = {}
+        self._submitting: int = 0
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(config.max_workers)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=config.max_workers, thread_name_prefix="woodglue-job"
+        )
+        self._db: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="woodglue-jobs-db"
+        )
+        self._purge_timer: asyncio.TimerHandle | None = None
+
+    def _store(self, prefix: str) -> JobStore:
+        # Runs on the `_db` thread, like every other store access
+        store = self._stores.get(prefix)
+        if store is None:
+            store = self._stores[prefix] = JobStore(self._mounts[prefix].state_path(JOBS_DB))
+        return store
+
+    async def _io(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._db, fn, *args)
+
+    def purge(self) -> int:
+        """Delete expired jobs from every opened store; returns how many."""
+        deleted = 0
+        for store in list(self._stores.values()):
+            try:
+                deleted += store.purge_expired(self.config.result_ttl)
+            except sqlite3.Error:
+                logger.exception("Cannot purge expired jobs from %s", store.db_path)
+        return deleted
+
+    def _schedule_purge(self) -> None:
+        if self._purge_timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def tick() -> None:
+            self._db.submit(self.purge)
+            self._purge_timer = loop.call_later(self.config.purge_interval, tick)
+
+        self._purge_timer = loop.call_later(self.config.purge_interval, tick)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks) + self._submitting
+
+    async def submit(
+        self,
+        prefix: str,
+        method: str,
+        node: NamespaceNode,
+        kwargs: dict[str, Any],
+        serialize: Callable[[Any], Any],
+        scope: str = "",
+    ) -> JobInfo:
+        """
+        Record a new job owned by `scope` and schedule it. `serialize`
+        turns the method's return value into JSON-compatible data for
+        storage.
+
+        Raises `JobQueueFull` when `max_pending` jobs are already in flight.
+        """
+        if self.in_flight >= self.config.max_pending:
+            raise JobQueueFull(f"Too many pending jobs ({self.config.max_pending})")
+        if prefix not in self._mounts:
+            raise ValueError(f"Namespace '{prefix}' has no mount for job state")
+        job_id = f"{prefix}:{uuid.uuid4().hex}"
+        self._submitting += 1
+        try:
+            store = await self._io(self._store, prefix)
+            created_at = await self._io(store.create, job_id, method, scope)
+        finally:
+            self._submitting -= 1
+        self._schedule_purge()
+        self._scopes[job_id] = scope
+        self._tasks[job_id] = asyncio.ensure_future(
+            self._run(store, job_id, self._mounts[prefix], node, kwargs, serialize)
+        )
+        return JobInfo(
+            job_id=job_id,
+            method=method,
+            status="pending",
+            created_at=datetime.fromisoformat(created_at),
+        )
+
+    async def _run(
+        self,
+        store: JobStore,
+        job_id: str,
+        mount: MountContext,
+        node: NamespaceNode,
+        kwargs: dict[str, Any],
+        serialize: Callable[[Any], Any],
+    ) -> None:
+        current_mount.set(mount)
+        try:
+            async with self._slots:
+                await self._io(store.mark_running, job_id)
+                if inspect.iscoroutinefunction(node.method.o):
+                    result = node(**kwargs)
+                else:
+                    ctx = contextvars.copy_context()
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, ctx.run, functools.partial(node, **kwargs)
+                    )
+                if inspect.isawaitable(result):
+                    result = await result
+            await self._io(store.finish, job_id, "succeeded", json.dumps(serialize(result)))
+        except asyncio.CancelledError:
+            await self._io(store.finish, job_id, "cancelled", None, "Cancelled")
+            raise
+        except Exception:
+            logger.exception("Job %s failed", job_id)
+            await self._io(store.finish, job_id, "failed", None, "Internal error")
+        finally:
+            self._tasks.pop(job_id, None)
+            self._scopes.pop(job_id, None)
+
+    def _expired(self, job: JobResult) -> bool:
+        if job.finished_at is None:
+            return False
+        return datetime.now(UTC) - job.finished_at > timedelta(seconds=self.config.result_ttl)
+
+    async def result(self, job_id: str, scope: str = "") -> JobResult | None:
+        """
+        Full job record including the result, or `None` if unknown,
+        expired or owned by another scope.
+        """
+        prefix, _ = split_job_id(job_id)
+        if prefix not in self._mounts:
+            return None
+        store = await self._io(self._store, prefix)
+        found = await self._io(store.get, job_id, scope)
+        if found is None or self._expired(found):
+            return None
+        return found
+
+    async def status(self, job_id: str, scope: str = "") -> JobInfo | None:
+        """Job record without the result payload."""
+        found = await self.result(job_id, scope)
+        if found is None:
+            return None
+        return JobInfo.model_validate(found.model_dump(exclude={"result"}))
+
+    async def cancel(self, job_id: str, scope: str = "") -> bool:
+        """
+        Cancel an in-flight job of `scope` and wait until it is recorded as
+        cancelled. Returns `False` if no such job is in flight. A sync method
+        already running in the thread pool is abandoned, not interrupted: it
+        runs to completion and its result is discarded.
+        """
+        task = self._tasks.get(job_id)
+        if task is None or task.done() or self._scopes.get(job_id) != scope:
+            return False
+        task.cancel()
+        await asyncio.wait([task])
+        return True
+
+    def shutdown(self) -> None:
+        """Cancel in-flight jobs and stop the purge timer and thread pools."""
+        for task in self._tasks.values():
+            task.cancel()
+        if self._purge_timer is not None:
+            self._purge_timer.cancel()
+            self._purge_timer = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._db.shutdown(wait=True)
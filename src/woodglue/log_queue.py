@@ -0,0 +1,206 @@
+"""
+Queued logging for the server process.
+
+`LogConfig.setup_logging()` attaches a `FileHandler` to the root logger,
+so every log write (including `logger.exception` on the RPC error path)
+waits on the disk on the IOLoop thread. `LogQueue` moves the handlers of
+the root logger and of every other configured logger (`tornado.access`,
+non-propagating loggers) behind a bounded queue drained by a single
+writer thread. The logging thread only formats the message and enqueues
+it. When the queue is full the record is dropped and counted. The writer
+reports the count in the log once it catches up, and `system.log_stats`
+returns it too.
+
+Each handler is replaced by its own `DroppingQueueHandler`, which takes
+over the handler's level and filters: filters like `RequestLogFilter`
+read context vars that only the logging thread has, and a filter that
+rejects a record for one handler must not hide it from the others.
+"""
+
+from __future__ import annotations
+
+import logging
+import logging.handlers
+from collections.abc import Sequence
+from queue import Full, Queue
+from typing import Any
+
+from pydantic import BaseModel
+from typing_extensions import override
+
+from woodglue.config import LogQueueConfig
+
+logger = logging.getLogger(__name__)
+
+
+class LogQueueStats(BaseModel):
+    """Counters of the log writer thread."""
+
+    running: bool
+    queued: int
+    max_queue: int
+    written: int
+    dropped: int
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Stands in for `target` on the logging thread: queues records for the
+    writer, and drops and counts them instead of blocking on a full queue.
+    """
+
+    def __init__(self, queue: Queue[Any], target: logging.Handler) -> None:
+        super().__init__(queue)
+        self.setLevel(target.level)
+        self.target: logging.Handler = target
+        self.dropped: int = 0
+
+    @override
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under the handler lock, so the counter needs no lock of its own
+        try:
+            self.queue.put_nowait((self, record))
+        except Full:
+            self.dropped += 1
+
+
+class _Writer(logging.handlers.QueueListener):
+    def __init__(
+        self,
+        queue: Queue[Any],
+        fronts: list[DroppingQueueHandler],
+        report_to: list[DroppingQueueHandler],
+    ) -> None:
+        super().__init__(queue)
+        self.bounded: Queue[Any] = queue
+        self.fronts: list[DroppingQueueHandler] = fronts
+        self.report_to: list[DroppingQueueHandler] = report_to
+        self.written: int = 0
+        self.reported: int = 0
+
+    def dropped(self) -> int:
+        return sum(front.dropped for front in self.fronts)
+
+    @override
+    def handle(self, record: Any) -> None:
+        self.report_drops()
+        front, queued = record
+        front.target.handle(queued)
+        self.written += 1
+
+    @override
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail when stopping with a full queue
+        self.bounded.put(self._sentinel)  # pyright: ignore[reportAttributeAccessIssue]
+
+    def report_drops(self) -> None:
+        dropped = self.dropped()
+        if dropped == self.reported:
+            return
+        count = dropped - self.reported
+        self.reported = dropped
+        for front in self.report_to:
+            record = logger.makeRecord(
+                logger.name,
+                logging.WARNING,
+                __file__,
+                0,
+                "Log queue full, dropped %d records",
+                (count,),
+                None,
+            )
+            # Gives the record the attributes the handler's format expects
+            if front.filter(record) and record.levelno >= front.target.level:
+                front.target.handle(record)
+
+
+class LogQueue:
+    """
+    Runs the handlers of `loggers` on a writer thread; by default, of the
+    root logger and every other logger that has handlers when `start()`
+    runs. `start()` swaps each handler for a `DroppingQueueHandler`;
+    `stop()` writes out what is queued and puts them back.
+    """
+
+    config: LogQueueConfig
+
+    def __init__(
+        self, config: LogQueueConfig, loggers: Sequence[logging.Logger] | None = None
+    ) -> None:
+        self.config = config
+        self.loggers: list[logging.Logger] | None = list(loggers) if loggers is not None else None
+        self.queue: Queue[Any] = Queue(config.max_queue)
+        self.fronts: dict[logging.Handler, DroppingQueueHandler] = {}
+        self._moved: list[tuple[logging.Logger, logging.Handler]] = []
+        self._writer: _Writer | None = None
+        self._dropped: int = 0
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None
+
+    def _targets(self) -> list[logging.Logger]:
+        if self.loggers is not None:
+            return self.loggers
+        named = logging.Logger.manager.loggerDict.values()
+        return [logging.getLogger(), *(lg for lg in named if isinstance(lg, logging.Logger))]
+
+    def _report_to(self) -> list[DroppingQueueHandler]:
+        """Where drops are reported: wherever this module's own records would go."""
+        fronts: list[DroppingQueueHandler] = []
+        log: logging.Logger | None = logger
+        while log is not None:
+            fronts += [h for h in log.handlers if isinstance(h, DroppingQueueHandler)]
+            log = log.parent if log.propagate else None
+        return fronts or list(self.fronts.values())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        for log in self._targets():
+            handlers = list(log.handlers)
+            for handler in handlers:
+                log.removeHandler(handler)
+            for handler in handlers:
+                # A handler shared between loggers gets one stand-in
+                front = self.fronts.get(handler)
+                if front is None:
+                    front = self.fronts[handler] = DroppingQueueHandler(self.queue, handler)
+                    for f in list(handler.filters):
+                        handler.removeFilter(f)
+                        front.addFilter(f)
+                log.addHandler(front)
+                self._moved.append((log, handler))
+        fronts = list(self.fronts.values())
+        self._writer = _Writer(self.queue, fronts, self._report_to())
+        self._writer.start()
+
+    def stop(self) -> None:
+        """Flush queued records and restore the original handlers."""
+        writer = self._writer
+        if writer is None:
+            return
+        for log, handler in self._moved:
+            log.removeHandler(self.fronts[handler])
+        writer.stop()
+        writer.report_drops()
+        for handler, front in self.fronts.items():
+            for f in list(front.filters):
+                front.removeFilter(f)
+                handler.addFilter(f)
+        for log, handler in self._moved:
+            log.addHandler(handler)
+        self._dropped += writer.dropped()
+        self.fronts = {}
+        self._moved = []
+        self._writer = None
+
+    def stats(self) -> LogQueueStats:
+        writer = self._writer
+        return LogQueueStats(
+            running=writer is not None,
+            queued=self.queue.qsize(),
+            max_queue=self.config.max_queue,
+            written=writer.written if writer is not None else 0,
+            dropped=self._dropped + (writer.dropped() if writer is not None else 0),
+        )
@@ -0,0 +1,155 @@
+"""
+Event-loop lag monitor.
+
+Sync methods, SQLite token checks and docs generation all run on the
+IOLoop thread, so a slow call stalls every other request. `LoopMonitor`
+schedules a callback every `interval` seconds and records how late it
+fires (the loop lag). A watchdog thread notices stalls while they are
+still happening and logs the stack of whatever is blocking the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from pydantic import BaseModel
+
+from woodglue.config import LoopMonitorConfig
+
+logger = logging.getLogger(__name__)
+
+
+class LoopStats(BaseModel):
+    """Snapshot of loop lag measurements, in seconds."""
+
+    running: bool
+    lag: float
+    max_lag: float
+    mean_lag: float
+    samples: int
+    stalls: int
+    shed: int
+    overloaded: bool
+
+
+class LoopMonitor:
+    """
+    Samples event-loop lag and decides when to shed load.
+
+    `start()` must be called from the loop thread once the loop is
+    running; `stop()` cancels the sampler and joins the watchdog.
+    """
+
+    config: LoopMonitorConfig
+    lag: float
+    max_lag: float
+    samples: int
+    stalls: int
+    shed: int
+
+    def __init__(self, config: LoopMonitorConfig) -> None:
+        self.config = config
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self.stalls = 0
+        self.shed = 0
+        self._total_lag: float = 0.0
+        self._expected: float = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+        self._loop_thread_id: int | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop: threading.Event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._handle is not None
+
+    def start(self) -> None:
+        """Begin sampling on the running loop and start the stall watchdog."""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._schedule(loop)
+        self._watchdog = threading.Thread(
+            target=self._watch, name="woodglue-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        """Stop sampling and the watchdog thread."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._expected = time.monotonic() + self.config.interval
+        self._handle = loop.call_later(self.config.interval, self._sample, loop)
+
+    def _sample(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.record(max(0.0, time.monotonic() - self._expected))
+        self._schedule(loop)
+
+    def record(self, lag: float) -> None:
+        """Record one lag measurement."""
+        self.lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._total_lag += lag
+        self.samples += 1
+
+    def current_lag(self) -> float:
+        """
+        Lag as of now: the last sample, or how overdue the next sample is
+        if the loop is stalled right now.
+        """
+        if not self.running:
+            return self.lag
+        return max(self.lag, time.monotonic() - self._expected)
+
+    @property
+    def overloaded(self) -> bool:
+        shed_lag = self.config.shed_lag
+        return shed_lag is not None and self.current_lag() > shed_lag
+
+    def should_shed(self, tags: frozenset[str]) -> bool:
+        """True if a call with these tags should be rejected right now."""
+        if not self.overloaded or tags.isdisjoint(self.config.shed_tags):
+            return False
+        self.shed += 1
+        return True
+
+    def _watch(self) -> None:
+        reported_for: float | None = None
+        while not self._stop.wait(self.config.interval):
+            expected = self._expected
+            overdue = time.monotonic() - expected
+            if overdue < self.config.stall_threshold or reported_for == expected:
+                continue
+            reported_for = expected
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id or 0)  # pyright: ignore[reportPrivateUsage]
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(unknown)"
+            logger.warning("Event loop blocked for %.3fs, loop thread stack:\n%s", overdue, stack)
+
+    def stats(self) -> LoopStats:
+        return LoopStats(
+            running=self.running,
+            lag=self.current_lag(),
+            max_lag=self.max_lag,
+            mean_lag=self._total_lag / self.samples if self.samples else 0.0,
+            samples=self.samples,
+            stalls=self.stalls,
+            shed=self.shed,
+            overloaded=self.overloaded,
+        )
@@ -0,0 +1,192 @@
+"""
+Sampled, per-method allocation profiling.
+
+`MemoryProfiler` runs `tracemalloc` while enabled and measures a sample
+of RPC calls in two phases: the method call itself (`call`) and turning
+its result into a JSON-RPC payload (`serialize`). For each phase it
+records the peak bytes allocated above the starting point and the bytes
+still held when the phase ends (retained), aggregated per method and
+reported by `system.memory_profile`.
+
+tracemalloc counters are process-wide, so an async method that yields
+to other calls is charged for whatever they allocate meanwhile, and
+overlapping sampled calls reset each other's peak. Keep `sample_rate`
+low on busy servers; sync methods are measured exactly.
+"""
+
+from __future__ import annotations
+
+import random
+import tracemalloc
+from collections.abc import Generator
+from contextlib import contextmanager
+
+from pydantic import BaseModel
+
+from woodglue.config import MemoryProfileConfig
+
+CALL = "call"
+SERIALIZE = "serialize"
+
+
+class PhaseStats(BaseModel):
+    """Allocation aggregates of one phase over the sampled calls, in bytes."""
+
+    max_peak: int
+    mean_peak: float
+    max_retained: int
+    mean_retained: float
+    total_retained: int
+
+
+class MethodMemoryStats(BaseModel):
+    method: str
+    samples: int
+    call: PhaseStats
+    serialize: PhaseStats
+
+
+class AllocationSite(BaseModel):
+    """Source line holding traced memory right now."""
+
+    location: str
+    size: int
+    count: int
+
+
+class MemoryProfileStats(BaseModel):
+    """`system.memory_profile` result; methods sorted by peak call allocation."""
+
+    enabled: bool
+    sample_rate: float
+    samples: int
+    traced_current: int
+    traced_peak: int
+    tracemalloc_overhead: int
+    methods: list[MethodMemoryStats]
+    top_sites: list[AllocationSite] = []
+
+
+class _Phase:
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.max_peak: int = 0
+        self.total_peak: int = 0
+        self.max_retained: int = 0
+        self.total_retained: int = 0
+
+    def add(self, peak: int, retained: int) -> None:
+        self.count += 1
+        self.max_peak = max(self.max_peak, peak)
+        self.total_peak += peak
+        self.max_retained = max(self.max_retained, retained)
+        self.total_retained += retained
+
+    def stats(self) -> PhaseStats:
+        n = self.count or 1
+        return PhaseStats(
+            max_peak=self.max_peak,
+            mean_peak=self.total_peak / n,
+            max_retained=self.max_retained,
+            mean_retained=self.total_retained / n,
+            total_retained=self.total_retained,
+        )
+
+
+class MemoryProfiler:
+    """
+    Per-method allocation aggregates for a sample of calls.
+
+    `enable()` starts tracemalloc (unless something else already did) and
+    `disable()` stops it again; both are safe to call at any time.
+    """
+
+    config: MemoryProfileConfig
+
+    def __init__(self, config: MemoryProfileConfig, rng: random.Random | None = None) -> None:
+        self.config = config
+        self._rng: random.Random = rng or random.Random()
+        self._enabled: bool = False
+        self._started_tracing: bool = False
+        self._methods: dict[str, dict[str, _Phase]] = {}
+        if config.enabled:
+            self.enable()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(self, sample_rate: float | None = None) -> None:
+        if sample_rate is not None:
+            self.config = self.config.model_copy(update={"sample_rate": sample_rate})
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.config.frames)
+            self._started_tracing = True
+        self._enabled = True
+
+    def disable(self) -> None:
+        self._enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self) -> None:
+        """Drop the aggregates collected so far."""
+        self._methods.clear()
+
+    def sampled(self) -> bool:
+        """Decide whether to measure the next call."""
+        if not self._enabled:
+            return False
+        rate = self.config.sample_rate
+        return rate >= 1.0 or self._rng.random() < rate
+
+    @contextmanager
+    def measure(self, method: str, phase: str) -> Generator[None]:
+        """Charge allocations made inside the block to `method`'s `phase`."""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                phases = self._methods.setdefault(method, {CALL: _Phase(), SERIALIZE: _Phase()})
+                phases[phase].add(max(0, peak - before), current - before)
+
+    def stats(self, top: int = 0) -> MemoryProfileStats:
+        """Aggregates per method; `top > 0` adds the largest current allocation sites."""
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        methods = [
+            MethodMemoryStats(
+                method=name,
+                samples=phases[CALL].count,
+                call=phases[CALL].stats(),
+                serialize=phases[SERIALIZE].stats(),
+            )
+            for name, phases in self._methods.items()
+        ]
+        methods.sort(key=lambda m: m.call.max_peak, reverse=True)
+        top_sites: list[AllocationSite] = []
+        if top > 0 and tracing:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            top_sites = [
+                AllocationSite(location=str(stat.traceback), size=stat.size, count=stat.count)
+                for stat in snapshot.statistics("lineno")[:top]
+            ]
+        return MemoryProfileStats(
+            enabled=self._enabled,
+            sample_rate=self.config.sample_rate,
+            samples=sum(m.samples for m in methods),
+            traced_current=current,
+            traced_peak=peak,
+            tracemalloc_overhead=tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            methods=methods,
+            top_sites=top_sites,
+        )
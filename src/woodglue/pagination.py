@@ -0,0 +1,167 @@
+"""
+Cursor pagination for list-returning methods.
+
+Methods opt in with the `paginated` tag. For them the dispatcher accepts
+`limit` (capped at `PaginationConfig.max_limit`) and `cursor` params and
+replies with a `Page`: the items plus an opaque `next_cursor`, which is
+`null` on the last page. A method pages itself in one of two ways:
+
+- If it does not declare `cursor`, it returns a list or any iterable.
+  The dispatcher slices one page out of the iterable, consuming it only
+  up to the end of that page; the cursor encodes the offset. A `limit`
+  the method declares receives the number of items the dispatcher needs
+  to read: everything up to the end of the page, plus one.
+- If it declares a `cursor` param, it receives `limit` and `cursor`
+  and returns a `Page` itself. This suits keyset paging over a database.
+  `encode_cursor()` / `decode_cursor()` make its state opaque.
+
+The OpenAPI spec marks paginated operations with `x-paginated`, and
+`WoodglueClient.pages()` follows `next_cursor` as an async iterator.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import collections.abc
+import itertools
+import json
+import typing
+from collections.abc import Callable, Iterable
+from typing import Any, Generic, TypeVar
+
+from lythonic.compose.namespace import NamespaceNode
+from pydantic import BaseModel
+
+from woodglue.config import PaginationConfig
+
+T = TypeVar("T")
+
+PAGINATED_TAG = "paginated"
+LIMIT_PARAM = "limit"
+CURSOR_PARAM = "cursor"
+
+
+class Page(BaseModel, Generic[T]):
+    """One page of a paginated result; pass `next_cursor` back for the next."""
+
+    items: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(state: dict[str, Any]) -> str:
+    """
+    Opaque, URL-safe cursor for a JSON-serializable paging state.
+
+    >>> encode_cursor({"offset": 20})
+    'eyJvZmZzZXQiOjIwfQ'
+    """
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Paging state from `encode_cursor()`. Raises `ValueError` if malformed.
+
+    >>> decode_cursor("eyJvZmZzZXQiOjIwfQ")
+    {'offset': 20}
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return typing.cast(dict[str, Any], state)
+
+
+def paginate(items: Iterable[T], limit: int, cursor: str | None = None) -> Page[T]:
+    """
+    Page of `items` after the offset in `cursor`, reading one item past
+    the page to know whether another page follows.
+
+    >>> page = paginate(range(5), 2)
+    >>> page.items, decode_cursor(page.next_cursor or "")
+    ([0, 1], {'offset': 2})
+    >>> last = paginate(range(5), 2, encode_cursor({"offset": 4}))
+    >>> last.items, last.next_cursor
+    ([4], None)
+    """
+    return _slice(items, _offset(cursor), limit)
+
+
+def _offset(cursor: str | None) -> int:
+    offset = decode_cursor(cursor).get("offset", 0) if cursor else 0
+    if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def _slice(items: Iterable[T], offset: int, limit: int) -> Page[T]:
+    window = list(itertools.islice(items, offset, offset + limit + 1))
+    next_cursor = encode_cursor({"offset": offset + limit}) if len(window) > limit else None
+    return Page(items=window[:limit], next_cursor=next_cursor)
+
+
+def page_limit(value: Any, config: PaginationConfig) -> int:
+    """
+    Requested page size, defaulted and capped. Raises `ValueError` for
+    a non-positive or non-integer `limit`.
+
+    >>> page_limit(None, PaginationConfig()), page_limit(10**6, PaginationConfig())
+    (100, 1000)
+    """
+    if value is None:
+        return config.default_limit
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(value, config.max_limit)
+
+
+def page_params(
+    node: NamespaceNode, kwargs: dict[str, Any], config: PaginationConfig
+) -> Callable[[Any], Any] | None:
+    """
+    Resolve `limit` and `cursor` in the call's `kwargs`. A method that
+    declares `cursor` pages itself and gets both (`limit` defaulted and
+    capped). Otherwise `cursor` is removed, a declared `limit` is set to
+    the items needed up to the end of the page plus one, and the returned
+    function slices the page out of the method's result, which starts at
+    offset 0. Raises `ValueError` for a bad limit or cursor.
+    """
+    limit = page_limit(kwargs.get(LIMIT_PARAM), config)
+    cursor = kwargs.get(CURSOR_PARAM)
+    if cursor is not None and not isinstance(cursor, str):
+        raise ValueError("cursor must be a string")
+    declared = {arg.name for arg in node.method.args}
+    if CURSOR_PARAM in declared:
+        if LIMIT_PARAM in declared:
+            kwargs[LIMIT_PARAM] = limit
+        return None
+    kwargs.pop(CURSOR_PARAM, None)
+    offset = _offset(cursor)
+    if LIMIT_PARAM in declared:
+        kwargs[LIMIT_PARAM] = offset + limit + 1
+    else:
+        kwargs.pop(LIMIT_PARAM, None)
+    return lambda items: _slice(items, offset, limit)
+
+
+def page_item_type(annotation: Any) -> Any:
+    """
+    Item type of a paginated method's declared return annotation.
+
+    >>> page_item_type(list[int]), page_item_type(Page[str])
+    (<class 'int'>, <class 'str'>)
+    """
+    if isinstance(annotation, type) and issubclass(annotation, Page):
+        metadata = annotation.__pydantic_generic_metadata__
+        return metadata["args"][0] if metadata["args"] else Any
+    origin = typing.get_origin(annotation)
+    if isinstance(origin, type) and issubclass(origin, collections.abc.Iterable):
+        args = typing.get_args(annotation)
+        if args:
+            return args[0]
+    return Any
@@ -0,0 +1,146 @@
+"""
+Replay captured traffic against a server for `wgl replay`.
+
+`run_replay()` sends the calls of a capture file (see `woodglue.capture`)
+through a `WoodglueClient`: at their original pace (`speed=1`), `speed`
+times faster, or as fast as `concurrency` allows (`speed=None`). Paced
+replays measure latency from each call's scheduled time, so queueing is
+counted. The result holds a latency distribution per method next to the
+durations seen when the traffic was captured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterable
+
+from pydantic import BaseModel, Field
+
+from woodglue.bench import LatencyHistogram, LatencySummary, error_kind
+from woodglue.capture import CaptureRecord
+from woodglue.client import WoodglueClient
+
+
+class ReplayConfig(BaseModel):
+    speed: float | None = Field(default=1.0, gt=0)
+    """Pace multiplier over the captured timing; `None` replays unpaced."""
+
+    concurrency: int = Field(default=50, ge=1)
+    """Cap on calls in flight."""
+
+
+class MethodReplayStats(BaseModel):
+    requests: int
+    errors: int
+    latency: LatencySummary
+    """Replayed successful calls, in milliseconds."""
+    captured: LatencySummary
+    """Server-side durations recorded at capture time, in milliseconds."""
+
+
+class ReplayResult(BaseModel):
+    url: str
+    config: ReplayConfig
+    elapsed: float
+    requests: int
+    errors: int
+    throughput: float
+    methods: dict[str, MethodReplayStats]
+    error_kinds: dict[str, int]
+
+
+class _MethodStats:
+    def __init__(self) -> None:
+        self.latency: LatencyHistogram = LatencyHistogram()
+        self.captured: LatencyHistogram = LatencyHistogram()
+        self.requests: int = 0
+        self.errors: int = 0
+
+
+async def run_replay(
+    client: WoodglueClient, records: Iterable[CaptureRecord], config: ReplayConfig
+) -> ReplayResult:
+    """Replay `records` (in capture order) through `client`."""
+    records = sorted(records, key=lambda r: r.t)
+    stats: dict[str, _MethodStats] = {}
+    error_kinds: dict[str, int] = {}
+    slots = asyncio.Semaphore(config.concurrency)
+
+    async def replay(record: CaptureRecord, scheduled: float) -> None:
+        method = stats.setdefault(record.method, _MethodStats())
+        method.captured.record(record.duration)
+        async with slots:
+            # Capture stores positional params by name when the method is known
+            params = record.params if isinstance(record.params, dict) else {}
+            try:
+                await client.call_params(record.method, params)
+            except Exception as exc:
+                kind = error_kind(exc)
+                error_kinds[kind] = error_kinds.get(kind, 0) + 1
+                method.errors += 1
+            else:
+                method.latency.record(time.monotonic() - scheduled)
+            finally:
+                method.requests += 1
+
+    started = time.monotonic()
+    if config.speed is None:
+        pending = iter(records)
+
+        async def worker() -> None:
+            for record in pending:
+                await replay(record, time.monotonic())
+
+        await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+    else:
+        tasks: list[asyncio.Task[None]] = []
+        first = records[0].t if records else 0.0
+        for record in records:
+            scheduled = started + (record.t - first) / config.speed
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(replay(record, scheduled)))
+        if tasks:
+            await asyncio.wait(tasks)
+    elapsed = time.monotonic() - started
+    requests = sum(s.requests for s in stats.values())
+    return ReplayResult(
+        url=client.base_url,
+        config=config,
+        elapsed=elapsed,
+        requests=requests,
+        errors=sum(s.errors for s in stats.values()),
+        throughput=requests / elapsed if elapsed > 0 else 0.0,
+        methods={
+            name: MethodReplayStats(
+                requests=s.requests,
+                errors=s.errors,
+                latency=s.latency.summary(),
+                captured=s.captured.summary(),
+            )
+            for name, s in sorted(stats.items())
+        },
+        error_kinds=dict(sorted(error_kinds.items())),
+    )
+
+
+def format_replay(result: ReplayResult) -> str:
+    """Human-readable per-method summary of a replay."""
+    speed = "unpaced" if result.config.speed is None else f"{result.config.speed:g}x"
+    lines = [
+        f"{result.url}  replay {speed}, max {result.config.concurrency} in flight",
+        f"  {result.requests} calls in {result.elapsed:.1f}s "
+        f"({result.throughput:.1f}/s, {result.errors} errors)",
+        f"  {'method':<40} {'calls':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} "
+        f"{'max ms':>9} {'captured p50':>13}",
+    ]
+    for name, s in result.methods.items():
+        lines.append(
+            f"  {name:<40} {s.requests:>7} {s.errors:>7} {s.latency.p50:>9.2f} "
+            f"{s.latency.p99:>9.2f} {s.latency.max:>9.2f} {s.captured.p50:>13.2f}"
+        )
+    for kind, count in result.error_kinds.items():
+        lines.append(f"  error {kind}: {count}")
+    return "\n".join(lines)
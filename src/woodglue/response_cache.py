@@ -0,0 +1,180 @@
+"""
+Cache hints for cached methods and the client-side response cache.
+
+Methods registered with `NsCacheConfig` are cached server-side with
+`min_ttl` / `max_ttl` (in days). The server advertises them per method as
+`x-cache` in the OpenAPI spec and as `Cache-Control: max-age=...,
+stale-while-revalidate=...` on `/rpc` responses. `ResponseCache` is the
+optional in-memory LRU that `WoodglueClient` fills from those hints: fresh
+entries are served locally, stale ones are served while a refresh runs.
+Entries are keyed by server and caller identity as well as the call, so one
+cache can be shared between clients.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from lythonic.compose.cached import DAYS_TO_SECONDS
+from lythonic.compose.namespace import NamespaceNode, NsCacheConfig
+from pydantic import BaseModel
+
+
+class CacheHint(BaseModel):
+    """How long a method's result may be reused, in seconds."""
+
+    max_age: float
+    stale_while_revalidate: float = 0.0
+
+    def header(self, public: bool = False) -> str:
+        """
+        Render as a `Cache-Control` value; `public` lets shared caches store it.
+
+        >>> CacheHint(max_age=60, stale_while_revalidate=30.5).header()
+        'private, max-age=60, stale-while-revalidate=30'
+        >>> CacheHint(max_age=60).header(public=True)
+        'public, max-age=60, stale-while-revalidate=0'
+        """
+        return (
+            f"{'public' if public else 'private'}, max-age={int(self.max_age)}, "
+            f"stale-while-revalidate={int(self.stale_while_revalidate)}"
+        )
+
+
+def cache_hint(node: NamespaceNode) -> CacheHint | None:
+    """Cache hint for a method registered with `NsCacheConfig`, else `None`."""
+    config = node.config
+    if not isinstance(config, NsCacheConfig):
+        return None
+    min_ttl, max_ttl = config.min_ttl, config.max_ttl
+    # TTLs are configured in days; round off float noise from the conversion
+    return CacheHint(
+        max_age=round(min_ttl * DAYS_TO_SECONDS, 3),
+        stale_while_revalidate=round(max(0.0, max_ttl - min_ttl) * DAYS_TO_SECONDS, 3),
+    )
+
+
+def parse_cache_control(value: str | None) -> CacheHint | None:
+    """
+    Read `max-age` / `stale-while-revalidate` from a `Cache-Control` value.
+    Returns `None` without a positive `max-age` or with `no-store`.
+
+    >>> parse_cache_control("private, max-age=60, stale-while-revalidate=30")
+    CacheHint(max_age=60.0, stale_while_revalidate=30.0)
+    >>> parse_cache_control("no-store") is None
+    True
+    """
+    if not value:
+        return None
+    directives: dict[str, str] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"')
+    if "no-store" in directives:
+        return None
+    try:
+        max_age = float(directives.get("max-age", "0"))
+        swr = float(directives.get("stale-while-revalidate", "0"))
+    except ValueError:
+        return None
+    if max_age <= 0:
+        return None
+    return CacheHint(max_age=max_age, stale_while_revalidate=max(0.0, swr))
+
+
+def cache_key(method: str, params: dict[str, Any], server: str = "", identity: str = "") -> str:
+    """
+    Key for a call: the `server` it goes to, the caller's `identity` (e.g.
+    `token_scope()` of its bearer token), the method and canonical (sorted,
+    compact) JSON params.
+
+    >>> cache_key("m.f", {"b": 1, "a": [2]}) == cache_key("m.f", {"a": [2], "b": 1})
+    True
+    >>> cache_key("m.f", {}, "http://a") == cache_key("m.f", {}, "http://b")
+    False
+    >>> cache_key("m.f", {}, "http://a", "u1") == cache_key("m.f", {}, "http://a", "u2")
+    False
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{server}\x00{identity}\x00{method}\x00{canonical}"
+
+
+class ResponseCacheStats(BaseModel):
+    entries: int
+    hits: int
+    stale_hits: int
+    misses: int
+    evictions: int
+
+
+class _Entry:
+    __slots__: tuple[str, ...] = ("result", "stored_at", "hint")
+
+    def __init__(self, result: Any, stored_at: float, hint: CacheHint) -> None:
+        self.result: Any = result
+        self.stored_at: float = stored_at
+        self.hint: CacheHint = hint
+
+
+class ResponseCache:
+    """
+    In-memory LRU of raw call results keyed by `cache_key()`.
+
+    `get()` returns `(result, stale)`: fresh within `max_age`, stale for a
+    further `stale_while_revalidate` seconds, then the entry is dropped.
+    Results are copied in and out, so callers may mutate what they get.
+    """
+
+    max_entries: int
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._clock: Callable[[], float] = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: str) -> tuple[Any, bool] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        age = self._clock() - entry.stored_at
+        if age >= entry.hint.max_age + entry.hint.stale_while_revalidate:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if age < entry.hint.max_age:
+            self.hits += 1
+            return copy.deepcopy(entry.result), False
+        self.stale_hits += 1
+        return copy.deepcopy(entry.result), True
+
+    def put(self, key: str, result: Any, hint: CacheHint) -> None:
+        self._entries[key] = _Entry(copy.deepcopy(result), self._clock(), hint)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> ResponseCacheStats:
+        return ResponseCacheStats(
+            entries=len(self._entries),
+            hits=self.hits,
+            stale_hits=self.stale_hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
@@ -0,0 +1,149 @@
+"""
+Synchronous woodglue client for scripts and notebooks.
+
+`SyncWoodglueClient` runs one `WoodglueClient` on a private event loop in
+a daemon thread, so blocking callers pay no loop setup per call and reuse
+the same connection pool across calls. Calls from any thread are handed
+to that loop, which makes the client safe to share between threads. It
+also works inside Jupyter, where the notebook's own loop is already
+running.
+
+Connection reuse needs the `curl` extra (`pycurl`). Without it the
+default pool falls back to the `simple` backend, which opens a new
+connection per call, and `default_pool()` warns about it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import threading
+import warnings
+from collections.abc import Coroutine, Generator, Iterable
+from types import TracebackType
+from typing import Any, TypeVar
+
+from woodglue.client import ClientPoolConfig, ClientStats, WoodglueClient
+
+T = TypeVar("T")
+
+
+def default_pool() -> ClientPoolConfig:
+    """
+    Keep-alive pool on the `curl` backend. Warns and falls back to the
+    `simple` backend, without connection reuse, if `pycurl` is missing.
+    """
+    if importlib.util.find_spec("pycurl") is None:
+        warnings.warn(
+            "pycurl is not installed, so SyncWoodglueClient opens a new connection "
+            "per call; install woodglue[curl] for connection reuse",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        return ClientPoolConfig(backend="simple")
+    return ClientPoolConfig(backend="curl", keep_alive=True)
+
+
+class SyncWoodglueClient:
+    """
+    Blocking counterpart of `WoodglueClient` with the same typed
+    resolution. Keyword arguments are passed to `WoodglueClient`; the
+    client always owns its pool (`default_pool()` unless `pool` is
+    given). Use as a context manager or call `close()` when done.
+    """
+
+    def __init__(self, base_url: str, *, pool: ClientPoolConfig | None = None, **kwargs: Any):
+        self._loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._loop.run_forever, name="woodglue-sync-client", daemon=True
+        )
+        self._thread.start()
+        self._closed: bool = False
+
+        async def make() -> WoodglueClient:
+            # Tornado binds the HTTP client to the loop it is created on
+            return WoodglueClient(base_url, pool=pool or default_pool(), **kwargs)
+
+        self._client: WoodglueClient = self._run(make())
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        if self._closed:
+            coro.close()
+            raise RuntimeError("Client is closed")
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("SyncWoodglueClient cannot be used from its own loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    @property
+    def client(self) -> WoodglueClient:
+        """The underlying async client (lives on the private loop)."""
+        return self._client
+
+    def load_spec(self, strict: bool = False) -> None:
+        """See `WoodglueClient.load_spec()`."""
+        self._run(self._client.load_spec(strict))
+
+    def call(self, method: str, **kwargs: Any) -> Any:
+        """See `WoodglueClient.call()`."""
+        return self._run(self._client.call(method, **kwargs))
+
+    def pages(self, method: str, **kwargs: Any) -> Generator[list[Any]]:
+        """See `WoodglueClient.pages()`; each page is fetched when it is reached."""
+        pages = self._client.pages(method, **kwargs)
+
+        async def next_page() -> list[Any]:
+            return await anext(pages)
+
+        try:
+            while True:
+                try:
+                    page = self._run(next_page())
+                except StopAsyncIteration:
+                    return
+                yield page
+        finally:
+            self._run(pages.aclose())
+
+    def call_many(
+        self,
+        calls: Iterable[tuple[str, dict[str, Any]]],
+        *,
+        batch: bool = True,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """See `WoodglueClient.call_many()`."""
+        return self._run(
+            self._client.call_many(calls, batch=batch, return_exceptions=return_exceptions)
+        )
+
+    def stats(self) -> ClientStats:
+        async def read() -> ClientStats:
+            return self._client.stats()
+
+        return self._run(read())
+
+    def close(self) -> None:
+        """Close the pool and stop the loop thread. Safe to call twice."""
+        if self._closed:
+            return
+
+        async def shutdown() -> None:
+            self._client.close()
+
+        self._run(shutdown())
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> SyncWoodglueClient:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
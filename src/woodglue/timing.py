@@ -0,0 +1,172 @@
+"""
+Per-request phase timing, request ids and access logging.
+
+`RequestTiming` adds up the time `JsonRpcHandler` spends in each phase
+of a request (auth, parse, validate, call, serialize). It renders them as
+a `Server-Timing` header, which `parse_server_timing()` reads back on the
+client (see `woodglue.client.server_timing()`). Every request gets an id
+(taken from `X-Request-Id` if the client sent a usable one) that is
+echoed in the response. While the request is handled, `current_request_id`
+holds it, and `RequestLogFilter` adds it and the current mount prefix to
+every log record.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+import uuid
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from pydantic import BaseModel
+
+from woodglue.mount import current_mount
+
+PHASES = ("auth", "parse", "validate", "call", "serialize")
+
+REQUEST_ID_HEADER = "X-Request-Id"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+REQUEST_LOG_FORMAT = (
+    "%(asctime)s %(levelname)-8s [%(name)s] req=%(request_id)s mount=%(mount)s "
+    "run=%(run_id)s node=%(node_label)s %(message)s"
+)
+"""lythonic's file log format plus the request id and mount prefix."""
+
+current_request_id: ContextVar[str | None] = ContextVar("current_request_id", default=None)
+
+access_logger = logging.getLogger("woodglue.access")
+
+_REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._:-]{1,64}")
+
+
+def accept_request_id(value: str | None) -> str:
+    """
+    The client's request id if it is short and plain, else a new one.
+
+    >>> accept_request_id("abc-123")
+    'abc-123'
+    >>> len(accept_request_id("no spaces allowed"))
+    16
+    """
+    if value is not None and _REQUEST_ID_RE.fullmatch(value):
+        return value
+    return uuid.uuid4().hex[:16]
+
+
+class RequestTiming:
+    """Seconds spent per phase of one request, summed over its calls."""
+
+    def __init__(self) -> None:
+        self.started: float = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase: str) -> Generator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def milliseconds(self) -> dict[str, float]:
+        """Phases in `PHASES` order plus `total`, rounded to microseconds."""
+        ms = {p: round(self.phases[p] * 1000, 3) for p in PHASES if p in self.phases}
+        ms["total"] = round(self.total() * 1000, 3)
+        return ms
+
+    def header(self) -> str:
+        """
+        `Server-Timing` header value, durations in milliseconds.
+
+        >>> t = RequestTiming()
+        >>> t.add("call", 0.0125)
+        >>> t.add("parse", 0.0001)
+        >>> t.header().rsplit(", ", 1)[0]
+        'parse;dur=0.1, call;dur=12.5'
+        """
+        return ", ".join(f"{name};dur={ms:g}" for name, ms in self.milliseconds().items())
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    """
+    Durations (milliseconds) by metric name from a `Server-Timing` header.
+
+    >>> parse_server_timing('parse;dur=0.1, call;desc="x";dur=12.5, cache')
+    {'parse': 0.1, 'call': 12.5}
+    """
+    result: dict[str, float] = {}
+    for metric in (header or "").split(","):
+        name, *params = (part.strip() for part in metric.split(";"))
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "dur":
+                try:
+                    result[name] = float(value)
+                except ValueError:
+                    pass
+    return result
+
+
+class ServerTiming(BaseModel):
+    """Server-side breakdown of one `/rpc` response, in milliseconds."""
+
+    request_id: str | None = None
+    phases: dict[str, float] = {}
+
+    @property
+    def total(self) -> float | None:
+        return self.phases.get("total")
+
+
+def log_access(
+    request_id: str, methods: list[str], status: int, timing: RequestTiming, **extra: Any
+) -> None:
+    """Write one JSON access record to the `woodglue.access` logger."""
+    record = {
+        "request_id": request_id,
+        "methods": methods,
+        "status": status,
+        "ms": timing.milliseconds(),
+        **extra,
+    }
+    access_logger.info(json.dumps(record, separators=(",", ":")), extra={"access": record})
+
+
+class RequestLogFilter(logging.Filter):
+    """
+    Adds `request_id` and `mount` (the current namespace prefix) to log
+    records; empty strings outside a request or call. Never suppresses.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:  # pyright: ignore[reportImplicitOverride]
+        mount = current_mount.get(None)
+        record.request_id = current_request_id.get() or ""  # pyright: ignore[reportAttributeAccessIssue]
+        record.mount = mount.prefix if mount is not None else ""  # pyright: ignore[reportAttributeAccessIssue]
+        return True
+
+
+def install_request_log_filter(handlers: Iterable[logging.Handler] | None = None) -> None:
+    """
+    Add `RequestLogFilter` (and lythonic's `NodeRunLogFilter`, if missing)
+    to `handlers` (default: the root logger's) and switch them to
+    `REQUEST_LOG_FORMAT`.
+    """
+    from lythonic.compose.log_context import NodeRunLogFilter
+
+    for handler in handlers if handlers is not None else logging.getLogger().handlers:
+        if not any(isinstance(f, NodeRunLogFilter) for f in handler.filters):
+            handler.addFilter(NodeRunLogFilter())
+        handler.addFilter(RequestLogFilter())
+        handler.setFormatter(logging.Formatter(REQUEST_LOG_FORMAT))
@@ -0,0 +1,568 @@
+"""
+Lightweight span tracing with a local SQLite exporter.
+
+A `Tracer` records spans for RPC requests and method calls
+(`JsonRpcHandler`), trigger fires (`TracingTriggerManager`), and DAG
+runs and node executions (`TracingProvenance`, fed by lythonic's
+provenance hooks). The active span travels in the `current_span`
+context var. `WoodglueClient` sends it to other servers as a W3C
+`traceparent` header, and `JsonRpcHandler` continues traces from that
+header. That gives one trace from an RPC call through a trigger into a
+DAG and the calls its nodes make.
+
+Finished spans are handed to the writer thread of `SqliteSpanExporter`,
+which commits them in batches to a SQLite file that `system.traces` and
+`system.trace_spans` query. No collector or external service is involved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Any, TypeVar
+
+from lythonic.compose.dag_provenance import DagProvenance
+from lythonic.compose.dag_runner import DagRunResult
+from lythonic.compose.trigger import TriggerManager
+from pydantic import BaseModel
+from typing_extensions import override
+
+from woodglue.config import TracingConfig
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+
+T = TypeVar("T")
+
+# Exporter queue markers: write out the buffered batch (and stop)
+_FLUSH = "flush"
+_STOP = "stop"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identity of a span, as carried across tasks and processes."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+
+current_span: contextvars.ContextVar[SpanContext | None] = contextvars.ContextVar(
+    "woodglue_current_span", default=None
+)
+
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    """
+    Span context from a W3C `traceparent` header, or `None` if malformed.
+
+    >>> parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+    SpanContext(trace_id='4bf92f3577b34da6a3ce929d0e0e4736', span_id='00f067aa0ba902b7', sampled=True)
+    >>> parse_traceparent("00-00000000000000000000000000000000-00f067aa0ba902b7-01") is None
+    True
+    """
+    if not value:
+        return None
+    parts = value.strip().lower().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    _, trace_id, span_id, flags = parts[:4]
+    try:
+        if len(trace_id) != 32 or len(span_id) != 16 or len(flags) != 2:
+            return None
+        if int(trace_id, 16) == 0 or int(span_id, 16) == 0:
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return SpanContext(trace_id, span_id, sampled)
+
+
+def format_traceparent(ctx: SpanContext) -> str:
+    """
+    W3C `traceparent` header value for `ctx`.
+
+    >>> format_traceparent(SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", False))
+    '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00'
+    """
+    return f"00-{ctx.trace_id}-{ctx.span_id}-{'01' if ctx.sampled else '00'}"
+
+
+class SpanRecord(BaseModel):
+    """A finished span; `start` is Unix epoch seconds, `duration` seconds."""
+
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    name: str
+    kind: str
+    start: float
+    duration: float
+    status: str = "ok"
+    attributes: dict[str, Any] = {}
+
+
+class TraceSummary(BaseModel):
+    """One trace in `system.traces`: its root span and overall extent."""
+
+    trace_id: str
+    name: str
+    kind: str
+    start: float
+    duration: float
+    spans: int
+    errors: int
+
+
+class Span:
+    """A span in progress; `end()` exports it if its trace is sampled."""
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        name: str,
+        kind: str,
+        parent: SpanContext | None,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.tracer: Tracer = tracer
+        self.name: str = name
+        self.kind: str = kind
+        self.parent: SpanContext | None = parent
+        self.context: SpanContext = SpanContext(
+            trace_id=parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            sampled=parent.sampled if parent is not None else tracer.sample(),
+        )
+        self.attributes: dict[str, Any] = attributes
+        self.start: float = time.time()
+        self._started: float = time.perf_counter()
+        self._ended: bool = False
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, status: str = "ok") -> None:
+        if self._ended:
+            return
+        self._ended = True
+        if self.context.sampled:
+            self.tracer.exporter.export(
+                SpanRecord(
+                    trace_id=self.context.trace_id,
+                    span_id=self.context.span_id,
+                    parent_id=self.parent.span_id if self.parent is not None else None,
+                    name=self.name,
+                    kind=self.kind,
+                    start=self.start,
+                    duration=time.perf_counter() - self._started,
+                    status=status,
+                    attributes=self.attributes,
+                )
+            )
+
+
+class SqliteSpanExporter:
+    """
+    Writes finished spans to SQLite from a writer thread, so `export()`
+    only enqueues. The writer commits a batch once it holds `batch_size`
+    spans or its oldest span is `flush_interval` seconds old. Spans that
+    find the queue (`max_queue`) full are dropped and counted. Keeps at
+    most `max_spans` rows. Safe to use from any thread.
+    """
+
+    db_path: Path
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_spans: int = 100_000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+    ) -> None:
+        self.db_path = db_path
+        self.max_spans: int = max_spans
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.written: int = 0
+        self.dropped: int = 0
+        self._reported: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS spans ("
+                "  trace_id TEXT NOT NULL,"
+                "  span_id TEXT NOT NULL,"
+                "  parent_id TEXT,"
+                "  name TEXT NOT NULL,"
+                "  kind TEXT NOT NULL,"
+                "  start REAL NOT NULL,"
+                "  duration REAL NOT NULL,"
+                "  status TEXT NOT NULL,"
+                "  attributes TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id)")
+            conn.commit()
+        self._queue: Queue[SpanRecord | str] = Queue(max_queue)
+        self._writer: threading.Thread = threading.Thread(
+            target=self._write_loop, name="woodglue-spans", daemon=True
+        )
+        self._writer.start()
+
+    def export(self, record: SpanRecord) -> None:
+        """Queue a span for the writer thread; dropped if the queue is full."""
+        try:
+            self._queue.put_nowait(record)
+        except Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _write_loop(self) -> None:
+        batch: list[SpanRecord] = []
+        due = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=max(due - time.monotonic(), 0.0) if batch else None)
+            except Empty:
+                # The oldest buffered span has waited `flush_interval`
+                batch = self._write(batch)
+                continue
+            if isinstance(item, SpanRecord):
+                if not batch:
+                    due = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    batch = self._write(batch)
+                continue
+            batch = self._write(batch)
+            self._queue.task_done()
+            if item == _STOP:
+                return
+
+    def _write(self, records: list[SpanRecord]) -> list[SpanRecord]:
+        """Commit `records`, mark them done in the queue; returns a fresh batch."""
+        if not records:
+            return records
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                conn.executemany(
+                    "INSERT INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            r.trace_id,
+                            r.span_id,
+                            r.parent_id,
+                            r.name,
+                            r.kind,
+                            r.start,
+                            r.duration,
+                            r.status,
+                            json.dumps(r.attributes, default=str),
+                        )
+                        for r in records
+                    ],
+                )
+                conn.execute(
+                    "DELETE FROM spans WHERE rowid <= (SELECT MAX(rowid) FROM spans) - ?",
+                    (self.max_spans,),
+                )
+                conn.commit()
+            self.written += len(records)
+        except sqlite3.Error:
+            logger.exception("Cannot write %d spans to %s", len(records), self.db_path)
+        finally:
+            for _ in records:
+                self._queue.task_done()
+        dropped = self.dropped
+        if dropped != self._reported:
+            logger.warning("Span queue full, dropped %d spans", dropped - self._reported)
+            self._reported = dropped
+        return []
+
+    def flush(self) -> None:
+        """Wait until every queued span is written."""
+        if self._writer.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def traces(
+        self, limit: int = 20, name: str | None = None, min_duration: float | None = None
+    ) -> list[TraceSummary]:
+        """Most recent traces first, summarized by their root span."""
+        self.flush()
+        where = [
+            "parent_id IS NULL OR parent_id NOT IN (SELECT span_id FROM spans s2 "
+            "WHERE s2.trace_id = spans.trace_id)"
+        ]
+        params: list[Any] = []
+        if name is not None:
+            where.append("name = ?")
+            params.append(name)
+        if min_duration is not None:
+            where.append("duration >= ?")
+            params.append(min_duration)
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute(
+                "SELECT trace_id, name, kind, start, duration,"
+                "  (SELECT COUNT(*) FROM spans s3 WHERE s3.trace_id = spans.trace_id),"
+                "  (SELECT COUNT(*) FROM spans s4 WHERE s4.trace_id = spans.trace_id"
+                "     AND s4.status != 'ok') "
+                f"FROM spans WHERE ({') AND ('.join(where)}) "
+                "ORDER BY start DESC, rowid DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            TraceSummary(
+                trace_id=r[0],
+                name=r[1],
+                kind=r[2],
+                start=r[3],
+                duration=r[4],
+                spans=r[5],
+                errors=r[6],
+            )
+            for r in rows
+        ]
+
+    def spans(self, trace_id: str) -> list[SpanRecord]:
+        """All recorded spans of a trace, in start order."""
+        self.flush()
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute(
+                "SELECT trace_id, span_id, parent_id, name, kind, start, duration, status,"
+                " attributes FROM spans WHERE trace_id = ? ORDER BY start, rowid",
+                (trace_id,),
+            ).fetchall()
+        return [
+            SpanRecord(
+                trace_id=r[0],
+                span_id=r[1],
+                parent_id=r[2],
+                name=r[3],
+                kind=r[4],
+                start=r[5],
+                duration=r[6],
+                status=r[7],
+                attributes=json.loads(r[8]),
+            )
+            for r in rows
+        ]
+
+    def close(self) -> None:
+        """Write out the queued spans and stop the writer."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+
+class Tracer:
+    """Creates spans; new traces are kept with probability `config.sample_rate`."""
+
+    config: TracingConfig
+    exporter: SqliteSpanExporter
+
+    def __init__(
+        self,
+        config: TracingConfig,
+        exporter: SqliteSpanExporter,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.config = config
+        self.exporter = exporter
+        self._rng: random.Random = rng or random.Random()
+
+    def sample(self) -> bool:
+        rate = self.config.sample_rate
+        return rate >= 1.0 or self._rng.random() < rate
+
+    def start_span(
+        self,
+        name: str,
+        kind: str,
+        parent: SpanContext | None = None,
+        **attributes: Any,
+    ) -> Span:
+        """Start a span under `parent`, by default the current span."""
+        if parent is None:
+            parent = current_span.get()
+        return Span(self, name, kind, parent, attributes)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str,
+        parent: SpanContext | None = None,
+        **attributes: Any,
+    ) -> Generator[Span]:
+        """Run the block as the current span; an exception marks it `error`."""
+        span = self.start_span(name, kind, parent, **attributes)
+        token = current_span.set(span.context)
+        status = "ok"
+        try:
+            yield span
+        except Exception as exc:
+            status = "error"
+            span.set(error=type(exc).__name__)
+            raise
+        except BaseException:
+            # e.g. asyncio.CancelledError on deadline or client disconnect
+            status = "cancelled"
+            raise
+        finally:
+            current_span.reset(token)
+            span.end(status)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    `ThreadPoolExecutor` that runs each job in a copy of the submitting
+    task's context, as `asyncio.to_thread` does.
+    """
+
+    @override
+    def submit(
+        self, fn: Callable[..., T], /, *args: Any, **kwargs: Any
+    ) -> concurrent.futures.Future[T]:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_propagating: weakref.WeakSet[asyncio.AbstractEventLoop] = weakref.WeakSet()
+
+
+def propagate_context() -> None:
+    """
+    Make the running loop's default executor carry context vars into its
+    threads. DagRunner calls provenance through that executor, so this
+    lets `TracingProvenance` see the span that started a run. Best called
+    before the loop first uses its default executor, which it replaces.
+    """
+    loop = asyncio.get_running_loop()
+    if loop in _propagating:
+        return
+    _propagating.add(loop)
+    loop.set_default_executor(ContextThreadPoolExecutor(thread_name_prefix="woodglue-executor"))
+
+
+class TracingProvenance(DagProvenance):
+    """
+    `DagProvenance` that also records a span per DAG run and per node
+    execution. A run is parented to the current span, which DagRunner's
+    executor threads see once `propagate_context()` has run on the loop;
+    a sub-DAG run nests under its parent run.
+    """
+
+    def __init__(self, db_path: Path, tracer: Tracer) -> None:
+        super().__init__(db_path)
+        self.tracer: Tracer = tracer
+        self._runs: dict[str, Span] = {}
+        self._nodes: dict[tuple[str, str], Span] = {}
+        self._spans_lock: threading.Lock = threading.Lock()
+
+    @override
+    def create_run(
+        self,
+        run_id: str,
+        dag_nsref: str,
+        source_inputs: dict[str, Any],
+        parent_run_id: str | None = None,
+    ) -> None:
+        super().create_run(run_id, dag_nsref, source_inputs, parent_run_id)
+        with self._spans_lock:
+            parent_run = self._runs.get(parent_run_id) if parent_run_id else None
+            parent = parent_run.context if parent_run is not None else None
+            self._runs[run_id] = self.tracer.start_span(dag_nsref, "dag_run", parent, run_id=run_id)
+
+    @override
+    def record_node_start(
+        self,
+        run_id: str,
+        node_label: str,
+        input_json: str,
+        is_source: bool = False,
+        is_sink: bool = False,
+    ) -> None:
+        super().record_node_start(run_id, node_label, input_json, is_source, is_sink)
+        with self._spans_lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                self._nodes[(run_id, node_label)] = self.tracer.start_span(
+                    node_label, "node", run.context, run_id=run_id
+                )
+
+    @override
+    def complete_node_with_edges(
+        self,
+        run_id: str,
+        node_label: str,
+        output_json: str,
+        edges: list[tuple[str, str]],
+    ) -> None:
+        super().complete_node_with_edges(run_id, node_label, output_json, edges)
+        self._end_node(run_id, node_label, "ok")
+
+    @override
+    def fail_node_and_finish_run(self, run_id: str, node_label: str, error: str) -> None:
+        super().fail_node_and_finish_run(run_id, node_label, error)
+        self._end_node(run_id, node_label, "error", error=error)
+        self._end_run(run_id, "failed")
+
+    @override
+    def update_run_status(self, run_id: str, status: str) -> None:
+        super().update_run_status(run_id, status)
+        if status == "paused":
+            self._end_run(run_id, "paused")
+
+    @override
+    def finish_run(self, run_id: str, status: str, sink_outputs_json: str | None = None) -> None:
+        super().finish_run(run_id, status, sink_outputs_json)
+        self._end_run(run_id, status)
+
+    def _end_node(self, run_id: str, node_label: str, status: str, **attributes: Any) -> None:
+        with self._spans_lock:
+            span = self._nodes.pop((run_id, node_label), None)
+        if span is not None:
+            span.set(**attributes)
+            span.end(status)
+
+    def _end_run(self, run_id: str, status: str) -> None:
+        with self._spans_lock:
+            span = self._runs.pop(run_id, None)
+            for key in [key for key in self._nodes if key[0] == run_id]:
+                self._nodes.pop(key).end("cancelled")
+        if span is not None:
+            span.end("ok" if status == "completed" else status)
+
+
+class TracingTriggerManager(TriggerManager):
+    """`TriggerManager` that records each fire as a span around its DAG run."""
+
+    tracer: Tracer | None = None
+
+    @override
+    async def fire(self, name: str, payload: dict[str, Any] | None = None) -> DagRunResult:
+        if self.tracer is None:
+            return await super().fire(name, payload)
+        propagate_context()
+        with self.tracer.span(f"trigger {name}", "trigger", trigger=name) as span:
+            result = await super().fire(name, payload)
+            span.set(run_id=result.run_id, run_status=result.status)
+            return result
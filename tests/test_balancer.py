@@ -0,0 +1,133 @@
+"""Tests for woodglue.balancer.BalancedClient."""
+
+import tornado.httpserver
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.balancer import BalancedClient, BalancerConfig
+from woodglue.call_policy import IDEMPOTENT_TAG
+from woodglue.config import NamespaceEntry, WoodglueConfig
+
+
+def ping(n: int) -> int:
+    """Echo a number."""
+    return n
+
+
+def _app(prefix: str):
+    ns = Namespace()
+    ns.register(ping, nsref="ping", tags=["api", IDEMPOTENT_TAG])
+    config = WoodglueConfig(namespaces={prefix: NamespaceEntry(gref="unused")})
+    return create_app(namespaces={prefix: (ns, NamespaceEntry(gref="unused"))}, config=config)
+
+
+def _dead_url() -> str:
+    """A URL nothing listens on, so connections are refused."""
+    sock, port = tornado.testing.bind_unused_port()
+    sock.close()
+    return f"http://127.0.0.1:{port}"
+
+
+class TestBalancedClient(tornado.testing.AsyncHTTPTestCase):
+    other_url: str  # pyright: ignore[reportUninitializedInstanceVariable]
+    other: tornado.httpserver.HTTPServer  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        return _app("t")
+
+    @override
+    def setUp(self) -> None:
+        super().setUp()
+        sock, port = tornado.testing.bind_unused_port()
+        self.other = tornado.httpserver.HTTPServer(_app("u"))
+        self.other.add_sockets([sock])
+        self.other_url = f"http://127.0.0.1:{port}"
+
+    @override
+    def tearDown(self) -> None:
+        self.other.stop()
+        super().tearDown()
+
+    def _client(self, urls: list[str], **kwargs: object) -> BalancedClient:
+        config = BalancerConfig(health_interval=None)
+        return BalancedClient(urls, config=config, **kwargs)  # pyright: ignore[reportArgumentType]
+
+    @tornado.testing.gen_test
+    async def test_spreads_calls_over_endpoints(self):
+        second = _app("t")
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(second)
+        server.add_sockets([sock])
+        try:
+            client = self._client([self.get_url(""), f"http://127.0.0.1:{port}"])
+            for strategy in ("p2c", "least_outstanding"):
+                client.config.strategy = strategy
+                for i in range(20):
+                    assert await client.call("t.ping", n=i) == i
+            requests = [s.requests for s in client.stats()]
+            assert sum(requests) == 40
+            assert min(requests) > 0
+            client.close()
+        finally:
+            server.stop()
+
+    @tornado.testing.gen_test
+    async def test_dead_endpoint_is_ejected_and_idempotent_calls_fail_over(self):
+        dead = _dead_url()
+        client = self._client([dead, self.get_url("")], idempotent=["t.ping"])
+        for i in range(30):
+            assert await client.call("t.ping", n=i) == i
+        dead_stats = client.stats()[0]
+        assert not dead_stats.healthy
+        assert dead_stats.ejections == 1
+        assert dead_stats.failures == 3
+        client.close()
+
+    @tornado.testing.gen_test
+    async def test_non_idempotent_call_does_not_fail_over(self):
+        client = self._client([_dead_url(), self.get_url("")])
+        errors = 0
+        for i in range(10):
+            try:
+                await client.call("t.ping", n=i)
+            except OSError:
+                errors += 1
+        assert errors == client.stats()[0].failures > 0
+        client.close()
+
+    @tornado.testing.gen_test
+    async def test_health_check_ejects_and_restores(self):
+        dead = _dead_url()
+        client = self._client([dead, self.get_url("")])
+        await client.check_health()
+        assert [s.healthy for s in client.stats()] == [False, True]
+        # An endpoint ejected by failures comes back on the next good probe
+        client._endpoints[1].healthy = False  # pyright: ignore[reportPrivateUsage]
+        await client.check_health()
+        assert [s.healthy for s in client.stats()] == [False, True]
+        assert [s.ejections for s in client.stats()] == [1, 0]
+        client.close()
+
+    @tornado.testing.gen_test
+    async def test_routes_by_prefix_from_spec(self):
+        client = self._client([self.get_url(""), self.other_url])
+        await client.load_spec()
+        assert [s.prefixes for s in client.stats()] == [["t"], ["u"]]
+        for i in range(5):
+            assert await client.call("t.ping", n=i) == i
+            assert await client.call("u.ping", n=i) == i
+        assert [s.requests for s in client.stats()] == [5, 5]
+        client.close()
+
+    @tornado.testing.gen_test
+    async def test_explicit_routes(self):
+        client = self._client(
+            [self.get_url(""), self.other_url], routes={"u": [self.other_url + "/"]}
+        )
+        for i in range(5):
+            assert await client.call("u.ping", n=i) == i
+        assert [s.requests for s in client.stats()] == [0, 5]
+        client.close()
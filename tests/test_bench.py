@@ -0,0 +1,121 @@
+"""Tests for woodglue.bench."""
+
+import json
+import random
+import tempfile
+from pathlib import Path
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.apps.system_api import build_system_namespace
+from woodglue.bench import (
+    BenchConfig,
+    BenchResult,
+    BenchTarget,
+    LatencyHistogram,
+    format_report,
+    load_mix,
+    run_bench,
+)
+from woodglue.bulkhead import BulkheadRegistry
+from woodglue.client import WoodglueClient
+from woodglue.config import ConcurrencyLimit, NamespaceEntry, WoodglueConfig
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+def route(method: str, policy: str) -> str:
+    """Params named like `WoodglueClient.call()` options."""
+    return f"{method}/{policy}"
+
+
+def test_histogram_relative_error():
+    h = LatencyHistogram()
+    rng = random.Random(7)
+    values = sorted(rng.uniform(0.0001, 2.0) for _ in range(5000))
+    for v in values:
+        h.record(v)
+    for p in (50, 90, 99, 99.9):
+        exact = values[max(0, int(len(values) * p / 100 + 0.5) - 1)] * 1e6
+        assert abs(h.percentile(p) - exact) / exact < 0.01
+    assert h.percentile(100) == h.max
+
+
+def test_histogram_merge():
+    a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(100):
+        (a if i % 2 else b).record(i / 1000)
+        both.record(i / 1000)
+    a.merge(b)
+    assert a.summary() == both.summary()
+    assert LatencyHistogram().summary().p99 == 0
+
+
+def test_load_mix_formats():
+    with tempfile.TemporaryDirectory() as tmp:
+        listed = Path(tmp) / "mix.json"
+        listed.write_text(json.dumps([{"method": "t.add", "params": {"a": 1}, "weight": 3}]))
+        lines = Path(tmp) / "mix.jsonl"
+        lines.write_text('{"method": "t.add"}\n\n{"method": "t.sub", "params": {"b": 2}}\n')
+        assert load_mix(listed) == [BenchTarget(method="t.add", params={"a": 1}, weight=3)]
+        assert [t.method for t in load_mix(lines)] == ["t.add", "t.sub"]
+
+
+class TestRunBench(tornado.testing.AsyncHTTPTestCase):
+    @override
+    def get_app(self):
+        ns = Namespace()
+        ns.register(add, nsref="add", tags=["api"])
+        ns.register(route, nsref="route", tags=["api"])
+        entry = NamespaceEntry(gref="unused", concurrency=ConcurrencyLimit(max_concurrent=50))
+        namespaces = {"t": (ns, entry)}
+        bulkheads = BulkheadRegistry()
+        system_ns = build_system_namespace(namespaces, None, bulkheads)
+        namespaces["system"] = (system_ns, NamespaceEntry(gref="builtin:system"))
+        config = WoodglueConfig(namespaces={"t": entry})
+        app = create_app(namespaces=namespaces, config=config, bulkheads=bulkheads)
+        app.settings["log_function"] = lambda _handler: None  # pyright: ignore[reportUnknownLambdaType]
+        return app
+
+    @tornado.testing.gen_test
+    async def test_closed_loop(self):
+        client = WoodglueClient(self.get_url(""))
+        target = BenchTarget(method="t.add", params={"a": 1, "b": 2})
+        result = await run_bench(client, [target], BenchConfig(duration=0.3, concurrency=4))
+        assert result.requests > 0
+        assert result.errors == 0
+        assert result.latency.count == result.requests
+        lat = result.latency
+        assert 0 < lat.min <= lat.p50 <= lat.p90 <= lat.p99 <= lat.p999 <= lat.max
+        assert result.server is not None
+        assert result.server["bulkhead.t.*.admitted"] == result.requests
+        assert BenchResult.model_validate_json(result.model_dump_json()) == result
+        assert "throughput" in format_report(result)
+
+    @tornado.testing.gen_test
+    async def test_fixed_rate_with_error_breakdown(self):
+        client = WoodglueClient(self.get_url(""))
+        targets = [
+            BenchTarget(method="t.add", params={"a": 1, "b": 2}),
+            BenchTarget(method="t.missing"),
+        ]
+        config = BenchConfig(duration=0.4, concurrency=4, rate=50)
+        result = await run_bench(client, targets, config, rng=random.Random(1))
+        assert result.requests == 20
+        assert result.error_kinds == {"rpc -32601": result.errors}
+        assert 0 < result.errors < 20
+        assert "error rpc -32601" in format_report(result)
+
+    @tornado.testing.gen_test
+    async def test_params_named_like_call_options(self):
+        client = WoodglueClient(self.get_url(""))
+        target = BenchTarget(method="t.route", params={"method": "GET", "policy": "strict"})
+        result = await run_bench(client, [target], BenchConfig(duration=0.1, concurrency=1))
+        assert result.requests > 0
+        assert result.errors == 0
@@ -0,0 +1,147 @@
+"""Tests for woodglue.bulkhead concurrency limits."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.bulkhead import NAMESPACE_KEY, Bulkhead, BulkheadRegistry, BulkheadRejected
+from woodglue.config import ConcurrencyLimit, NamespaceEntry
+
+
+async def test_bulkhead_admits_up_to_limit_then_queues() -> None:
+    bh = Bulkhead("ns", "m", ConcurrencyLimit(max_concurrent=1, max_queue=1, queue_timeout=5))
+    await bh.acquire()
+    assert bh.active == 1
+
+    waiter = asyncio.ensure_future(bh.acquire())
+    await asyncio.sleep(0)
+    assert bh.queued == 1
+    assert not waiter.done()
+
+    bh.release()
+    await waiter
+    assert bh.active == 1
+    assert bh.queued == 0
+    bh.release()
+    assert bh.active == 0
+    assert bh.stats().admitted == 2
+
+
+async def test_bulkhead_rejects_when_queue_full() -> None:
+    bh = Bulkhead("ns", "m", ConcurrencyLimit(max_concurrent=1))
+    await bh.acquire()
+    with pytest.raises(BulkheadRejected, match="queue is full"):
+        await bh.acquire()
+    assert bh.stats().rejected == 1
+
+
+async def test_bulkhead_queue_timeout() -> None:
+    bh = Bulkhead("ns", "m", ConcurrencyLimit(max_concurrent=1, max_queue=1, queue_timeout=0.01))
+    await bh.acquire()
+    with pytest.raises(BulkheadRejected, match="queue timeout"):
+        await bh.acquire()
+    assert bh.queued == 0
+    assert bh.stats().timed_out == 1
+    bh.release()
+    assert bh.active == 0
+
+
+async def test_bulkhead_cancelled_waiter_leaves_queue() -> None:
+    bh = Bulkhead("ns", "m", ConcurrencyLimit(max_concurrent=1, max_queue=2, queue_timeout=5))
+    await bh.acquire()
+    waiter = asyncio.ensure_future(bh.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert bh.queued == 0
+    bh.release()
+    assert bh.active == 0
+
+
+def test_registry_resolves_method_tag_and_namespace_limits() -> None:
+    reg = BulkheadRegistry()
+    entry = NamespaceEntry(
+        gref="unused",
+        concurrency=ConcurrencyLimit(max_concurrent=10),
+        limits={
+            "report": ConcurrencyLimit(max_concurrent=2),
+            "ping": ConcurrencyLimit(max_concurrent=5),
+        },
+    )
+    reg.configure("ns", entry)
+
+    keys = [bh.key for bh in reg.resolve("ns", "build_report", ["api", "report"])]
+    assert keys == ["report", NAMESPACE_KEY]
+    keys = [bh.key for bh in reg.resolve("ns", "ping", ["api"])]
+    assert keys == ["ping", NAMESPACE_KEY]
+    assert reg.resolve("other", "ping", ["api"]) == []
+    assert [s.key for s in reg.stats()] == [NAMESPACE_KEY, "ping", "report"]
+
+
+def ping() -> str:
+    """Cheap health check."""
+    return "pong"
+
+
+class TestBulkheadRpc(tornado.testing.AsyncHTTPTestCase):
+    _started: asyncio.Event  # pyright: ignore[reportUninitializedInstanceVariable]
+    _release: asyncio.Event  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+
+        started = self._started = asyncio.Event()
+        release = self._release = asyncio.Event()
+
+        async def slow_report() -> str:
+            """Block until the test releases it."""
+            started.set()
+            await release.wait()
+            return "done"
+
+        ns = Namespace()
+        ns.register(slow_report, nsref="slow_report", tags=["api", "report"])
+        ns.register(ping, nsref="ping", tags=["api"])
+        entry = NamespaceEntry(
+            gref="unused",
+            limits={"report": ConcurrencyLimit(max_concurrent=1)},
+        )
+        return create_app(namespaces={"test": (ns, entry)})
+
+    def _body(self, method: str) -> str:
+        return json.dumps({"jsonrpc": "2.0", "method": method, "id": 1})
+
+    @tornado.testing.gen_test
+    async def test_saturated_limit_rejects_but_other_methods_run(self):
+        from tornado.httpclient import AsyncHTTPClient
+
+        http = AsyncHTTPClient()
+        url = self.get_url("/rpc")
+        first = asyncio.ensure_future(
+            http.fetch(url, method="POST", body=self._body("test.slow_report"))
+        )
+        await self._started.wait()
+
+        resp = await http.fetch(url, method="POST", body=self._body("test.slow_report"))
+        data = json.loads(resp.body)
+        assert data["error"]["code"] == -32001
+
+        resp = await http.fetch(url, method="POST", body=self._body("test.ping"))
+        assert json.loads(resp.body)["result"] == "pong"
+
+        stats: Any = self._app.settings["bulkheads"].stats()
+        assert stats[0].active == 1
+        assert stats[0].rejected == 1
+
+        self._release.set()
+        resp = await first
+        assert json.loads(resp.body)["result"] == "done"
@@ -0,0 +1,137 @@
+"""Tests for woodglue.call_policy: deadlines, retries and hedging in WoodglueClient."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.call_policy import CallPolicy, LatencyWindow
+from woodglue.client import WoodglueClient, WoodglueRpcError
+from woodglue.config import NamespaceEntry, WoodglueConfig
+from woodglue.deadline import remaining_budget
+
+INTERNAL_ERROR = -32603
+
+
+def test_latency_window_quantile() -> None:
+    window = LatencyWindow(size=3)
+    assert window.quantile(0.5) is None
+    for value in (5.0, 1.0, 3.0, 9.0):
+        window.record(value)
+    assert len(window) == 3
+    assert window.quantile(0.95) == 9.0
+    assert window.quantile(0.1) == 1.0
+
+
+class TestCallPolicy(tornado.testing.AsyncHTTPTestCase):
+    calls: dict[str, int]  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+
+        calls = self.calls = {"flaky": 0, "unsafe": 0, "laggy": 0}
+
+        def flaky(fail_times: int) -> str:
+            """Fail the first `fail_times` calls."""
+            calls["flaky"] += 1
+            if calls["flaky"] <= fail_times:
+                raise RuntimeError("transient")
+            return "ok"
+
+        def unsafe(fail_times: int) -> str:
+            """Same as flaky, but not idempotent."""
+            calls["unsafe"] += 1
+            if calls["unsafe"] <= fail_times:
+                raise RuntimeError("transient")
+            return "ok"
+
+        async def laggy() -> int:
+            """First call stalls, later calls answer at once."""
+            calls["laggy"] += 1
+            n = calls["laggy"]
+            if n == 1:
+                await asyncio.sleep(5)
+            return n
+
+        async def sleepy() -> str:
+            """Never answers in time."""
+            await asyncio.sleep(5)
+            return "late"
+
+        def budget() -> float | None:
+            """Remaining deadline as seen by the server."""
+            return remaining_budget()
+
+        ns = Namespace()
+        ns.register(budget, nsref="budget", tags=["api"])
+        ns.register(flaky, nsref="flaky", tags=["api", "idempotent"])
+        ns.register(unsafe, nsref="unsafe", tags=["api"])
+        ns.register(laggy, nsref="laggy", tags=["api", "idempotent"])
+        ns.register(sleepy, nsref="sleepy", tags=["api", "idempotent"])
+        config = WoodglueConfig(namespaces={"t": NamespaceEntry(gref="unused")})
+        return create_app(namespaces={"t": (ns, NamespaceEntry(gref="unused"))}, config=config)
+
+    def _policy(self, **kwargs: object) -> CallPolicy:
+        return CallPolicy.model_validate(
+            {"backoff": 0.001, "retry_codes": {INTERNAL_ERROR}, **kwargs}
+        )
+
+    @tornado.testing.gen_test
+    async def test_spec_marks_idempotent_methods(self):
+        client = WoodglueClient(self.get_url(""))
+        await client.load_spec()
+        assert client._idempotent == {"t.flaky", "t.laggy", "t.sleepy"}  # pyright: ignore[reportPrivateUsage]
+
+    @tornado.testing.gen_test
+    async def test_retries_idempotent_method(self):
+        client = WoodglueClient(self.get_url(""), policy=self._policy(retries=3))
+        await client.load_spec()
+        assert await client.call("t.flaky", fail_times=2) == "ok"
+        stats = client.stats()
+        assert (stats.attempts, stats.retries) == (3, 2)
+
+    @tornado.testing.gen_test
+    async def test_gives_up_after_retries(self):
+        client = WoodglueClient(self.get_url(""), idempotent=["t.flaky"])
+        with pytest.raises(WoodglueRpcError):
+            await client.call("t.flaky", fail_times=5, policy=self._policy(retries=1))
+        assert self.calls["flaky"] == 2
+
+    @tornado.testing.gen_test
+    async def test_never_retries_non_idempotent(self):
+        client = WoodglueClient(self.get_url(""), policy=self._policy(retries=3))
+        await client.load_spec()
+        with pytest.raises(WoodglueRpcError):
+            await client.call("t.unsafe", fail_times=1)
+        assert self.calls["unsafe"] == 1
+
+    @tornado.testing.gen_test
+    async def test_deadline_forwarded_to_server(self):
+        client = WoodglueClient(self.get_url(""), policy=self._policy(timeout=2))
+        budget = await client.call("t.budget")
+        assert 0 < budget <= 2
+
+    @tornado.testing.gen_test
+    async def test_timeout_bounds_the_call(self):
+        client = WoodglueClient(self.get_url(""), policy=self._policy(timeout=0.2, retries=2))
+        await client.load_spec()
+        started = time.monotonic()
+        # whichever side notices the deadline first wins the race
+        with pytest.raises((TimeoutError, WoodglueRpcError)):
+            await client.call("t.sleepy")
+        assert time.monotonic() - started < 2
+
+    @tornado.testing.gen_test
+    async def test_hedge_wins_over_stalled_request(self):
+        policy = self._policy(hedge=True, hedge_delay=0.05, timeout=3)
+        client = WoodglueClient(self.get_url(""), policies={"t.laggy": policy})
+        await client.load_spec()
+        assert await client.call("t.laggy") == 2
+        stats = client.stats()
+        assert (stats.hedges, stats.hedge_wins, stats.attempts) == (1, 1, 2)
@@ -0,0 +1,136 @@
+"""Tests for woodglue.capture and capture in JsonRpcHandler."""
+
+import json
+import random
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.capture import REDACTED, TrafficCapture, read_capture
+from woodglue.config import CaptureConfig, NamespaceEntry, WoodglueConfig
+
+
+def login(user: str, password: str) -> str:
+    """Pretend to log in."""
+    return f"hi {user}" if password else "who?"
+
+
+def drop_user(method: str, params: Any) -> Any:
+    """Redactor used by gref in the tests."""
+    return {k: v for k, v in params.items() if not (method == "a.login" and k == "user")}
+
+
+def test_sampling_redaction_and_size_cap():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sub" / "capture.jsonl"
+        config = CaptureConfig(enabled=True, sample_rate=0.5)
+        capture = TrafficCapture(config, path, rng=random.Random(3))
+        sampled = sum(capture.sampled() for _ in range(1000))
+        assert 400 < sampled < 600
+
+        capture.record("a.login", {"user": "ann", "password": "pw"}, 100.0, 0.01, 42)
+        capture.record("a.login", None, 101.0, 0.02, 10, error=-32602)
+        capture.close()
+        # a truncated trailing line (e.g. after a crash) is skipped
+        with path.open("a") as f:
+            f.write('{"t": 1, "meth')
+        first, second = read_capture(path)
+        assert first.params == {"user": "ann", "password": REDACTED}
+        assert (first.duration, first.size, first.error) == (0.01, 42, None)
+        assert second.params is None and second.error == -32602
+
+        capped = TrafficCapture(CaptureConfig(max_bytes=1), path)
+        capped.record("a.login", {}, 102.0, 0.01, 1)
+        capped.close()
+        assert capped.skipped == 1
+        assert len(list(read_capture(path))) == 2
+
+
+def test_full_queue_skips_calls():
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow(_method: str, params: Any) -> Any:
+        entered.set()
+        release.wait(5)
+        return params
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "capture.jsonl"
+        capture = TrafficCapture(CaptureConfig(max_queue=1), path, redactor=slow)
+        capture.record("a.login", {}, 1.0, 0.1, 1)
+        assert entered.wait(5)  # the writer holds the first call
+        capture.record("a.login", {}, 2.0, 0.1, 1)  # queued
+        capture.record("a.login", {}, 3.0, 0.1, 1)  # queue full
+        assert capture.skipped == 1
+        release.set()
+        capture.flush()
+        assert [r.t for r in read_capture(path)] == [1.0, 2.0]
+        assert capture.recorded == 2
+        capture.close()
+
+
+def test_redactor_gref():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "capture.jsonl"
+        config = CaptureConfig(redactor="tests.test_capture:drop_user")
+        capture = TrafficCapture(config, path)
+        capture.record("a.login", {"user": "ann", "password": "pw"}, 1.0, 0.1, 1)
+        capture.close()
+        (record,) = read_capture(path)
+        assert record.params == {"password": REDACTED}
+
+
+class TestHandlerCapture(tornado.testing.AsyncHTTPTestCase):
+    tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    capture: TrafficCapture  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        ns = Namespace()
+        ns.register(login, nsref="login", tags=["api"])
+        entry = NamespaceEntry(gref="unused")
+        self.capture = TrafficCapture(
+            CaptureConfig(enabled=True), Path(self.tmp.name) / "capture.jsonl"
+        )
+        config = WoodglueConfig(namespaces={"a": entry})
+        return create_app(namespaces={"a": (ns, entry)}, config=config, capture=self.capture)
+
+    @override
+    def tearDown(self) -> None:
+        self.capture.close()
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def _post(self, body: Any) -> Any:
+        resp = self.fetch("/rpc", method="POST", body=json.dumps(body))
+        return json.loads(resp.body)
+
+    def test_calls_are_captured(self):
+        call = {"jsonrpc": "2.0", "method": "a.login", "id": 1}
+        reply = self._post({**call, "params": {"user": "ann", "password": "pw"}})
+        assert reply["result"] == "hi ann"
+        self._post([{**call, "params": ["bob", "pw"]}, {**call, "method": "a.nope"}])
+        self._post({"jsonrpc": "2.0", "id": 2})
+
+        self.capture.flush()
+        first, *batch = read_capture(self.capture.path)
+        assert first.method == "a.login"
+        assert first.params == {"user": "ann", "password": REDACTED}
+        assert first.size == len(json.dumps(reply))
+        assert first.duration > 0
+        # batch entries run concurrently, so their records may come in any order
+        by_method = {r.method: r for r in batch}
+        assert set(by_method) == {"a.login", "a.nope"}
+        # positional params are stored by name so they can be replayed
+        assert by_method["a.login"].params == {"user": "bob", "password": REDACTED}
+        assert by_method["a.nope"].error == -32601
+        # calls in a batch share one response body, so they carry no size
+        assert by_method["a.login"].size is None
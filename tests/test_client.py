@@ -1,23 +1,40 @@
 """Tests for woodglue.client.WoodglueClient."""
 
+import asyncio
+import json
 import tempfile
 from pathlib import Path
 
+import pytest
 import tornado.testing
+import tornado.web
 from lythonic.compose.namespace import Namespace
+from tornado.httpclient import HTTPClientError, HTTPRequest, HTTPResponse
 from typing_extensions import override
 
 from woodglue.apps.server import create_app
-from woodglue.client import WoodglueClient, WoodglueRpcError
+from woodglue.client import ClientPoolConfig, WoodglueClient, WoodglueRpcError
 from woodglue.config import AuthConfig, NamespaceEntry, WoodglueConfig, WoodglueStorageConfig
 from woodglue.hello import HelloIn, HelloOut, hello, pydantic_hello
 from woodglue.token_store import ensure_token
 
 
+def hello_many(names: list[str]) -> list[HelloOut]:
+    """Reverse several names."""
+    return [HelloOut(eman=n[::-1], ega=len(n)) for n in names]
+
+
+def maybe_hello(name: str | None = None) -> HelloOut | None:
+    """Reverse a name if given."""
+    return HelloOut(eman=name[::-1], ega=0) if name else None
+
+
 def _make_namespaces() -> dict[str, tuple[Namespace, NamespaceEntry]]:
     ns = Namespace()
     ns.register(hello, nsref="hello", tags=["api"])
     ns.register(pydantic_hello, nsref="pydantic_hello", tags=["api"])
+    ns.register(hello_many, nsref="hello_many", tags=["api"])
+    ns.register(maybe_hello, nsref="maybe_hello", tags=["api"])
     return {"test": (ns, NamespaceEntry(gref="test"))}
 
 
@@ -61,6 +78,65 @@ class TestWoodglueClient(tornado.testing.AsyncHTTPTestCase):
         assert isinstance(result, HelloOut)
         assert result.eman == "boB"
 
+    @tornado.testing.gen_test
+    async def test_spec_resolves_lists_unions_and_scalars(self):
+        client = WoodglueClient(self.get_url(""))
+        await client.load_spec(strict=True)
+        many = await client.call("test.hello_many", names=["ab", "cde"])
+        assert [type(h) for h in many] == [HelloOut, HelloOut]
+        assert [h.eman for h in many] == ["ba", "edc"]
+        some = await client.call("test.maybe_hello", name="xy")
+        assert isinstance(some, HelloOut) and some.eman == "yx"
+        assert await client.call("test.maybe_hello") is None
+        assert await client.call("test.hello", name="World") == 5
+
+    @tornado.testing.gen_test
+    async def test_spec_cache_revalidates_with_etag(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = Path(tmp)
+            cold = WoodglueClient(self.get_url(""), spec_cache_dir=cache_dir)
+            await cold.load_spec(strict=True)
+            [cache_file] = cache_dir.iterdir()
+            cached = json.loads(cache_file.read_text())
+            assert cached["base_url"] == self.get_url("")
+            assert "test.hello_many" in cached["schemas"]
+
+            warm = WoodglueClient(self.get_url(""), spec_cache_dir=cache_dir)
+            original = warm._fetch  # pyright: ignore[reportPrivateUsage]
+            codes: list[int] = []
+
+            async def spy(request: HTTPRequest, raise_error: bool = True) -> HTTPResponse:
+                resp = await original(request, raise_error)
+                codes.append(resp.code)
+                return resp
+
+            warm._fetch = spy  # pyright: ignore[reportPrivateUsage]
+            await warm.load_spec(strict=True)
+            assert codes == [304]
+            many = await warm.call("test.hello_many", names=["ab"])
+            assert isinstance(many[0], HelloOut)
+
+            cached["etag"] = '"stale"'
+            cache_file.write_text(json.dumps(cached))
+            codes.clear()
+            await warm.load_spec(strict=True)
+            assert codes == [200]
+            assert json.loads(cache_file.read_text())["etag"] != '"stale"'
+
+    @tornado.testing.gen_test
+    async def test_explicit_generic_return_type(self):
+        client = WoodglueClient(self.get_url(""))
+        many = await client.call("test.hello_many", names=["q"], return_type=list[HelloOut])
+        assert isinstance(many[0], HelloOut)
+
+    @tornado.testing.gen_test
+    async def test_typed_call_error_still_raises(self):
+        client = WoodglueClient(self.get_url(""))
+        await client.load_spec(strict=True)
+        with pytest.raises(WoodglueRpcError) as info:
+            await client.call("test.hello_many")
+        assert info.value.code == -32602
+
     @tornado.testing.gen_test
     async def test_call_method_not_found(self):
         """Calling a non-existent method raises WoodglueRpcError."""
@@ -107,6 +183,107 @@ class TestWoodglueClient(tornado.testing.AsyncHTTPTestCase):
         assert result.eman == "eoZ"
 
 
+class TestWoodglueClientBatching(tornado.testing.AsyncHTTPTestCase):
+    posts: int  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        config = WoodglueConfig(namespaces={"test": NamespaceEntry(gref="unused")})
+        app = create_app(namespaces=_make_namespaces(), config=config)
+        self.posts = 0
+
+        def count(handler: tornado.web.RequestHandler) -> None:
+            if handler.request.method == "POST":
+                self.posts += 1
+
+        app.settings["log_function"] = count
+        return app
+
+    @tornado.testing.gen_test
+    async def test_gathered_calls_share_one_request(self):
+        client = WoodglueClient(self.get_url(""), batch_window=0.01)
+        results = await asyncio.gather(
+            *(client.call("test.hello", name="x" * i) for i in range(1, 21))
+        )
+        assert results == list(range(1, 21))
+        assert self.posts == 1
+
+    @tornado.testing.gen_test
+    async def test_batch_size_flushes_early(self):
+        client = WoodglueClient(self.get_url(""), batch_window=60, batch_size=5)
+        results = await asyncio.gather(*(client.call("test.hello", name="ab") for _ in range(10)))
+        assert results == [2] * 10
+        assert self.posts == 2
+
+    @tornado.testing.gen_test
+    async def test_errors_raise_per_call(self):
+        client = WoodglueClient(self.get_url(""), batch_window=0.01)
+        ok, bad, typed = await asyncio.gather(
+            client.call("test.hello", name="abc"),
+            client.call("test.nonexistent"),
+            client.call(
+                "test.pydantic_hello", input={"name": "Al", "age": 2}, return_type=HelloOut
+            ),
+            return_exceptions=True,
+        )
+        assert ok == 3
+        assert isinstance(bad, WoodglueRpcError) and bad.code == -32601
+        assert isinstance(typed, HelloOut) and typed.eman == "lA"
+        assert self.posts == 1
+
+
+async def slow_echo(value: int) -> int:
+    """Echo after a short pause."""
+    await asyncio.sleep(0.05)
+    return value
+
+
+class TestWoodglueClientPool(tornado.testing.AsyncHTTPTestCase):
+    @override
+    def get_app(self):
+        namespaces = _make_namespaces()
+        namespaces["test"][0].register(slow_echo, nsref="slow_echo", tags=["api"])
+        config = WoodglueConfig(namespaces={"test": NamespaceEntry(gref="unused")})
+        return create_app(namespaces=namespaces, config=config)
+
+    @tornado.testing.gen_test
+    async def test_saturation_and_queue_time(self):
+        client = WoodglueClient(self.get_url(""), pool=ClientPoolConfig(max_concurrency=2))
+        try:
+            results = await asyncio.gather(
+                *(client.call("test.slow_echo", value=i) for i in range(6))
+            )
+        finally:
+            client.close()
+        assert results == list(range(6))
+        stats = client.stats()
+        assert stats.requests == 6
+        assert stats.errors == 0
+        assert stats.in_flight == 0
+        assert stats.max_in_flight == 6
+        assert stats.max_concurrency == 2
+        assert stats.saturated == 4
+        assert stats.queue_time_max >= 0.05
+
+    @tornado.testing.gen_test
+    async def test_request_timeout_counts_error(self):
+        client = WoodglueClient(
+            self.get_url(""), pool=ClientPoolConfig(max_concurrency=1, request_timeout=0.01)
+        )
+        try:
+            with pytest.raises(HTTPClientError):
+                await client.call("test.slow_echo", value=1)
+        finally:
+            client.close()
+        assert client.stats().errors == 1
+
+    def test_default_client_is_shared(self):
+        a = WoodglueClient(self.get_url(""))
+        b = WoodglueClient(self.get_url(""))
+        assert a._http is b._http  # pyright: ignore[reportPrivateUsage]
+        assert a.stats().max_concurrency == 10
+
+
 class TestWoodglueClientWithAuth(tornado.testing.AsyncHTTPTestCase):
     _tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
     _db_path: Path  # pyright: ignore[reportUninitializedInstanceVariable]
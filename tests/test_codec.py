@@ -0,0 +1,136 @@
+"""Tests for woodglue.codec binary RPC encodings."""
+
+from __future__ import annotations
+
+import datetime
+import json
+
+import cbor2
+import msgpack
+import pytest
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from pydantic import BaseModel
+from typing_extensions import override
+
+from woodglue import codec
+from woodglue.client import WoodglueClient
+from woodglue.config import NamespaceEntry, WoodglueConfig
+from woodglue.hello import HelloOut, hello, pydantic_hello
+
+
+def blob(n: int) -> bytes:
+    """Return `n` bytes."""
+    return bytes(range(256)) * (n // 256) + bytes(range(n % 256))
+
+
+class Attachment(BaseModel):
+    name: str
+    data: bytes
+    saved: datetime.date
+
+
+def attachment(n: int) -> Attachment:
+    """Return an `n`-byte attachment."""
+    return Attachment(name="blob", data=blob(n), saved=datetime.date(2024, 1, 2))
+
+
+def _envelope(method: str, params: dict[str, object]) -> dict[str, object]:
+    return {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
+
+
+@pytest.mark.parametrize("ct", [codec.JSON, codec.MSGPACK, codec.CBOR])
+def test_encode_decode_round_trip(ct: str) -> None:
+    data = _envelope("test.hello", {"name": "x", "n": [1, 2.5, None]})
+    assert codec.decode(codec.encode(data, ct), ct) == data
+
+
+def test_decode_malformed_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        codec.decode(b"\xc1", codec.MSGPACK)
+    with pytest.raises(ValueError):
+        codec.decode(b"{", codec.JSON)
+
+
+def test_choose_response_type() -> None:
+    assert codec.choose_response_type(None, codec.MSGPACK) == codec.MSGPACK
+    assert codec.choose_response_type("*/*", codec.CBOR) == codec.CBOR
+    assert codec.choose_response_type("application/cbor", codec.JSON) == codec.CBOR
+    assert codec.choose_response_type("text/plain", "text/plain") == codec.JSON
+
+
+class TestBinaryRpc(tornado.testing.AsyncHTTPTestCase):
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+
+        ns = Namespace()
+        ns.register(hello, nsref="hello", tags=["api"])
+        ns.register(pydantic_hello, nsref="pydantic_hello", tags=["api"])
+        ns.register(blob, nsref="blob", tags=["api"])
+        ns.register(attachment, nsref="attachment", tags=["api"])
+        config = WoodglueConfig(namespaces={"test": NamespaceEntry(gref="unused")})
+        return create_app(namespaces={"test": (ns, NamespaceEntry(gref="unused"))}, config=config)
+
+    def _post(self, body: bytes, headers: dict[str, str]):
+        return self.fetch("/rpc", method="POST", body=body, headers=headers)
+
+    def test_msgpack_round_trip(self):
+        body = codec.encode(_envelope("test.hello", {"name": "World"}), codec.MSGPACK)
+        resp = self._post(body, {"Content-Type": codec.MSGPACK})
+        assert resp.headers["Content-Type"] == codec.MSGPACK
+        assert msgpack.unpackb(resp.body) == {"jsonrpc": "2.0", "result": 5, "id": 1}
+
+    def test_cbor_round_trip_with_model(self):
+        body = codec.encode(
+            _envelope("test.pydantic_hello", {"input": {"name": "Al", "age": 3}}), codec.CBOR
+        )
+        resp = self._post(body, {"Content-Type": codec.CBOR})
+        assert resp.headers["Content-Type"] == codec.CBOR
+        result = cbor2.loads(resp.body)["result"]
+        assert (result["eman"], result["ega"]) == ("lA", -3)
+
+    def test_bytes_result_is_native(self):
+        body = codec.encode(_envelope("test.blob", {"n": 300}), codec.MSGPACK)
+        resp = self._post(body, {"Content-Type": codec.MSGPACK})
+        assert msgpack.unpackb(resp.body)["result"] == blob(300)
+
+    def test_model_bytes_are_native(self):
+        for ct, loads in ((codec.MSGPACK, msgpack.unpackb), (codec.CBOR, cbor2.loads)):
+            resp = self._post(
+                codec.encode(_envelope("test.attachment", {"n": 3}), ct), {"Content-Type": ct}
+            )
+            assert loads(resp.body)["result"] == {
+                "name": "blob",
+                "data": blob(3),
+                "saved": "2024-01-02",
+            }
+        resp = self._post(json.dumps(_envelope("test.attachment", {"n": 3})).encode(), {})
+        assert json.loads(resp.body)["result"]["data"] == "\x00\x01\x02"
+
+    def test_accept_json_for_binary_request(self):
+        body = codec.encode(_envelope("test.hello", {"name": "World"}), codec.MSGPACK)
+        resp = self._post(body, {"Content-Type": codec.MSGPACK, "Accept": codec.JSON})
+        assert resp.headers["Content-Type"].startswith(codec.JSON)
+        assert json.loads(resp.body)["result"] == 5
+
+    def test_malformed_binary_body_is_parse_error(self):
+        resp = self._post(b"\xc1", {"Content-Type": codec.MSGPACK})
+        assert msgpack.unpackb(resp.body)["error"]["code"] == -32700
+
+    def test_json_unchanged_without_content_type(self):
+        resp = self._post(json.dumps(_envelope("test.hello", {"name": "World"})).encode(), {})
+        assert resp.headers["Content-Type"].startswith(codec.JSON)
+        assert json.loads(resp.body)["result"] == 5
+
+    @tornado.testing.gen_test
+    async def test_client_encoding(self):
+        for encoding in (codec.MSGPACK, codec.CBOR):
+            client = WoodglueClient(self.get_url(""), encoding=encoding)
+            assert await client.call("test.hello", name="World") == 5
+            result = await client.call(
+                "test.pydantic_hello", input={"name": "Bo", "age": 1}, return_type=HelloOut
+            )
+            assert isinstance(result, HelloOut)
+            assert (result.eman, result.ega) == ("oB", -1)
+            assert await client.call("test.blob", n=10) == blob(10)
@@ -0,0 +1,108 @@
+"""Tests for woodglue.apps.compression response encoding."""
+
+from __future__ import annotations
+
+import gzip
+import json
+
+import brotli
+import tornado.testing
+import zstandard
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.compression import DocsCache, compress
+from woodglue.config import CompressionConfig, NamespaceEntry, WoodglueConfig
+
+
+def big_list(n: int) -> list[str]:
+    """Return a large list."""
+    return [f"item-{i}" for i in range(n)]
+
+
+def _unzstd(data: bytes) -> bytes:
+    # streamed frames carry no content size, so use the streaming API
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def _body(n: int) -> str:
+    return json.dumps({"jsonrpc": "2.0", "method": "test.big_list", "params": {"n": n}, "id": 1})
+
+
+def test_docs_cache_builds_once_with_variants() -> None:
+    calls: list[int] = []
+
+    def build() -> str:
+        calls.append(1)
+        return "x" * 4096
+
+    cache = DocsCache(CompressionConfig(encodings=["gzip"]))
+    first = cache.get("a", build)
+    second = cache.get("a", build)
+    assert first is second
+    assert len(calls) == 1
+    assert gzip.decompress(first.variants["gzip"]) == first.body
+
+
+def test_compress_round_trips() -> None:
+    data = b"hello woodglue " * 200
+    config = CompressionConfig()
+    assert gzip.decompress(compress(data, "gzip", config)) == data
+    assert _unzstd(compress(data, "zstd", config)) == data
+    assert brotli.decompress(compress(data, "br", config)) == data
+
+
+class TestCompression(tornado.testing.AsyncHTTPTestCase):
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+
+        ns = Namespace()
+        ns.register(big_list, nsref="big_list", tags=["api"])
+        config = WoodglueConfig(
+            namespaces={"test": NamespaceEntry(gref="unused")},
+            compression=CompressionConfig(min_size=512),
+        )
+        return create_app(namespaces={"test": (ns, NamespaceEntry(gref="unused"))}, config=config)
+
+    def _rpc(self, n: int, accept: str):
+        return self.fetch(
+            "/rpc",
+            method="POST",
+            body=_body(n),
+            headers={"Accept-Encoding": accept},
+            decompress_response=False,
+        )
+
+    def test_large_rpc_response_uses_preferred_encoding(self):
+        resp = self._rpc(1000, "gzip, br, zstd")
+        assert resp.headers["Content-Encoding"] == "zstd"
+        assert "Accept-Encoding" in resp.headers["Vary"]
+        data = json.loads(_unzstd(resp.body))
+        assert len(data["result"]) == 1000
+
+    def test_client_preference_and_gzip(self):
+        resp = self._rpc(1000, "gzip")
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(resp.body))["result"]) == 1000
+
+    def test_small_response_not_compressed(self):
+        resp = self._rpc(2, "gzip, br, zstd")
+        assert "Content-Encoding" not in resp.headers
+        assert json.loads(resp.body)["result"] == ["item-0", "item-1"]
+
+    def test_no_accept_encoding_not_compressed(self):
+        resp = self._rpc(1000, "identity")
+        assert "Content-Encoding" not in resp.headers
+
+    def test_openapi_served_precompressed(self):
+        resp = self.fetch(
+            "/docs/openapi.json", headers={"Accept-Encoding": "br"}, decompress_response=False
+        )
+        assert resp.headers["Content-Encoding"] == "br"
+        assert resp.headers["Vary"] == "Accept-Encoding"
+        spec = json.loads(brotli.decompress(resp.body))
+        assert "/rpc/test.big_list" in spec["paths"]
+
+        plain = self.fetch("/docs/openapi.json", headers={"Accept-Encoding": "identity"})
+        assert json.loads(plain.body) == spec
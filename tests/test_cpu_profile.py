@@ -0,0 +1,106 @@
+"""Tests for woodglue.cpu_profile and system.start_profile."""
+
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.apps.system_api import build_system_namespace
+from woodglue.config import (
+    CpuProfileConfig,
+    NamespaceEntry,
+    WoodglueConfig,
+    WoodglueStorageConfig,
+)
+from woodglue.cpu_profile import CpuProfiler
+from woodglue.mount import MountContext
+from woodglue.token_store import ensure_token
+
+
+def spin(seconds: float) -> int:
+    """Burn CPU on the loop thread."""
+    end = time.monotonic() + seconds
+    n = 0
+    while time.monotonic() < end:
+        n += 1
+    return n
+
+
+class TestStartProfile(tornado.testing.AsyncHTTPTestCase):
+    tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    token: str  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        auth_db = tmp / "auth.db"
+        token = ensure_token(auth_db)
+        assert token is not None
+        self.token = token
+
+        ns = Namespace()
+        ns.register(spin, nsref="spin", tags=["api"])
+        namespaces = {"t": (ns, NamespaceEntry(gref="unused"))}
+        profiler = CpuProfiler(CpuProfileConfig(interval=0.002, max_duration=5))
+        system_ns = build_system_namespace(namespaces, None, cpu_profiler=profiler)
+        namespaces["system"] = (system_ns, NamespaceEntry(gref="builtin:system"))
+        config = WoodglueConfig(namespaces={}, storage=WoodglueStorageConfig(auth_db=auth_db))
+        mounts = {"system": MountContext("system", tmp / "mounts")}
+        return create_app(namespaces=namespaces, config=config, mounts=mounts)
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.tmp.cleanup()
+
+    async def _call(self, method: str, token: str | None = None, **params: Any) -> Any:
+        headers = {"Authorization": f"Bearer {token or self.token}"}
+        body = json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": 1})
+        resp = await self.http_client.fetch(
+            self.get_url("/rpc"), method="POST", body=body, headers=headers
+        )
+        return json.loads(resp.body)
+
+    @tornado.testing.gen_test(timeout=10)
+    async def test_profile_attributes_samples_to_methods(self):
+        profiling = asyncio.ensure_future(self._call("system.start_profile", duration=0.5))
+        await asyncio.sleep(0.05)
+        busy = await self._call("system.start_profile", duration=0.1)
+        assert busy["error"]["code"] == -32603
+        await self._call("t.spin", seconds=0.2)
+
+        profile = (await profiling)["result"]
+        assert profile["ticks"] > 0
+        assert profile["methods"]["t.spin"] > 0
+        stacks = profile["collapsed"].splitlines()
+        assert any(
+            s.startswith("rpc t.spin;") and "spin (test_cpu_profile.py:" in s for s in stacks
+        )
+        assert any(s.startswith("MainThread;") for s in stacks)
+
+    @tornado.testing.gen_test(timeout=10)
+    async def test_namespace_filter_and_save(self):
+        profiling = asyncio.ensure_future(
+            self._call("system.start_profile", duration=0.3, namespace="t", save=True)
+        )
+        await asyncio.sleep(0.05)
+        await self._call("t.spin", seconds=0.1)
+        profile = (await profiling)["result"]
+        assert profile["collapsed"] is None
+        path = Path(profile["path"])
+        assert path.parent == Path(self.tmp.name, "mounts", "system").resolve()
+        lines = path.read_text().splitlines()
+        assert lines and all(line.startswith("rpc t.spin;") for line in lines)
+
+    @tornado.testing.gen_test
+    async def test_requires_auth(self):
+        reply = await self._call("system.start_profile", token="wrong", duration=0.1)
+        assert reply["error"]["code"] == -32000
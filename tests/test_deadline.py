@@ -0,0 +1,112 @@
+"""Tests for woodglue.deadline and RPC deadline enforcement."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from pydantic import ValidationError
+from typing_extensions import override
+
+from woodglue.config import NamespaceEntry
+from woodglue.deadline import DEADLINE_HEADER, method_timeout, parse_timeout_header
+
+
+def test_method_timeout_picks_tightest_match() -> None:
+    entry = NamespaceEntry(gref="unused", timeout=30, timeouts={"report": 120, "ping": 1})
+    assert method_timeout(entry, "ping", ["api"]) == 1
+    assert method_timeout(entry, "build", ["api", "report"]) == 30
+    assert method_timeout(entry, "other", ["api"]) == 30
+    assert method_timeout(NamespaceEntry(gref="unused"), "ping", []) is None
+    assert method_timeout(None, "ping", []) is None
+    for bad in [0, -5]:
+        with pytest.raises(ValidationError):
+            NamespaceEntry(gref="unused", timeouts={"ping": bad})
+
+
+def test_parse_timeout_header_rejects_bad_values() -> None:
+    for bad in ["abc", "0", "-1"]:
+        try:
+            parse_timeout_header(bad)
+            raise AssertionError(f"Expected ValueError for {bad!r}")
+        except ValueError:
+            pass
+
+
+def _body(method: str, params: dict[str, Any] | None = None) -> str:
+    return json.dumps({"jsonrpc": "2.0", "method": method, "params": params or {}, "id": 1})
+
+
+class TestRpcDeadlines(tornado.testing.AsyncHTTPTestCase):
+    _started: asyncio.Event  # pyright: ignore[reportUninitializedInstanceVariable]
+    _cancelled: asyncio.Event  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+        from woodglue.deadline import remaining_budget
+
+        started = self._started = asyncio.Event()
+        cancelled = self._cancelled = asyncio.Event()
+
+        async def hang() -> str:
+            """Never returns on its own."""
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "unreachable"
+
+        def budget() -> float | None:
+            """Report the remaining budget."""
+            return remaining_budget()
+
+        ns = Namespace()
+        ns.register(hang, nsref="hang", tags=["api"])
+        ns.register(hang, nsref="hang_unbounded", tags=["api"])
+        ns.register(budget, nsref="budget", tags=["api"])
+        entry = NamespaceEntry(gref="unused", timeouts={"hang": 0.05})
+        return create_app(namespaces={"test": (ns, entry)})
+
+    def test_method_timeout_returns_deadline_error(self):
+        resp = self.fetch("/rpc", method="POST", body=_body("test.hang"))
+        data = json.loads(resp.body)
+        assert data["error"]["code"] == -32002
+        assert self._cancelled.is_set()
+
+    def test_remaining_budget_visible_to_method(self):
+        resp = self.fetch(
+            "/rpc", method="POST", body=_body("test.budget"), headers={DEADLINE_HEADER: "10"}
+        )
+        result = json.loads(resp.body)["result"]
+        assert 9 < result <= 10
+
+        resp = self.fetch("/rpc", method="POST", body=_body("test.budget"))
+        assert json.loads(resp.body)["result"] is None
+
+    def test_invalid_deadline_header(self):
+        resp = self.fetch(
+            "/rpc", method="POST", body=_body("test.budget"), headers={DEADLINE_HEADER: "soon"}
+        )
+        assert json.loads(resp.body)["error"]["code"] == -32600
+
+    @tornado.testing.gen_test
+    async def test_client_disconnect_cancels_call(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.get_http_port())
+        body = _body("test.hang_unbounded").encode()
+        writer.write(
+            b"POST /rpc HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        await self._started.wait()
+        writer.close()
+        await asyncio.wait_for(self._cancelled.wait(), 5)
+        del reader
@@ -0,0 +1,168 @@
+"""Tests for woodglue.http_cache and the per-method `/rpc/{prefix}.{method}` routes."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import tornado.testing
+from lythonic.compose.engine import StorageConfig
+from lythonic.compose.namespace import Namespace, NsCacheConfig
+from typing_extensions import override
+
+from woodglue.apps.llm_docs import generate_method_markdown, generate_openapi_spec
+from woodglue.apps.server import create_app
+from woodglue.config import AuthConfig, NamespaceEntry, WoodglueConfig, WoodglueStorageConfig
+from woodglue.token_store import ensure_token
+
+DAY = 86400.0
+
+calls: list[str] = []
+
+
+def add(a: int, b: int, label: str = "sum") -> dict[str, int]:
+    """Add two numbers."""
+    calls.append("add")
+    return {label: a + b}
+
+
+def square(n: int) -> int:
+    """Square a number (cached)."""
+    return n * n
+
+
+def record(note: str) -> int:
+    """Side-effecting call."""
+    calls.append(note)
+    return len(calls)
+
+
+def _namespace(tmp: str) -> Namespace:
+    ns = Namespace()
+    ns.register(add, nsref="add", tags=["api", "read_only"])
+    ns.register(
+        square,
+        nsref="square",
+        config=NsCacheConfig(
+            nsref="square", tags=["api", "pure"], min_ttl=60 / DAY, max_ttl=90 / DAY
+        ),
+    )
+    ns.register(record, nsref="record", tags=["api"])
+    storage = StorageConfig()
+    storage.resolve_paths(Path(tmp))
+    storage.log_file = None
+    ns.mount(storage)
+    return ns
+
+
+class TestMethodRoutes(tornado.testing.AsyncHTTPTestCase):
+    _tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        ns = _namespace(self._tmp.name)
+        return create_app(namespaces={"m": (ns, NamespaceEntry(gref="unused"))})
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self._tmp.cleanup()
+
+    def test_get_with_query_params_and_revalidation(self):
+        calls.clear()
+        resp = self.fetch("/rpc/m.add?a=2&b=3&label=7")
+        assert resp.code == 200
+        assert json.loads(resp.body) == {"7": 5}
+        assert resp.headers["Cache-Control"] == "public, no-cache"
+        assert resp.headers["Etag"].startswith('W/"')
+
+        again = self.fetch(
+            "/rpc/m.add?a=2&b=3&label=7", headers={"If-None-Match": resp.headers["Etag"]}
+        )
+        assert again.code == 304
+        assert again.body == b""
+        assert calls == ["add", "add"]  # revalidation still runs the method
+
+        other = self.fetch("/rpc/m.add?a=2&b=4", headers={"If-None-Match": resp.headers["Etag"]})
+        assert other.code == 200
+        assert json.loads(other.body) == {"sum": 6}
+
+    def test_cached_method_headers(self):
+        resp = self.fetch("/rpc/m.square?n=3")
+        assert json.loads(resp.body) == 9
+        assert resp.headers["Cache-Control"] == "public, max-age=60, stale-while-revalidate=30"
+        assert "Accept" in resp.headers["Vary"]
+
+    def test_post_route_returns_bare_result(self):
+        calls.clear()
+        resp = self.fetch("/rpc/m.record", method="POST", body=json.dumps({"note": "x"}))
+        assert resp.code == 200
+        assert json.loads(resp.body) == 1
+        assert "Etag" in resp.headers
+        positional = self.fetch("/rpc/m.add", method="POST", body=json.dumps([1, 2]))
+        assert json.loads(positional.body) == {"sum": 3}
+
+    def test_errors_map_to_http_status(self):
+        refused = self.fetch("/rpc/m.record?note=x")
+        assert refused.code == 405
+        assert refused.headers["Allow"] == "POST"
+        assert json.loads(refused.body)["error"]["code"] == -32600
+
+        assert self.fetch("/rpc/m.nope").code == 404
+        missing = self.fetch("/rpc/m.add?a=1")
+        assert missing.code == 400
+        assert json.loads(missing.body)["error"]["code"] == -32602
+        assert missing.headers["Cache-Control"] == "no-store"
+        bad_body = self.fetch("/rpc/m.add", method="POST", body="{not json")
+        assert bad_body.code == 400
+
+
+class TestMethodRoutesWithAuth(tornado.testing.AsyncHTTPTestCase):
+    _tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    _token: str | None  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        db = Path(self._tmp.name) / "auth.db"
+        self._token = ensure_token(db)
+        config = WoodglueConfig(
+            namespaces={},
+            auth=AuthConfig(enabled=True),
+            storage=WoodglueStorageConfig(auth_db=db),
+        )
+        ns = _namespace(self._tmp.name)
+        return create_app(namespaces={"m": (ns, NamespaceEntry(gref="unused"))}, config=config)
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self._tmp.cleanup()
+
+    def test_responses_are_private(self):
+        assert self.fetch("/rpc/m.add?a=1&b=1").code == 401
+        resp = self.fetch("/rpc/m.add?a=1&b=1", headers={"Authorization": f"Bearer {self._token}"})
+        assert resp.code == 200
+        assert resp.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_docs_describe_get() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        ns = _namespace(tmp)
+        index = {"m": {name: ns.get(name) for name in ("add", "record")}}
+        spec = generate_openapi_spec(index)
+        add_path = spec["paths"]["/rpc/m.add"]
+        assert set(add_path) == {"post", "get"}
+        assert "operationId" not in add_path["get"]
+        params = {p["name"]: p for p in add_path["get"]["parameters"]}
+        assert params["a"] == {
+            "name": "a",
+            "in": "query",
+            "required": True,
+            "schema": {"type": "integer"},
+        }
+        assert params["label"]["required"] is False
+        assert set(spec["paths"]["/rpc/m.record"]) == {"post"}
+
+        assert "`GET /rpc/m.add`" in generate_method_markdown("m", "add", index["m"]["add"])
+        assert "GET" not in generate_method_markdown("m", "record", index["m"]["record"])
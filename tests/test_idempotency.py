@@ -0,0 +1,221 @@
+"""Tests for woodglue.idempotency and idempotency keys on `/rpc`."""
+
+import asyncio
+import json
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+import msgpack
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.client import WoodglueClient
+from woodglue.config import IdempotencyConfig, NamespaceEntry, WoodglueConfig
+from woodglue.idempotency import IdempotencyStore
+
+
+class _Ledger:
+    def __init__(self) -> None:
+        self.charges: list[int] = []
+        self.flaky_calls: int = 0
+
+    async def charge(self, amount: int) -> dict[str, int]:
+        """Side-effecting call that takes a moment."""
+        await asyncio.sleep(0.05)
+        self.charges.append(amount)
+        return {"charge": len(self.charges), "amount": amount}
+
+    async def transfer(self, amount: int) -> int:
+        """Side-effecting call that takes a while."""
+        await asyncio.sleep(0.5)
+        self.charges.append(amount)
+        return amount
+
+    def flaky(self) -> int:
+        """Fails on the first call."""
+        self.flaky_calls += 1
+        if self.flaky_calls == 1:
+            raise RuntimeError("first call fails")
+        return self.flaky_calls
+
+
+class TestIdempotencyKeys(tornado.testing.AsyncHTTPTestCase):
+    tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    ledger: _Ledger  # pyright: ignore[reportUninitializedInstanceVariable]
+    store: IdempotencyStore  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ledger = _Ledger()
+        ns = Namespace()
+        ns.register(self.ledger.charge, nsref="charge", tags=["api"])
+        ns.register(self.ledger.flaky, nsref="flaky", tags=["api"])
+        ns.register(self.ledger.transfer, nsref="transfer", tags=["api"])
+        self.store = IdempotencyStore(IdempotencyConfig(), Path(self.tmp.name, "idem.db"))
+        return create_app(
+            namespaces={"pay": (ns, NamespaceEntry(gref="unused"))},
+            config=WoodglueConfig(namespaces={}),
+            idempotency=self.store,
+        )
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.store.close()
+        self.tmp.cleanup()
+
+    async def _post(self, body: Any, **headers: str) -> tuple[Any, Any]:
+        resp = await self.http_client.fetch(
+            self.get_url("/rpc"), method="POST", body=json.dumps(body), headers=headers
+        )
+        return json.loads(resp.body), resp.headers
+
+    def _call(self, method: str, request_id: int, key: str | None = None, **params: Any) -> Any:
+        body = {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id}
+        if key is not None:
+            body["idempotency_key"] = key
+        return body
+
+    @tornado.testing.gen_test
+    async def test_retry_replays_stored_response(self):
+        first, headers = await self._post(
+            self._call("pay.charge", 1, amount=5), **{"Idempotency-Key": "k1"}
+        )
+        retry, retry_headers = await self._post(
+            self._call("pay.charge", 2, amount=5), **{"Idempotency-Key": "k1"}
+        )
+        assert first["result"] == retry["result"] == {"charge": 1, "amount": 5}
+        assert retry["id"] == 2
+        assert "Idempotent-Replayed" not in headers
+        assert retry_headers["Idempotent-Replayed"] == "true"
+        assert self.ledger.charges == [5]
+
+        # Same key, other token: a separate call
+        await self._post(
+            self._call("pay.charge", 3, amount=5),
+            **{"Idempotency-Key": "k1", "Authorization": "Bearer other"},
+        )
+        assert self.ledger.charges == [5, 5]
+
+    @tornado.testing.gen_test
+    async def test_concurrent_duplicates_wait_for_first(self):
+        replies = await asyncio.gather(
+            *(self._post(self._call("pay.charge", i, key="k2", amount=7)) for i in range(3))
+        )
+        assert {r["result"]["charge"] for r, _ in replies} == {1}
+        assert [r["id"] for r, _ in replies] == [0, 1, 2]
+        assert self.ledger.charges == [7]
+        assert self.store.replayed == 2
+
+    @tornado.testing.gen_test
+    async def test_waiting_duplicate_keeps_its_deadline(self):
+        first = asyncio.ensure_future(self._post(self._call("pay.transfer", 1, key="t", amount=4)))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        retry, _ = await self._post(
+            self._call("pay.transfer", 2, key="t", amount=4), **{"X-Woodglue-Timeout": "0.1"}
+        )
+        assert retry["error"]["code"] == -32002
+        assert time.monotonic() - started < 0.4
+        reply, _ = await first
+        assert reply["result"] == 4
+        assert self.ledger.charges == [4]
+
+    @tornado.testing.gen_test
+    async def test_batch_items_and_conflicts(self):
+        batch = [
+            self._call("pay.charge", 1, key="a", amount=1),
+            self._call("pay.charge", 2, key="b", amount=2),
+        ]
+        await self._post(batch)
+        replies, _ = await self._post(batch)
+        assert [r["result"]["amount"] for r in replies] == [1, 2]
+        assert self.ledger.charges in ([1, 2], [2, 1])
+
+        conflict, _ = await self._post(self._call("pay.charge", 3, key="a", amount=9))
+        assert conflict["error"]["code"] == -32600
+        invalid, _ = await self._post(self._call("pay.charge", 4, key="has space", amount=1))
+        assert invalid["error"]["code"] == -32600
+        assert len(self.ledger.charges) == 2
+
+    @tornado.testing.gen_test
+    async def test_errors_are_not_stored(self):
+        failed, _ = await self._post(self._call("pay.flaky", 1, key="f"))
+        assert failed["error"]["code"] == -32603
+        retried, _ = await self._post(self._call("pay.flaky", 2, key="f"))
+        again, _ = await self._post(self._call("pay.flaky", 3, key="f"))
+        assert retried["result"] == again["result"] == 2
+
+    @tornado.testing.gen_test
+    async def test_key_reused_with_another_encoding_is_rejected(self):
+        body = msgpack.packb(self._call("pay.charge", 1, key="e", amount=2))
+        resp = await self.http_client.fetch(
+            self.get_url("/rpc"),
+            method="POST",
+            body=body,
+            headers={"Content-Type": "application/msgpack"},
+        )
+        assert msgpack.unpackb(resp.body)["result"]["amount"] == 2
+        again, _ = await self._post(self._call("pay.charge", 2, key="e", amount=2))
+        assert again["error"]["code"] == -32600
+        assert "encoding" in again["error"]["message"]
+        assert self.ledger.charges == [2]
+
+    @tornado.testing.gen_test
+    async def test_client_idempotency_key(self):
+        client = WoodglueClient(self.get_url(""))
+        first = await client.call("pay.charge", idempotency_key="c1", amount=3)
+        second = await client.call("pay.charge", idempotency_key="c1", amount=3)
+        assert first == second
+        assert self.ledger.charges == [3]
+
+
+def test_store_persists_and_expires() -> None:
+    calls: list[int] = []
+
+    async def call() -> dict[str, Any]:
+        calls.append(1)
+        return {"jsonrpc": "2.0", "result": len(calls), "id": 1}
+
+    async def run(store: IdempotencyStore) -> tuple[Any, bool]:
+        response, replayed = await store.run("", "t.m", "k", {}, "application/json", call)
+        assert response is not None
+        return response["result"], replayed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp, "idem.db")
+        store = IdempotencyStore(IdempotencyConfig(ttl=0.2), db)
+        assert asyncio.run(run(store)) == (1, False)
+        store.close()
+
+        reopened = IdempotencyStore(IdempotencyConfig(ttl=0.2, memory_entries=0), db)
+        assert asyncio.run(run(reopened)) == (1, True)
+        time.sleep(0.25)
+        assert reopened.purge() == 1
+        assert reopened.purge() == 0
+        assert asyncio.run(run(reopened)) == (2, False)
+        reopened.close()
+
+
+def test_purge_timer_removes_expired_responses() -> None:
+    async def scenario(store: IdempotencyStore) -> None:
+        async def call() -> dict[str, Any]:
+            return {"jsonrpc": "2.0", "result": 1, "id": 1}
+
+        await store.run("", "t.m", "k", {}, "application/json", call)
+        await asyncio.sleep(0.3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp, "idem.db")
+        store = IdempotencyStore(IdempotencyConfig(ttl=0.1, purge_interval=0.15), db)
+        asyncio.run(scenario(store))
+        store.close()
+        with closing(sqlite3.connect(db)) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
@@ -0,0 +1,180 @@
+"""Tests for woodglue.jobs async job mode."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.config import JobsConfig, NamespaceEntry
+from woodglue.jobs import JobManager, JobStore
+from woodglue.mount import MountContext, current_mount
+
+
+def test_job_store_marks_interrupted_jobs_failed() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "jobs.db"
+        store = JobStore(db_path)
+        store.create("ns:1", "ns.slow")
+        store.create("ns:2", "ns.slow")
+        store.finish("ns:2", "succeeded", result="42")
+
+        reopened = JobStore(db_path)
+        first = reopened.get("ns:1")
+        assert first is not None
+        assert first.status == "failed"
+        assert first.error == "Interrupted by server restart"
+        second = reopened.get("ns:2")
+        assert second is not None
+        assert second.status == "succeeded"
+        assert second.result == 42
+
+
+def test_job_store_purges_expired_finished_jobs() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(Path(tmp) / "jobs.db")
+        store.create("ns:old", "ns.m")
+        store.finish("ns:old", "succeeded", result="1")
+        store.create("ns:running", "ns.m")
+        with closing(sqlite3.connect(store.db_path)) as conn:
+            conn.execute("UPDATE jobs SET finished_at = '2000-01-01' WHERE job_id = 'ns:old'")
+            conn.commit()
+        assert store.purge_expired(60) == 1
+        assert store.get("ns:old") is None
+        assert store.get("ns:running") is not None
+
+
+def _body(method: str, params: dict[str, Any], async_job: bool = False) -> str:
+    body: dict[str, Any] = {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
+    if async_job:
+        body["async_job"] = True
+    return json.dumps(body)
+
+
+class TestAsyncJobs(tornado.testing.AsyncHTTPTestCase):
+    _tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    _jobs: JobManager  # pyright: ignore[reportUninitializedInstanceVariable]
+    _release: asyncio.Event  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        super().setUp()
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self._jobs.shutdown()
+        self._tmp.cleanup()
+
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+        from woodglue.apps.system_api import build_system_namespace
+
+        release = self._release = asyncio.Event()
+
+        def square(x: int) -> dict[str, Any]:
+            """Sync work, runs in the job thread pool."""
+            return {"square": x * x, "mount": current_mount.get().prefix}
+
+        async def wait_forever() -> str:
+            """Blocks until released."""
+            await release.wait()
+            return "released"
+
+        ns = Namespace()
+        ns.register(square, nsref="square", tags=["api"])
+        ns.register(wait_forever, nsref="wait_forever", tags=["api"])
+        namespaces = {"work": (ns, NamespaceEntry(gref="unused"))}
+        mounts_dir = Path(self._tmp.name) / "mounts"
+        mounts = {p: MountContext(p, mounts_dir) for p in ("work", "system")}
+        self._jobs = JobManager(JobsConfig(max_workers=2, max_pending=2), mounts)
+        system_ns = build_system_namespace(namespaces, None, jobs=self._jobs)
+        namespaces["system"] = (system_ns, NamespaceEntry(gref="builtin:system"))
+        return create_app(namespaces=namespaces, mounts=mounts, jobs=self._jobs)
+
+    async def _call(
+        self, method: str, params: dict[str, Any], async_job: bool = False, token: str = ""
+    ) -> Any:
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        resp = await self.http_client.fetch(
+            self.get_url("/rpc"),
+            method="POST",
+            body=_body(method, params, async_job),
+            headers=headers,
+        )
+        return json.loads(resp.body)
+
+    async def _drain(self) -> None:
+        tasks = list(self._jobs._tasks.values())  # pyright: ignore[reportPrivateUsage]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    @tornado.testing.gen_test
+    async def test_submit_sync_job_and_fetch_result(self):
+        data = await self._call("work.square", {"x": 7}, async_job=True)
+        job = data["result"]
+        assert job["job_id"].startswith("work:")
+        assert job["status"] == "pending"
+
+        await self._drain()
+        status = (await self._call("system.job_status", {"job_id": job["job_id"]}))["result"]
+        assert status["status"] == "succeeded"
+        assert "result" not in status
+        result = (await self._call("system.job_result", {"job_id": job["job_id"]}))["result"]
+        assert result["result"] == {"square": 49, "mount": "work"}
+        assert (Path(self._tmp.name) / "mounts" / "work" / "jobs.db").exists()
+
+    @tornado.testing.gen_test
+    async def test_cancel_and_queue_limit(self):
+        first = (await self._call("work.wait_forever", {}, async_job=True))["result"]
+        await self._call("work.wait_forever", {}, async_job=True)
+        rejected = await self._call("work.wait_forever", {}, async_job=True)
+        assert rejected["error"]["code"] == -32001
+
+        cancelled = (await self._call("system.cancel_job", {"job_id": first["job_id"]}))["result"]
+        assert cancelled["status"] == "cancelled"
+
+        self._release.set()
+        await self._drain()
+        assert self._jobs.in_flight == 0
+
+    @tornado.testing.gen_test
+    async def test_jobs_belong_to_their_token(self):
+        job = (await self._call("work.wait_forever", {}, async_job=True, token="ann"))["result"]
+        job_id = {"job_id": job["job_id"]}
+        for token in ("", "bob"):
+            assert "error" in await self._call("system.job_status", job_id, token=token)
+            assert "error" in await self._call("system.job_result", job_id, token=token)
+            assert "error" in await self._call("system.cancel_job", job_id, token=token)
+        assert self._jobs.in_flight == 1
+
+        status = (await self._call("system.job_status", job_id, token="ann"))["result"]
+        assert status["status"] == "running"
+        cancelled = (await self._call("system.cancel_job", job_id, token="ann"))["result"]
+        assert cancelled["status"] == "cancelled"
+
+    @tornado.testing.gen_test
+    async def test_purge_timer_removes_expired_jobs(self):
+        self._jobs.config = JobsConfig(result_ttl=0.01, purge_interval=0.05)
+        job = (await self._call("work.square", {"x": 2}, async_job=True))["result"]
+        await self._drain()
+        await asyncio.sleep(0.3)
+        db_path = Path(self._tmp.name) / "mounts" / "work" / "jobs.db"
+        with closing(sqlite3.connect(db_path)) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM jobs WHERE job_id = ?", (job["job_id"],))
+            assert rows.fetchone()[0] == 0
+
+    @tornado.testing.gen_test
+    async def test_unknown_job(self):
+        data = await self._call("system.job_status", {"job_id": "work:missing"})
+        assert data["error"]["code"] == -32603
@@ -1,5 +1,7 @@
 """Tests for woodglue.apps.llm_docs generation."""
 
+from typing import Any
+
 from lythonic.compose.namespace import Namespace
 from pydantic import BaseModel
 
@@ -147,3 +149,33 @@ def test_openapi_x_global_ref():
     add_op = spec["paths"]["/rpc/math.simple_add"]["post"]
     add_resp = add_op["responses"]["200"]["content"]["application/json"]["schema"]
     assert "x-global-ref" not in add_resp
+
+
+def find_items(label: str) -> list[ItemOut] | None:
+    """Find items by label."""
+    return [ItemOut(label=label, total=0)]
+
+
+def count_labels() -> dict[str, int]:
+    """Count items per label."""
+    return {}
+
+
+def test_openapi_generic_response_schema():
+    ns = Namespace()
+    ns.register(find_items, nsref="find_items", tags=["api"])
+    ns.register(count_labels, nsref="count_labels", tags=["api"])
+    spec = generate_openapi_spec(build_method_index({"items": (ns, NamespaceEntry(gref="x"))}))
+
+    def response(path: str) -> dict[str, Any]:
+        op = spec["paths"][path]["post"]
+        return op["responses"]["200"]["content"]["application/json"]["schema"]
+
+    schema = response("/rpc/items.find_items")
+    assert schema["anyOf"][0]["type"] == "array"
+    assert schema["anyOf"][0]["items"] == {"$ref": "#/$defs/ItemOut"}
+    assert schema["$defs"]["ItemOut"]["x-global-ref"].endswith(":ItemOut")
+    assert response("/rpc/items.count_labels") == {
+        "type": "object",
+        "additionalProperties": {"type": "integer"},
+    }
@@ -0,0 +1,130 @@
+"""Tests for woodglue.log_queue."""
+
+import logging
+import threading
+
+from typing_extensions import override
+
+from woodglue.config import LogQueueConfig
+from woodglue.log_queue import DroppingQueueHandler, LogQueue
+from woodglue.timing import RequestLogFilter, current_request_id
+
+
+class _Slow(logging.Handler):
+    """Records what it writes, and on which thread; can be held up."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+        self.threads: set[str] = set()
+        self.entered: threading.Event = threading.Event()
+        self.gate: threading.Event = threading.Event()
+        self.gate.set()
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        self.entered.set()
+        self.gate.wait(5)
+        self.threads.add(threading.current_thread().name)
+        self.records.append(record)
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(name)
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(handler)
+    return log
+
+
+def test_records_written_on_writer_thread_with_caller_context() -> None:
+    slow = _Slow()
+    slow.addFilter(RequestLogFilter())
+    slow.setFormatter(logging.Formatter("%(request_id)s %(message)s"))
+    log = _logger("tests.log_queue.context", slow)
+    queued = LogQueue(LogQueueConfig(), [log])
+    queued.start()
+    (front,) = log.handlers
+    assert isinstance(front, DroppingQueueHandler) and front.target is slow
+    assert slow.filters == []
+
+    token = current_request_id.set("req-7")
+    try:
+        log.info("hello %s", "world")
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            log.exception("failed")
+    finally:
+        current_request_id.reset(token)
+    queued.stop()
+
+    assert log.handlers == [slow]
+    assert len(slow.filters) == 1
+    assert threading.current_thread().name not in slow.threads
+    hello, failed = (slow.format(r) for r in slow.records)
+    assert hello == "req-7 hello world"
+    assert failed.startswith("req-7 failed\nTraceback")
+    assert "ValueError: bad" in failed
+    assert queued.stats().dropped == 0
+
+
+def test_full_queue_drops_and_counts() -> None:
+    slow = _Slow()
+    log = _logger("tests.log_queue.full", slow)
+    queued = LogQueue(LogQueueConfig(max_queue=2), [log])
+    queued.start()
+
+    slow.gate.clear()
+    log.info("first")
+    assert slow.entered.wait(5)  # writer holds "first", queue is empty again
+    for i in range(5):
+        log.info("burst %d", i)
+    stats = queued.stats()
+    assert (stats.queued, stats.dropped) == (2, 3)
+
+    slow.gate.set()
+    queued.stop()
+    messages = [r.getMessage() for r in slow.records]
+    assert messages == [
+        "first",
+        "Log queue full, dropped 3 records",
+        "burst 0",
+        "burst 1",
+    ]
+    assert slow.records[1].levelno == logging.WARNING
+
+
+class _Prefix(logging.Filter):
+    def __init__(self, prefix: str) -> None:
+        super().__init__()
+        self.prefix: str = prefix
+
+    @override
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.getMessage().startswith(self.prefix)
+
+
+def test_every_configured_logger_keeps_its_filters() -> None:
+    errors, access = _Slow(), _Slow()
+    errors.addFilter(_Prefix("error"))
+    access.addFilter(_Prefix("GET"))
+    log = _logger("tests.log_queue.errors", errors)
+    access_log = _logger("tests.log_queue.access", access)
+    queued = LogQueue(LogQueueConfig())
+    queued.start()
+    try:
+        assert isinstance(log.handlers[0], DroppingQueueHandler)
+        assert isinstance(access_log.handlers[0], DroppingQueueHandler)
+        for msg in ("error one", "GET /rpc", "other"):
+            log.info(msg)
+            access_log.info(msg)
+    finally:
+        queued.stop()
+        log.removeHandler(errors)
+        access_log.removeHandler(access)
+
+    assert [r.getMessage() for r in errors.records] == ["error one"]
+    assert [r.getMessage() for r in access.records] == ["GET /rpc"]
+    assert threading.current_thread().name not in errors.threads | access.threads
+    assert [f.prefix for f in errors.filters if isinstance(f, _Prefix)] == ["error"]
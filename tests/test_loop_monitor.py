@@ -0,0 +1,110 @@
+"""Tests for woodglue.loop_monitor, /healthz and load shedding."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.config import LoopMonitorConfig, NamespaceEntry
+from woodglue.loop_monitor import LoopMonitor
+
+
+def test_should_shed_only_tagged_calls_when_overloaded() -> None:
+    monitor = LoopMonitor(LoopMonitorConfig(shed_lag=0.5))
+    monitor.record(0.1)
+    assert not monitor.overloaded
+    assert not monitor.should_shed(frozenset({"api", "low_priority"}))
+
+    monitor.record(0.9)
+    assert monitor.overloaded
+    assert monitor.should_shed(frozenset({"api", "low_priority"}))
+    assert not monitor.should_shed(frozenset({"api"}))
+
+    stats = monitor.stats()
+    assert stats.shed == 1
+    assert stats.samples == 2
+    assert stats.max_lag == 0.9
+    assert stats.mean_lag == pytest.approx(0.5)
+
+
+def test_shedding_disabled_without_threshold() -> None:
+    monitor = LoopMonitor(LoopMonitorConfig(shed_lag=None))
+    monitor.record(100.0)
+    assert not monitor.overloaded
+
+
+async def test_monitor_samples_and_logs_stall(caplog: pytest.LogCaptureFixture) -> None:
+    monitor = LoopMonitor(LoopMonitorConfig(interval=0.01, stall_threshold=0.05))
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger="woodglue.loop_monitor"):
+            time.sleep(0.3)  # block the loop on purpose
+            await asyncio.sleep(0.02)
+    finally:
+        monitor.stop()
+    stats = monitor.stats()
+    assert stats.samples > 0
+    assert stats.stalls == 1
+    assert stats.max_lag >= 0.2
+    assert "test_monitor_samples_and_logs_stall" in caplog.text
+
+
+def low_priority_report() -> str:
+    """Expensive, may be shed."""
+    return "report"
+
+
+def ping() -> str:
+    """Cheap, never shed."""
+    return "pong"
+
+
+class TestHealthAndShedding(tornado.testing.AsyncHTTPTestCase):
+    _monitor: LoopMonitor  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+
+        ns = Namespace()
+        ns.register(low_priority_report, nsref="report", tags=["api", "low_priority"])
+        ns.register(ping, nsref="ping", tags=["api"])
+        self._monitor = LoopMonitor(LoopMonitorConfig(shed_lag=0.5))
+        return create_app(
+            namespaces={"test": (ns, NamespaceEntry(gref="unused"))}, loop_monitor=self._monitor
+        )
+
+    def _call(self, method: str) -> dict[str, object]:
+        body = json.dumps({"jsonrpc": "2.0", "method": method, "id": 1})
+        return json.loads(self.fetch("/rpc", method="POST", body=body).body)
+
+    def test_healthz_ok(self):
+        resp = self.fetch("/healthz")
+        assert resp.code == 200
+        assert json.loads(resp.body)["status"] == "ok"
+
+    def test_overloaded_healthz_and_shedding(self):
+        self._monitor.record(2.0)
+        resp = self.fetch("/healthz")
+        assert resp.code == 503
+        assert json.loads(resp.body)["status"] == "overloaded"
+
+        body = json.dumps({"jsonrpc": "2.0", "method": "test.report", "id": 1})
+        resp = self.fetch("/rpc", method="POST", body=body)
+        error = json.loads(resp.body)["error"]
+        assert error["code"] == -32003
+        assert error["data"]["retryable"] is True
+        assert resp.headers["Retry-After"] == "2"
+
+        assert self._call("test.ping")["result"] == "pong"
+
+        self._monitor.record(0.0)
+        assert self._call("test.report")["result"] == "report"
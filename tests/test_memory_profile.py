@@ -0,0 +1,140 @@
+"""Tests for woodglue.memory_profile and the system.memory_profile methods."""
+
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.apps.system_api import build_system_namespace
+from woodglue.config import (
+    MemoryProfileConfig,
+    NamespaceEntry,
+    WoodglueConfig,
+    WoodglueStorageConfig,
+)
+from woodglue.memory_profile import CALL, SERIALIZE, MemoryProfiler
+from woodglue.token_store import ensure_token
+
+MB = 1024 * 1024
+
+_kept: list[bytes] = []
+
+
+def hoard() -> int:
+    """Keep 1 MB alive after a 4 MB temporary."""
+    temp = bytes(4 * MB)
+    _kept.append(bytes(MB))
+    return len(temp)
+
+
+def rows(n: int) -> list[dict[str, int]]:
+    """A result that is costly to serialize."""
+    return [{"i": i} for i in range(n)]
+
+
+def test_measure_peak_and_retained():
+    profiler = MemoryProfiler(MemoryProfileConfig())
+    assert not profiler.sampled()
+    profiler.enable(sample_rate=1.0)
+    try:
+        assert profiler.sampled()
+        kept: list[bytes] = []
+        for _ in range(2):
+            with profiler.measure("t.hoard", CALL):
+                temp = bytes(4 * MB)
+                kept.append(bytes(MB))
+                del temp
+            with profiler.measure("t.hoard", SERIALIZE):
+                pass
+        (stats,) = profiler.stats().methods
+        assert stats.samples == 2
+        # Peaks are relative to the traced total at entry, which other
+        # tracers (e.g. coverage) can shift by a few bytes either way
+        assert 4.9 * MB <= stats.call.max_peak < 6 * MB
+        assert 0.99 * MB <= stats.call.max_retained < 1.1 * MB
+        assert stats.call.total_retained >= 2 * MB
+        assert stats.serialize.max_peak < 0.1 * MB
+
+        top = profiler.stats(top=3).top_sites
+        assert len(top) == 3 and top[0].size >= top[1].size
+
+        profiler.reset()
+        assert profiler.stats().methods == []
+    finally:
+        profiler.disable()
+    assert not tracemalloc.is_tracing()
+    with profiler.measure("t.hoard", CALL):
+        pass
+    assert profiler.stats().samples == 0
+
+
+class TestMemoryProfileRpc(tornado.testing.AsyncHTTPTestCase):
+    profiler: MemoryProfiler  # pyright: ignore[reportUninitializedInstanceVariable]
+    tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    token: str  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        auth_db = Path(self.tmp.name) / "auth.db"
+        token = ensure_token(auth_db)
+        assert token is not None
+        self.token = token
+
+        ns = Namespace()
+        ns.register(hoard, nsref="hoard", tags=["api"])
+        ns.register(rows, nsref="rows", tags=["api"])
+        namespaces = {"t": (ns, NamespaceEntry(gref="unused"))}
+        self.profiler = MemoryProfiler(MemoryProfileConfig())
+        system_ns = build_system_namespace(namespaces, None, memory_profiler=self.profiler)
+        namespaces["system"] = (system_ns, NamespaceEntry(gref="builtin:system"))
+        config = WoodglueConfig(namespaces={}, storage=WoodglueStorageConfig(auth_db=auth_db))
+        return create_app(namespaces=namespaces, config=config, memory_profiler=self.profiler)
+
+    @override
+    def tearDown(self) -> None:
+        self.profiler.disable()
+        _kept.clear()
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def _reply(self, method: str, token: str | None = None, **params: Any) -> Any:
+        headers = {"Authorization": f"Bearer {token or self.token}"}
+        body = json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": 1})
+        return json.loads(self.fetch("/rpc", method="POST", body=body, headers=headers).body)
+
+    def _call(self, method: str, **params: Any) -> Any:
+        reply = self._reply(method, **params)
+        assert "error" not in reply, reply
+        return reply["result"]
+
+    def test_toggle_at_runtime(self):
+        self._call("t.hoard")
+        assert self._call("system.memory_profile")["samples"] == 0
+
+        stats = self._call("system.set_memory_profile", enabled=True, sample_rate=1.0)
+        assert stats["enabled"] is True and stats["sample_rate"] == 1.0
+        self._call("t.hoard")
+        self._call("t.rows", n=10_000)
+
+        stats = self._call("system.memory_profile")
+        by_method = {m["method"]: m for m in stats["methods"]}
+        # methods come sorted by peak call allocation
+        assert stats["methods"][0]["method"] == "t.hoard"
+        assert by_method["t.hoard"]["call"]["max_retained"] >= MB
+        assert by_method["t.rows"]["serialize"]["max_retained"] > 0
+
+        stats = self._call("system.set_memory_profile", enabled=False, reset=True)
+        assert stats["enabled"] is False and stats["methods"] == []
+        assert not tracemalloc.is_tracing()
+
+    def test_toggle_requires_auth(self):
+        reply = self._reply("system.set_memory_profile", token="wrong", enabled=True)
+        assert reply["error"]["code"] == -32000
+        assert not tracemalloc.is_tracing()
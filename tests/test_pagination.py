@@ -0,0 +1,143 @@
+"""Tests for woodglue.pagination: cursor paging in the dispatcher, docs and client."""
+
+import json
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from pydantic import BaseModel, ValidationError
+from typing_extensions import override
+
+from woodglue.apps.llm_docs import generate_method_markdown, generate_openapi_spec
+from woodglue.apps.server import create_app
+from woodglue.client import WoodglueClient
+from woodglue.config import NamespaceEntry, PaginationConfig, WoodglueConfig
+from woodglue.pagination import Page, decode_cursor, encode_cursor
+
+
+class Item(BaseModel):
+    n: int
+
+
+consumed: list[int] = []
+
+
+def numbers(count: int) -> Iterator[Item]:
+    """Generate `count` items lazily."""
+    for n in range(count):
+        consumed.append(n)
+        yield Item(n=n)
+
+
+def letters(limit: int = 2, cursor: str | None = None) -> Page[str]:
+    """Pages through the alphabet by itself, keyed on the last letter."""
+    after = decode_cursor(cursor)["after"] if cursor else "`"
+    items = [chr(c) for c in range(ord(after) + 1, min(ord(after) + 1 + limit, ord("z") + 1))]
+    last = items[-1] if items else "z"
+    return Page(items=items, next_cursor=encode_cursor({"after": last}) if last < "z" else None)
+
+
+limits_seen: list[int] = []
+
+
+def top(limit: int) -> list[int]:
+    """At most `limit` of the numbers 0-7; declares `limit` but not `cursor`."""
+    limits_seen.append(limit)
+    return list(range(min(limit, 8)))
+
+
+def _namespace() -> Namespace:
+    ns = Namespace()
+    ns.register(numbers, nsref="numbers", tags=["api", "paginated"])
+    ns.register(letters, nsref="letters", tags=["api", "paginated"])
+    ns.register(top, nsref="top", tags=["api", "paginated"])
+    return ns
+
+
+class TestPagination(tornado.testing.AsyncHTTPTestCase):
+    @override
+    def get_app(self):
+        config = WoodglueConfig(
+            namespaces={}, pagination=PaginationConfig(default_limit=3, max_limit=5)
+        )
+        return create_app(
+            namespaces={"p": (_namespace(), NamespaceEntry(gref="unused"))}, config=config
+        )
+
+    def _call(self, method: str, **params: Any) -> Any:
+        body = {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
+        resp = self.fetch("/rpc", method="POST", body=json.dumps(body))
+        return json.loads(resp.body)
+
+    def test_dispatcher_pages_iterables(self):
+        consumed.clear()
+        first = self._call("p.numbers", count=100)["result"]
+        assert first["items"] == [{"n": 0}, {"n": 1}, {"n": 2}]
+        assert consumed == [0, 1, 2, 3]  # read one past the page, not the whole result
+
+        second = self._call("p.numbers", count=100, limit=50, cursor=first["next_cursor"])
+        assert [i["n"] for i in second["result"]["items"]] == [3, 4, 5, 6, 7]
+
+        last = self._call("p.numbers", count=4, cursor=first["next_cursor"])["result"]
+        assert last == {"items": [{"n": 3}], "next_cursor": None}
+
+    def test_bad_limit_or_cursor(self):
+        assert self._call("p.numbers", count=5, limit=0)["error"]["code"] == -32602
+        assert self._call("p.numbers", count=5, cursor="!!")["error"]["code"] == -32602
+        bad_offset = encode_cursor({"offset": -1})
+        assert self._call("p.numbers", count=5, cursor=bad_offset)["error"]["code"] == -32602
+
+    def test_method_pages_itself(self):
+        first = self._call("p.letters")["result"]
+        assert first["items"] == ["a", "b", "c"]
+        capped = self._call("p.letters", limit=100, cursor=first["next_cursor"])["result"]
+        assert capped["items"] == ["d", "e", "f", "g", "h"]
+
+    def test_declared_limit_reads_through_the_page(self):
+        limits_seen.clear()
+        first = self._call("p.top")["result"]
+        assert first["items"] == [0, 1, 2]
+        second = self._call("p.top", cursor=first["next_cursor"])["result"]
+        assert second["items"] == [3, 4, 5]
+        last = self._call("p.top", cursor=second["next_cursor"])["result"]
+        assert last == {"items": [6, 7], "next_cursor": None}
+        assert self._call("p.top", limit=100)["result"]["items"] == [0, 1, 2, 3, 4]
+        assert limits_seen == [4, 7, 10, 6]
+
+    @tornado.testing.gen_test
+    async def test_client_iterates_pages(self):
+        client = WoodglueClient(self.get_url(""))
+        await client.load_spec()
+        pages = [page async for page in client.pages("p.numbers", limit=4, count=10)]
+        assert [len(page) for page in pages] == [4, 4, 2]
+        assert pages[0][0] == Item(n=0)
+
+        letters_seen = [x async for page in client.pages("p.letters", limit=5) for x in page]
+        assert "".join(letters_seen) == "abcdefghijklmnopqrstuvwxyz"
+
+
+def test_default_limit_within_max() -> None:
+    with pytest.raises(ValidationError):
+        PaginationConfig(default_limit=50, max_limit=10)
+
+
+def test_docs_describe_pagination() -> None:
+    index = {"p": {"numbers": _namespace().get("numbers"), "letters": _namespace().get("letters")}}
+    spec = generate_openapi_spec(index)
+    numbers_op = spec["paths"]["/rpc/p.numbers"]["post"]
+    assert numbers_op["x-paginated"] is True
+    params = numbers_op["requestBody"]["content"]["application/json"]["schema"]["properties"]
+    assert set(params) == {"count", "limit", "cursor"}
+    response = numbers_op["responses"]["200"]["content"]["application/json"]["schema"]
+    assert set(response["properties"]) == {"items", "next_cursor"}
+    assert "Item" in response["$defs"]
+
+    letters_op = spec["paths"]["/rpc/p.letters"]["post"]
+    letters_params = letters_op["requestBody"]["content"]["application/json"]["schema"]
+    assert set(letters_params["properties"]) == {"limit", "cursor"}
+
+    markdown = generate_method_markdown("p", "numbers", index["p"]["numbers"])
+    assert "| cursor | str | no |" in markdown
+    assert "`Page[Item]`" in markdown
@@ -0,0 +1,97 @@
+"""Tests for woodglue.replay."""
+
+import asyncio
+import time
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.capture import CaptureRecord
+from woodglue.client import WoodglueClient
+from woodglue.config import NamespaceEntry, WoodglueConfig
+from woodglue.replay import ReplayConfig, format_replay, run_replay
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+async def nap(seconds: float) -> float:
+    """Sleep a little."""
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+def route(method: str, policy: str) -> str:
+    """Params named like `WoodglueClient.call()` options."""
+    return f"{method}/{policy}"
+
+
+def _records() -> list[CaptureRecord]:
+    start = 1_700_000_000.0
+    records = [
+        CaptureRecord(
+            t=start + i * 0.05, method="t.add", params={"a": i, "b": 1}, duration=0.001, size=40
+        )
+        for i in range(8)
+    ]
+    records.append(
+        CaptureRecord(
+            t=start + 0.1, method="t.nap", params={"seconds": 0.01}, duration=0.01, size=40
+        )
+    )
+    records.append(
+        CaptureRecord(t=start + 0.2, method="t.gone", duration=0.0, size=60, error=-32601)
+    )
+    return records
+
+
+class TestReplay(tornado.testing.AsyncHTTPTestCase):
+    @override
+    def get_app(self):
+        ns = Namespace()
+        ns.register(add, nsref="add", tags=["api"])
+        ns.register(nap, nsref="nap", tags=["api"])
+        ns.register(route, nsref="route", tags=["api"])
+        entry = NamespaceEntry(gref="unused")
+        config = WoodglueConfig(namespaces={"t": entry})
+        return create_app(namespaces={"t": (ns, entry)}, config=config)
+
+    @tornado.testing.gen_test
+    async def test_paced_replay_keeps_relative_timing(self):
+        client = WoodglueClient(self.get_url(""))
+        started = time.monotonic()
+        result = await run_replay(client, reversed(_records()), ReplayConfig(speed=2.0))
+        # the captured span is 0.35s; at 2x it takes about half that
+        assert 0.17 <= time.monotonic() - started < 1.0
+        assert result.requests == 10
+        assert set(result.methods) == {"t.add", "t.gone", "t.nap"}
+        assert result.methods["t.add"].requests == 8
+        assert result.methods["t.add"].errors == 0
+        assert result.methods["t.nap"].latency.min >= 10
+        assert result.methods["t.nap"].captured.p50 == 10
+        assert result.methods["t.gone"].errors == 1
+        assert result.error_kinds == {"rpc -32601": 1}
+        assert "t.nap" in format_replay(result)
+
+    @tornado.testing.gen_test
+    async def test_unpaced_replay(self):
+        client = WoodglueClient(self.get_url(""))
+        started = time.monotonic()
+        result = await run_replay(client, _records(), ReplayConfig(speed=None, concurrency=4))
+        assert time.monotonic() - started < 0.3
+        assert result.requests == 10
+        assert result.errors == 1
+
+    @tornado.testing.gen_test
+    async def test_params_named_like_call_options(self):
+        client = WoodglueClient(self.get_url(""))
+        record = CaptureRecord(
+            t=0.0, method="t.route", params={"method": "GET", "policy": "strict"}, duration=0.001
+        )
+        result = await run_replay(client, [record], ReplayConfig(speed=None))
+        assert (result.requests, result.errors) == (1, 0)
+        assert await client.call_params("t.route", {"method": "a", "policy": "b"}) == "a/b"
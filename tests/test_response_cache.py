@@ -0,0 +1,181 @@
+"""Tests for woodglue.response_cache and the client response cache."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+import tornado.testing
+import tornado.web
+from lythonic.compose.engine import StorageConfig
+from lythonic.compose.namespace import Namespace, NsCacheConfig
+from typing_extensions import override
+
+from woodglue.client import WoodglueClient
+from woodglue.config import NamespaceEntry, WoodglueConfig
+from woodglue.response_cache import CacheHint, ResponseCache, cache_key
+
+DAY = 86400.0
+
+
+def shout(word: str) -> str:
+    """Upper-case a word (cached)."""
+    return word.upper()
+
+
+def whisper(word: str) -> str:
+    """Lower-case a word (not cached)."""
+    return word.lower()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_fresh_stale_expired() -> None:
+    clock = FakeClock()
+    cache = ResponseCache(clock=clock)
+    cache.put("k", 1, CacheHint(max_age=10, stale_while_revalidate=5))
+    assert cache.get("k") == (1, False)
+    clock.now += 12
+    assert cache.get("k") == (1, True)
+    clock.now += 5
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert (stats.hits, stats.stale_hits, stats.misses, stats.entries) == (1, 1, 1, 0)
+
+
+def test_lru_eviction() -> None:
+    cache = ResponseCache(max_entries=2)
+    hint = CacheHint(max_age=60)
+    cache.put("a", 1, hint)
+    cache.put("b", 2, hint)
+    assert cache.get("a") == (1, False)
+    cache.put("c", 3, hint)
+    assert cache.get("b") is None
+    assert cache.get("a") == (1, False)
+    assert cache.stats().evictions == 1
+
+
+def test_results_are_copied() -> None:
+    cache = ResponseCache()
+    result = {"items": [1]}
+    cache.put("k", result, CacheHint(max_age=60))
+    result["items"].append(2)
+    hit = cache.get("k")
+    assert hit is not None
+    hit[0]["items"].append(3)
+    assert cache.get("k") == ({"items": [1]}, False)
+
+
+def test_cache_key_is_canonical() -> None:
+    assert cache_key("m", {"a": 1, "b": 2}) == cache_key("m", {"b": 2, "a": 1})
+    assert cache_key("m", {"a": 1}) != cache_key("n", {"a": 1})
+    with pytest.raises(ValueError):
+        ResponseCache(max_entries=0)
+
+
+class TestClientResponseCache(tornado.testing.AsyncHTTPTestCase):
+    _tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    posts: int  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        super().setUp()
+
+    @override
+    def tearDown(self):
+        super().tearDown()
+        self._tmp.cleanup()
+
+    @override
+    def get_app(self):
+        from woodglue.apps.server import create_app
+
+        ns = Namespace()
+        ns.register(
+            shout,
+            nsref="shout",
+            config=NsCacheConfig(nsref="shout", tags=["api"], min_ttl=60 / DAY, max_ttl=90 / DAY),
+        )
+        ns.register(whisper, nsref="whisper", tags=["api"])
+        storage = StorageConfig()
+        storage.resolve_paths(Path(self._tmp.name))
+        storage.log_file = None
+        ns.mount(storage)
+        config = WoodglueConfig(namespaces={"t": NamespaceEntry(gref="unused")})
+        app = create_app(namespaces={"t": (ns, NamespaceEntry(gref="unused"))}, config=config)
+        self.posts = 0
+
+        def count(handler: tornado.web.RequestHandler) -> None:
+            if handler.request.method == "POST":
+                self.posts += 1
+
+        app.settings["log_function"] = count
+        return app
+
+    def test_server_advertises_cache_hints(self):
+        body = json.dumps({"jsonrpc": "2.0", "method": "t.shout", "params": ["a"], "id": 1})
+        resp = self.fetch("/rpc", method="POST", body=body)
+        assert resp.headers["Cache-Control"] == "private, max-age=60, stale-while-revalidate=30"
+        body = json.dumps({"jsonrpc": "2.0", "method": "t.whisper", "params": ["A"], "id": 1})
+        assert "Cache-Control" not in self.fetch("/rpc", method="POST", body=body).headers
+
+        spec = json.loads(self.fetch("/docs/openapi.json").body)
+        hint = spec["paths"]["/rpc/t.shout"]["post"]["x-cache"]
+        assert hint == {"max_age": 60.0, "stale_while_revalidate": 30.0}
+        assert "x-cache" not in spec["paths"]["/rpc/t.whisper"]["post"]
+
+    @tornado.testing.gen_test
+    async def test_hits_skip_the_network(self):
+        client = WoodglueClient(self.get_url(""), response_cache=ResponseCache())
+        assert await client.call("t.shout", word="hi") == "HI"
+        assert await client.call("t.shout", word="hi") == "HI"
+        assert await client.call("t.shout", word="yo") == "YO"
+        assert await client.call("t.whisper", word="HI") == "hi"
+        assert await client.call("t.whisper", word="HI") == "hi"
+        assert self.posts == 4
+
+    @tornado.testing.gen_test
+    async def test_shared_cache_keeps_callers_apart(self):
+        cache = ResponseCache()
+        alice = WoodglueClient(self.get_url(""), token="alice", response_cache=cache)
+        bob = WoodglueClient(self.get_url(""), token="bob", response_cache=cache)
+        assert await alice.call("t.shout", word="hi") == "HI"
+        assert await bob.call("t.shout", word="hi") == "HI"
+        assert await alice.call("t.shout", word="hi") == "HI"
+        assert self.posts == 2
+        assert cache.stats().entries == 2
+
+    @tornado.testing.gen_test
+    async def test_spec_hints_enable_cache_from_first_call(self):
+        cache = ResponseCache()
+        client = WoodglueClient(self.get_url(""), response_cache=cache)
+        await client.load_spec()
+        key = cache_key("t.shout", {"word": "x"}, client.base_url)
+        cache.put(key, "FROM-CACHE", CacheHint(max_age=60))
+        assert await client.call("t.shout", word="x") == "FROM-CACHE"
+        assert self.posts == 0
+
+    @tornado.testing.gen_test
+    async def test_stale_served_while_revalidating(self):
+        clock = FakeClock()
+        cache = ResponseCache(clock=clock)
+        client = WoodglueClient(self.get_url(""), response_cache=cache)
+        assert await client.call("t.shout", word="hi") == "HI"
+        key = cache_key("t.shout", {"word": "hi"}, client.base_url)
+        cache.put(key, "OLD", CacheHint(max_age=60, stale_while_revalidate=30))
+        clock.now += 70
+        assert await client.call("t.shout", word="hi") == "OLD"
+        await asyncio.gather(*client._refreshing.values())  # pyright: ignore[reportPrivateUsage]
+        assert self.posts == 2
+        assert await client.call("t.shout", word="hi") == "HI"
+        assert cache.stats().stale_hits == 1
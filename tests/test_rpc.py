@@ -142,6 +142,35 @@ class TestJsonRpc(tornado.testing.AsyncHTTPTestCase):
         assert data["result"] == {"sum": 3}
         assert data["id"] is None
 
+    def test_batch_call(self):
+        body = json.dumps(
+            [
+                json.loads(_rpc_body("test.sync_add", {"a": 1, "b": 2}, 1)),
+                json.loads(_rpc_body("test.missing", {}, 2)),
+                json.loads(_rpc_body("test.async_greet", ["Bob"], 3)),
+                {"jsonrpc": "2.0", "id": 4},
+            ]
+        )
+        resp = self.fetch("/rpc", method="POST", body=body)
+        assert resp.code == 200
+        data = json.loads(resp.body)
+        assert [r["id"] for r in data] == [1, 2, 3, 4]
+        assert data[0]["result"] == {"sum": 3}
+        assert data[1]["error"]["code"] == -32601
+        assert data[2]["result"] == "Hello, Bob!"
+        assert data[3]["error"]["code"] == -32600
+
+    def test_empty_batch_is_invalid(self):
+        resp = self.fetch("/rpc", method="POST", body="[]")
+        assert json.loads(resp.body)["error"]["code"] == -32600
+
+    def test_oversized_batch_is_invalid(self):
+        from woodglue.apps.rpc import MAX_BATCH_SIZE
+
+        call = json.loads(_rpc_body("test.sync_add", {"a": 1, "b": 2}))
+        resp = self.fetch("/rpc", method="POST", body=json.dumps([call] * (MAX_BATCH_SIZE + 1)))
+        assert json.loads(resp.body)["error"]["code"] == -32600
+
 
 def _make_multi_namespace() -> dict[str, tuple[Namespace, NamespaceEntry]]:
     ns1 = Namespace()
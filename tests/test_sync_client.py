@@ -0,0 +1,134 @@
+"""Tests for woodglue.sync_client.SyncWoodglueClient."""
+
+import asyncio
+import importlib.util
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import tornado.httpserver
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from pydantic import ValidationError
+
+from woodglue.apps.server import create_app
+from woodglue.client import ClientPoolConfig, WoodglueClient, WoodglueRpcError
+from woodglue.config import NamespaceEntry, WoodglueConfig
+from woodglue.hello import HelloOut, pydantic_hello
+from woodglue.sync_client import SyncWoodglueClient, default_pool
+
+
+def double(n: int) -> int:
+    """Double a number."""
+    return n * 2
+
+
+@pytest.fixture(scope="module")
+def server_url() -> Iterator[str]:
+    """A woodglue server on its own loop thread, so blocking calls can reach it."""
+    ns = Namespace()
+    ns.register(double, nsref="double", tags=["api"])
+    ns.register(pydantic_hello, nsref="pydantic_hello", tags=["api"])
+    config = WoodglueConfig(namespaces={"t": NamespaceEntry(gref="unused")})
+    app = create_app(namespaces={"t": (ns, NamespaceEntry(gref="unused"))}, config=config)
+    app.settings["log_function"] = lambda _handler: None  # pyright: ignore[reportUnknownLambdaType]
+    sock, port = tornado.testing.bind_unused_port()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+
+        async def serve() -> None:
+            server = tornado.httpserver.HTTPServer(app)
+            server.add_sockets([sock])
+            started.set()
+
+        loop.run_until_complete(serve())
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+    yield f"http://127.0.0.1:{port}"
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_call_with_typed_resolution(server_url: str):
+    with SyncWoodglueClient(server_url) as client:
+        assert client.call("t.double", n=21) == 42
+        client.load_spec(strict=True)
+        out = client.call("t.pydantic_hello", input={"name": "Ann", "age": 3})
+        assert isinstance(out, HelloOut)
+        assert out.eman == "nnA"
+
+
+def test_call_many_batches(server_url: str):
+    with SyncWoodglueClient(server_url) as client:
+        results = client.call_many([("t.double", {"n": i}) for i in range(10)])
+        assert results == [i * 2 for i in range(10)]
+        assert client.stats().requests == 1
+
+
+def test_call_many_pipelines_without_batch(server_url: str):
+    with SyncWoodglueClient(server_url) as client:
+        results = client.call_many([("t.double", {"n": i}) for i in range(5)], batch=False)
+        assert results == [i * 2 for i in range(5)]
+        assert client.stats().requests == 5
+
+
+def test_call_many_return_exceptions(server_url: str):
+    with SyncWoodglueClient(server_url) as client:
+        calls = [("t.double", {"n": 1}), ("t.missing", {}), ("t.double", {"n": 2})]
+        results = client.call_many(calls, return_exceptions=True)
+        assert results[0] == 2 and results[2] == 4
+        assert isinstance(results[1], WoodglueRpcError)
+        with pytest.raises(WoodglueRpcError):
+            client.call_many(calls)
+
+
+def test_shared_between_threads(server_url: str):
+    with SyncWoodglueClient(server_url) as client, ThreadPoolExecutor(8) as pool:
+
+        def call(n: int) -> int:
+            return client.call("t.double", n=n)
+
+        results = list(pool.map(call, range(40)))
+    assert results == [n * 2 for n in range(40)]
+
+
+def test_closed_client_rejects_calls(server_url: str):
+    client = SyncWoodglueClient(server_url)
+    client.close()
+    client.close()
+    with pytest.raises(RuntimeError):
+        client.call("t.double", n=1)
+
+
+def test_async_call_many_respects_batch_size(server_url: str):
+    async def run() -> tuple[list[int], int]:
+        client = WoodglueClient(server_url, batch_size=4, pool=ClientPoolConfig())
+        try:
+            results = await client.call_many([("t.double", {"n": i}) for i in range(10)])
+            return results, client.stats().requests
+        finally:
+            client.close()
+
+    assert asyncio.run(run()) == ([i * 2 for i in range(10)], 3)
+
+
+def test_default_pool_needs_pycurl_for_reuse():
+    if importlib.util.find_spec("pycurl") is not None:
+        assert default_pool().backend == "curl"
+        return
+    with pytest.warns(RuntimeWarning, match="woodglue\\[curl\\]"):
+        pool = default_pool()
+    assert (pool.backend, pool.keep_alive) == ("simple", None)
+
+
+def test_keep_alive_requires_curl():
+    with pytest.raises(ValidationError):
+        ClientPoolConfig(keep_alive=True)
+    assert ClientPoolConfig(keep_alive=False).keep_alive is False
@@ -101,6 +101,17 @@ def test_build_system_namespace_has_all_methods() -> None:
         "list_namespaces",
         "list_methods",
         "describe_method",
+        "concurrency_stats",
+        "loop_stats",
+        "log_stats",
+        "memory_profile",
+        "set_memory_profile",
+        "traces",
+        "trace_spans",
+        "start_profile",
+        "job_status",
+        "job_result",
+        "cancel_job",
         "recent_runs",
         "active_runs",
         "inspect_run",
@@ -0,0 +1,104 @@
+"""Tests for woodglue.timing: Server-Timing, request ids and access logs."""
+
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import tornado.testing
+from lythonic.compose.namespace import Namespace
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.client import WoodglueClient, server_timing
+from woodglue.config import NamespaceEntry, TimingConfig, WoodglueConfig
+from woodglue.mount import MountContext
+from woodglue.timing import install_request_log_filter, parse_server_timing
+
+logger = logging.getLogger("tests.test_timing")
+
+
+class _Records(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def greet(name: str) -> str:
+    """Say hello, and log it."""
+    logger.info("greeting %s", name)
+    return f"Hello, {name}!"
+
+
+class TestServerTiming(tornado.testing.AsyncHTTPTestCase):
+    tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        ns = Namespace()
+        ns.register(greet, nsref="greet", tags=["api"])
+        config = WoodglueConfig(namespaces={}, timing=TimingConfig(access_log_sample_rate=1.0))
+        mounts = {"t": MountContext("t", Path(self.tmp.name))}
+        return create_app(
+            namespaces={"t": (ns, NamespaceEntry(gref="unused"))}, config=config, mounts=mounts
+        )
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def _post(self, body: Any, **headers: str):
+        return self.fetch("/rpc", method="POST", body=json.dumps(body), headers=headers)
+
+    def test_server_timing_and_access_log(self):
+        call = {"jsonrpc": "2.0", "method": "t.greet", "params": {"name": "Ann"}, "id": 1}
+        with self.assertLogs("woodglue.access", logging.INFO) as logs:
+            resp = self._post(call, **{"X-Request-Id": "req-1"})
+        assert json.loads(resp.body)["result"] == "Hello, Ann!"
+        assert resp.headers["X-Request-Id"] == "req-1"
+        phases = parse_server_timing(resp.headers["Server-Timing"])
+        assert list(phases) == ["parse", "validate", "call", "serialize", "total"]
+        assert phases["total"] >= phases["call"] > 0
+
+        (record,) = logs.records
+        access = json.loads(record.getMessage())
+        assert access["request_id"] == "req-1"
+        assert access["methods"] == ["t.greet"]
+        assert access["status"] == 200
+        assert set(access["ms"]) == set(phases)
+
+        resp = self._post([call, {**call, "id": 2}], **{"X-Request-Id": "bad id!"})
+        assert len(resp.headers["X-Request-Id"]) == 16
+        assert "call" in parse_server_timing(resp.headers["Server-Timing"])
+
+    def test_log_records_carry_request_id_and_mount(self):
+        handler = _Records()
+        install_request_log_filter([handler])
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            call = {"jsonrpc": "2.0", "method": "t.greet", "params": ["Bob"], "id": 1}
+            self._post(call, **{"X-Request-Id": "req-2"})
+        finally:
+            logger.removeHandler(handler)
+        (record,) = handler.records
+        assert (record.request_id, record.mount) == ("req-2", "t")  # pyright: ignore[reportAttributeAccessIssue]
+        assert "req=req-2 mount=t run= node= greeting Bob" in handler.format(record)
+
+    @tornado.testing.gen_test
+    async def test_client_collects_server_timing(self):
+        client = WoodglueClient(self.get_url(""))
+        with server_timing() as timings:
+            await client.call("t.greet", name="Ann")
+            await client.call_many([("t.greet", {"name": "Bob"}), ("t.greet", {"name": "Cy"})])
+        await client.call("t.greet", name="Dee")
+        assert len(timings) == 2
+        assert all(t.request_id and t.total is not None for t in timings)
+        assert "call" in timings[0].phases
@@ -0,0 +1,204 @@
+"""Tests for woodglue.tracing: spans across RPC, triggers and DAG runs."""
+
+import asyncio
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+import tornado.testing
+from lythonic.compose.engine import StorageConfig as LythStorageConfig
+from lythonic.compose.namespace import Dag, Namespace, NsNodeConfig, TriggerConfig
+from typing_extensions import override
+
+from woodglue.apps.server import create_app
+from woodglue.apps.system_api import build_system_namespace
+from woodglue.client import WoodglueClient
+from woodglue.config import NamespaceEntry, TracingConfig, WoodglueConfig
+from woodglue.engine import create_engine
+from woodglue.mount import MountContext
+from woodglue.tracing import (
+    SpanRecord,
+    SqliteSpanExporter,
+    Tracer,
+    format_traceparent,
+    parse_traceparent,
+)
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def greet(name: str) -> str:
+    """Say hello."""
+    return f"Hello, {name}!"
+
+
+def fail() -> None:
+    """Always raises."""
+    raise RuntimeError("boom")
+
+
+def fetch(n: int) -> int:
+    return n + 1
+
+
+def double(x: int) -> int:
+    return x * 2
+
+
+def _by_name(spans: list[SpanRecord]) -> dict[str, SpanRecord]:
+    return {s.name: s for s in spans}
+
+
+class TestRpcTracing(tornado.testing.AsyncHTTPTestCase):
+    tmp: tempfile.TemporaryDirectory[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    tracer: Tracer  # pyright: ignore[reportUninitializedInstanceVariable]
+
+    @override
+    def get_app(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tracer = Tracer(TracingConfig(), SqliteSpanExporter(Path(self.tmp.name, "traces.db")))
+        ns = Namespace()
+        ns.register(greet, nsref="greet", tags=["api"])
+        ns.register(fail, nsref="fail", tags=["api"])
+        namespaces = {"t": (ns, NamespaceEntry(gref="unused"))}
+        system_ns = build_system_namespace(namespaces, None, tracer=self.tracer)
+        namespaces["system"] = (system_ns, NamespaceEntry(gref="builtin:system"))
+        return create_app(
+            namespaces=namespaces, config=WoodglueConfig(namespaces={}), tracer=self.tracer
+        )
+
+    @override
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.tmp.cleanup()
+
+    async def _call(self, method: str, headers: dict[str, str] | None = None, **params: Any) -> Any:
+        body = json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": 1})
+        resp = await self.http_client.fetch(
+            self.get_url("/rpc"), method="POST", body=body, headers=headers
+        )
+        return json.loads(resp.body)
+
+    @tornado.testing.gen_test
+    async def test_request_and_method_spans_continue_traceparent(self):
+        reply = await self._call("t.greet", {"traceparent": PARENT}, name="Ann")
+        assert reply["result"] == "Hello, Ann!"
+        await self._call("t.fail")
+
+        summaries = (await self._call("system.traces"))["result"]
+        assert [s["name"] for s in summaries][-2:] == ["POST /rpc", "POST /rpc"]
+        assert summaries[-1]["trace_id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert summaries[-1]["spans"] == 2
+        assert summaries[-2]["errors"] == 1
+
+        spans = [
+            SpanRecord.model_validate(s)
+            for s in (await self._call("system.trace_spans", trace_id=summaries[-1]["trace_id"]))[
+                "result"
+            ]
+        ]
+        by_name = _by_name(spans)
+        server, method = by_name["POST /rpc"], by_name["t.greet"]
+        assert server.parent_id == "00f067aa0ba902b7"
+        assert server.kind == "server"
+        assert server.attributes["http_status"] == 200
+        assert server.attributes["methods"] == ["t.greet"]
+        assert method.parent_id == server.span_id
+        assert method.kind == "method"
+
+        failed = _by_name(self.tracer.exporter.spans(summaries[-2]["trace_id"]))["t.fail"]
+        assert (failed.status, failed.attributes["error"]) == ("error", "RuntimeError")
+
+    @tornado.testing.gen_test
+    async def test_unsampled_traceparent_is_not_recorded(self):
+        unsampled = PARENT[:-2] + "00"
+        await self._call("t.greet", {"traceparent": unsampled}, name="Bob")
+        assert self.tracer.exporter.traces() == []
+
+    @tornado.testing.gen_test
+    async def test_client_propagates_current_span(self):
+        client = WoodglueClient(self.get_url(""))
+        with self.tracer.span("outer", "client") as outer:
+            await client.call("t.greet", name="Cy")
+        spans = _by_name(self.tracer.exporter.spans(outer.context.trace_id))
+        assert spans["POST /rpc"].parent_id == outer.context.span_id
+        assert spans["t.greet"].parent_id == spans["POST /rpc"].span_id
+
+
+def test_traceparent_round_trip() -> None:
+    ctx = parse_traceparent(PARENT)
+    assert ctx is not None
+    assert format_traceparent(ctx) == PARENT
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_exporter_keeps_latest_spans_and_samples() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = SqliteSpanExporter(Path(tmp, "traces.db"), max_spans=3, batch_size=2)
+        tracer = Tracer(TracingConfig(), exporter)
+        for i in range(5):
+            tracer.start_span(f"s{i}", "test").end()
+        assert [t.name for t in exporter.traces()] == ["s4", "s3", "s2"]
+        assert [t.name for t in exporter.traces(name="s3")] == ["s3"]
+
+        never = Tracer(TracingConfig(sample_rate=0.0), exporter, random.Random(0))
+        with never.span("dropped", "test"):
+            pass
+        assert "dropped" not in {t.name for t in exporter.traces()}
+
+
+def test_exporter_writes_lone_span_after_flush_interval() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp, "traces.db")
+        exporter = SqliteSpanExporter(db, batch_size=100, flush_interval=0.05)
+        Tracer(TracingConfig(), exporter).start_span("lone", "test").end()
+        deadline = time.monotonic() + 5
+        rows = 0
+        while not rows and time.monotonic() < deadline:
+            time.sleep(0.02)
+            with closing(sqlite3.connect(db)) as conn:
+                rows = conn.execute("SELECT COUNT(*) FROM spans").fetchone()[0]
+        assert rows == 1
+        assert exporter.written == 1
+        exporter.close()
+        assert not exporter._writer.is_alive()  # pyright: ignore[reportPrivateUsage]
+
+
+def test_trigger_and_dag_spans() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = Tracer(TracingConfig(), SqliteSpanExporter(Path(tmp, "traces.db")))
+        dag = Dag()
+        dag.node(fetch) >> dag.node(double)  # pyright: ignore[reportUnusedExpression]
+        ns = Namespace()
+        ns.register(
+            dag,
+            nsref="pipe",
+            config=NsNodeConfig(nsref="pipe", triggers=[TriggerConfig(name="go", type="push")]),
+        )
+        storage = LythStorageConfig()
+        storage.resolve_paths(MountContext("p", Path(tmp, "mounts")).state_dir)
+        storage.log_file = None
+        ns.mount(storage)
+        engine = create_engine("p", ns, tracer)
+        engine.trigger_manager.activate("go")
+
+        async def fire() -> str:
+            with tracer.span("outer", "test") as outer:
+                result = await engine.trigger_manager.fire("go", {"n": 2})
+            assert result.outputs == {"double": 6}
+            return outer.context.trace_id
+
+        spans = tracer.exporter.spans(asyncio.run(fire()))
+        by_name = _by_name(spans)
+        assert by_name["trigger go"].parent_id == by_name["outer"].span_id
+        run = by_name["pipe"]
+        assert (run.kind, run.parent_id) == ("dag_run", by_name["trigger go"].span_id)
+        assert by_name["fetch"].parent_id == run.span_id
+        assert by_name["double"].parent_id == run.span_id
+        assert all(s.status == "ok" for s in spans)